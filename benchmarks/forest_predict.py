@@ -0,0 +1,68 @@
+"""
+Benchmark flat forest inference (forest_predict) against scikit-learn.
+
+Fits a Random Forest on random 4 band pixels, predicts a scene of
+random pixels with scikit-learn, the numba walk (if numba is installed),
+and the numpy fallback, then prints the runtime of every engine and its
+maximum absolute difference from scikit-learn.
+
+Usage: python benchmarks/forest_predict.py [n_pixels] [n_trees] [n_jobs]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import sdb
+import sdb.modeling
+
+
+def timed(function, *args, **kwargs):
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    n_pixels = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    n_trees = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    n_jobs = int(sys.argv[3]) if len(sys.argv) > 3 else -2
+
+    rng = np.random.default_rng(0)
+    bands = ['band_1', 'band_2', 'band_3', 'band_4']
+    features = pd.DataFrame(rng.random((5000, 4)), columns=bands)
+    label = pd.Series(-15 * features['band_1'] + 3 * features['band_2'])
+    scene = rng.random((n_pixels, 4)).astype(np.float32)
+
+    regressor = sdb.fit_regressor(
+        'rf', features, label, n_estimators=n_trees, random_state=0,
+        n_jobs=n_jobs
+    )
+    forest = sdb.compile_forest(regressor)
+
+    z_sklearn, runtime = timed(regressor.predict, scene)
+    print(f'{n_pixels} pixels, {n_trees} trees, {len(bands)} bands')
+    print(f'scikit-learn\t{runtime:.3f} s')
+
+    engines = {'numpy fallback': None}
+    if sdb.modeling.njit is not None:
+        # First call compiles the walk, so it is left out of the runtime
+        sdb.forest_predict(forest, scene[:1], n_jobs=n_jobs)
+        engines = {'numba walk': sdb.modeling.njit, **engines}
+
+    for name, njit in engines.items():
+        sdb.modeling.njit = njit
+        z_flat, runtime = timed(
+            sdb.forest_predict, forest, scene, n_jobs=n_jobs
+        )
+        difference = np.abs(z_flat - z_sklearn).max()
+        print(f'{name}\t{runtime:.3f} s (max difference {difference:.2e})')
+
+
+if __name__ == '__main__':
+    main()
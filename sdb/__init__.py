@@ -1,8 +1,18 @@
-from .io import read_geotiff, read_shapefile, write_geotiff, write_shapefile
-from .modeling import prediction
-from .postprocessing import (evaluate, out_depth_filter, reshape_prediction,
-                             scatter_plotter)
-from .preprocessing import (clip_vector, features_label, in_depth_filter,
-                            reproject_vector, split_attribute, split_random,
-                            unravel)
+from .io import (read_geotiff, read_shapefile, read_shapefile_chunks,
+                 write_geotiff, write_multiband, write_shapefile,
+                 write_vector)
+from .modeling import (apply_model, compare_models, compile_forest,
+                       fit_incremental, fit_regressor, forest_predict,
+                       load_model, parameter_search, predict_array,
+                       predict_uncertainty, prediction, save_model,
+                       warm_start_forest)
+from .postprocessing import (accuracy_report, contour_lines, evaluate,
+                             fill_gaps, out_depth_filter, overview_pyramid,
+                             postprocess_depth, quicklook, reshape_prediction,
+                             residual_surface, scatter_plotter)
+from .preprocessing import (aggregate_raster, aggregate_samples, clip_vector,
+                            derived_features, features_label, in_depth_filter,
+                            otsu_threshold, reproject_vector, sample_chunks,
+                            split_attribute, split_random, unravel,
+                            water_index, water_mask)
 from .utils import array_to_dataarray, median_filter, point_sampling
@@ -1,11 +1,23 @@
 from pathlib import Path
-from typing import Any
+from typing import Any, Dict, Iterator, Sequence, Tuple
 
 import geopandas as gpd
+import numpy as np
+import numpy.typing as npt
 import pandas as pd
+import rasterio
 import rioxarray as rxr
 import xarray as xr
+from affine import Affine
+from joblib import effective_n_jobs
 from pyproj.crs.crs import CRS
+from rasterio import windows
+from rasterio.enums import Resampling
+from rasterio.errors import WindowError
+from rasterio.transform import from_origin
+from rasterio.warp import (calculate_default_transform, reproject,
+                           transform_bounds)
+from rasterio.windows import Window
 
 
 def read_geotiff(
@@ -61,10 +73,150 @@ def read_shapefile(
     return gdf
 
 
+def read_shapefile_chunks(
+        vector_loc: Path | str,
+        chunk_size: int = 100000,
+        **params: Any,
+) -> Iterator[gpd.GeoDataFrame]:
+    """
+    Read shapefile vector data containing depth samples in chunks of rows,
+    so surveys larger than memory can be processed one part at a time.
+
+    Parameters
+    ----------
+    vector_loc : Path | str
+        Vector data location containing point depth samples.
+    chunk_size : int, optional
+        Number of rows (features) read at a time. Default is 100000.
+    **params : Any
+        Additional parameters passed to geopandas.read_file()
+
+    Yields
+    ------
+    GeoDataFrame
+        Depth samples from the next chunk of rows.
+    """
+
+    if chunk_size < 1:
+        raise ValueError('Allowed chunk size: >= 1')
+
+    start = 0
+    while True:
+        gdf = read_shapefile(
+            vector_loc,
+            rows=slice(start, start + chunk_size),
+            **params
+        )
+
+        if gdf.empty:
+            return
+
+        yield gdf
+
+        if len(gdf) < chunk_size:
+            return
+
+        start += chunk_size
+
+
+def _target_grid(
+        raster: xr.DataArray,
+        crs: CRS | str | None,
+        resolution: float | Tuple[float, float] | None,
+        bounds: Sequence[float] | None
+) -> Tuple[CRS, Affine, int, int]:
+    """
+    Target CRS, transform, width, and height of a reprojected raster.
+    """
+
+    src_crs = raster.rio.crs
+    crs = src_crs if crs is None else CRS.from_user_input(crs)
+    height, width = raster.shape[-2:]
+
+    transform, default_width, default_height = calculate_default_transform(
+        src_crs, crs, width, height, *raster.rio.bounds(),
+        resolution=resolution
+    )
+    if bounds is None:
+        return crs, transform, default_width, default_height
+
+    x_res, y_res = transform.a, -transform.e
+    left, bottom, right, top = bounds
+    transform = from_origin(left, top, x_res, y_res)
+    width = int(np.ceil((right - left) / x_res))
+    height = int(np.ceil((top - bottom) / y_res))
+
+    return crs, transform, width, height
+
+
+def _warp_window(
+        array: np.ndarray,
+        src_crs: CRS,
+        src_transform: Affine,
+        window: Window,
+        crs: CRS,
+        transform: Affine,
+        resampling: str,
+        n_jobs: int
+) -> np.ndarray:
+    """
+    Reproject the part of a 2D array covering a target window,
+    only reading the source window around it.
+    """
+
+    block = np.full((window.height, window.width), np.nan)
+
+    # Source window around the target window with a margin for kernels
+    src_bounds = transform_bounds(
+        crs, src_crs, *windows.bounds(window, transform), densify_pts=21
+    )
+    src_window = windows.from_bounds(*src_bounds, transform=src_transform)
+    col_off = int(np.floor(src_window.col_off)) - 2
+    row_off = int(np.floor(src_window.row_off)) - 2
+    src_window = Window(
+        col_off, row_off,
+        int(np.ceil(src_window.col_off + src_window.width)) + 2 - col_off,
+        int(np.ceil(src_window.row_off + src_window.height)) + 2 - row_off
+    )
+    try:
+        src_window = src_window.intersection(
+            Window(0, 0, array.shape[1], array.shape[0])
+        )
+    except WindowError:
+        return block
+
+    row_slice, col_slice = src_window.toslices()
+    source = array[row_slice, col_slice]
+    floating = np.issubdtype(source.dtype, np.floating)
+
+    reproject(
+        source=source if floating else source.astype(np.float64),
+        destination=block,
+        src_transform=windows.transform(src_window, src_transform),
+        src_crs=src_crs,
+        src_nodata=np.nan,
+        dst_transform=windows.transform(window, transform),
+        dst_crs=crs,
+        dst_nodata=np.nan,
+        resampling=Resampling[resampling],
+        num_threads=effective_n_jobs(n_jobs)
+    )
+
+    return block
+
+
 def write_geotiff(
         raster: xr.DataArray,
         raster_loc: Path | str,
         to_tif: bool = False,
+        dtype: npt.DTypeLike | None = None,
+        overviews: Sequence[int] | None = None,
+        overview_resampling: str = 'average',
+        crs: CRS | str | None = None,
+        resolution: float | Tuple[float, float] | None = None,
+        bounds: Sequence[float] | None = None,
+        resampling: str = 'bilinear',
+        n_jobs: int = -2,
         **params: Any,
 ) -> None:
     """
@@ -81,6 +233,31 @@ def write_geotiff(
         The raster will be written as Geotiff file if True,
         otherwise it will be saved with the provided extension.
         Default is False.
+    dtype : npt.DTypeLike | None, optional
+        Data type of the written raster, e.g. np.float32 to halve
+        the file size. If None, the dataarray data type is kept.
+        Default is None.
+    overviews : Sequence[int] | None, optional
+        Decimation factors of internal overviews, e.g. the factors of
+        overview_pyramid (other than 1). If None or empty, no overviews
+        are built. Default is None.
+    overview_resampling : str, optional
+        Resampling method of the overviews, e.g. 'average' or 'nearest'
+        (the same as the overview_pyramid method). Default is 'average'.
+    crs : CRS | str | None, optional
+        Target CRS to reproject the raster to while writing, e.g.
+        'EPSG:32748'. If None, the raster CRS is kept. Default is None.
+    resolution : float | Tuple[float, float] | None, optional
+        Target pixel size in target CRS units. If None, it is estimated
+        from the raster. Default is None.
+    bounds : Sequence[float] | None, optional
+        Target extent (left, bottom, right, top) in target CRS. If None,
+        the whole raster extent is used. Default is None.
+    resampling : str, optional
+        Resampling method of the reprojection, e.g. 'nearest',
+        'bilinear', 'cubic', or 'average'. Default is 'bilinear'.
+    n_jobs : int, optional
+        The number of warping threads. Default is -2.
     **params : Any
         Additional parameters passed to rioxarray.DataArray.rio.to_raster()
 
@@ -92,8 +269,205 @@ def write_geotiff(
     if to_tif:
         raster_loc = Path(raster_loc).with_suffix('.tif')
 
+    if dtype is not None:
+        raster = raster.astype(dtype, copy=False)
+
+    if crs is not None or resolution is not None or bounds is not None:
+        if Path(raster_loc).suffix.lower() in ('.tif', '.tiff'):
+            write_multiband(
+                {
+                    str(name): band
+                    for name, band in zip(
+                        raster.coords.get('band_name', raster.band).values,
+                        raster.transpose('band', ...)
+                    )
+                },
+                raster_loc,
+                overviews=overviews,
+                overview_resampling=overview_resampling,
+                crs=crs,
+                resolution=resolution,
+                bounds=bounds,
+                resampling=resampling,
+                n_jobs=n_jobs,
+                **params
+            )
+            return
+
+        # Other formats (e.g. XYZ) can only be copied from a full raster
+        target_crs, transform, width, height = _target_grid(
+            raster, crs, resolution, bounds
+        )
+        raster = raster.rio.reproject(
+            target_crs,
+            shape=(height, width),
+            transform=transform,
+            resampling=Resampling[resampling],
+            num_threads=effective_n_jobs(n_jobs)
+        )
+
     raster.rio.to_raster(raster_loc, **params)
 
+    overviews = [factor for factor in overviews or [] if factor > 1]
+    if overviews:
+        with rasterio.open(raster_loc, 'r+') as dataset:
+            dataset.build_overviews(
+                overviews,
+                Resampling[overview_resampling]
+            )
+            dataset.update_tags(ns='rio_overview', resampling=overview_resampling)
+
+
+def write_multiband(
+        bands: Dict[str, xr.DataArray],
+        raster_loc: Path | str,
+        dtype: npt.DTypeLike | None = None,
+        overviews: Sequence[int] | None = None,
+        overview_resampling: str = 'average',
+        block_size: int = 256,
+        crs: CRS | str | None = None,
+        resolution: float | Tuple[float, float] | None = None,
+        bounds: Sequence[float] | None = None,
+        resampling: str = 'bilinear',
+        band_resampling: Dict[str, str] | None = None,
+        n_jobs: int = -2,
+        **params: Any,
+) -> None:
+    """
+    Write several single band dataarrays on the same grid (e.g. depth,
+    uncertainty, and masks) into one tiled multi-band Geotiff in a single
+    pass, without stacking them into a new array. Each band is described
+    by its name, and the georeferencing and overviews are written once.
+    The bands can be reprojected or resampled to a target grid while
+    writing, warping one row of tiles at a time from the source window
+    around it, so no full size reprojected copy is kept in memory.
+
+    Parameters
+    ----------
+    bands : Dict[str, xr.DataArray]
+        Band names (descriptions) and their raster data in dataarray,
+        in band order. The first dataarray georeferences the file.
+    raster_loc : Path | str
+        Raster save data location.
+    dtype : npt.DTypeLike | None, optional
+        Data type of the written raster. If None, the first dataarray
+        data type is used. Default is None.
+    overviews : Sequence[int] | None, optional
+        Decimation factors of internal overviews. If None or empty,
+        no overviews are built. Default is None.
+    overview_resampling : str, optional
+        Resampling method of the overviews. Default is 'average'.
+    block_size : int, optional
+        Tile width and height (multiple of 16), rows of tiles are written
+        at a time. Rasters smaller than a tile are not tiled.
+        Default is 256.
+    crs : CRS | str | None, optional
+        Target CRS, e.g. 'EPSG:32748'. If None, the raster CRS is kept.
+        Default is None.
+    resolution : float | Tuple[float, float] | None, optional
+        Target pixel size in target CRS units. If None, it is estimated
+        from the raster. Default is None.
+    bounds : Sequence[float] | None, optional
+        Target extent (left, bottom, right, top) in target CRS. If None,
+        the whole raster extent is used. Default is None.
+    resampling : str, optional
+        Resampling method of the reprojection, e.g. 'nearest',
+        'bilinear', 'cubic', or 'average'. Default is 'bilinear'.
+    band_resampling : Dict[str, str] | None, optional
+        Resampling methods of some bands by band name, replacing
+        resampling, e.g. {'Water Mask': 'nearest'} to keep categorical
+        bands categorical. Default is None.
+    n_jobs : int, optional
+        The number of warping threads. Default is -2.
+    **params : Any
+        Additional creation options passed to rasterio.open(),
+        e.g. compress='deflate'.
+
+    Returns
+    -------
+    None
+    """
+
+    methods = [
+        (band_resampling or {}).get(name, resampling) for name in bands
+    ]
+    for method in methods:
+        if method not in Resampling.__members__:
+            raise ValueError(
+                f'Invalid resampling: {method}.\n'
+                f'Allowed: {set(Resampling.__members__)}'
+            )
+
+    first = next(iter(bands.values()))
+    src_height, src_width = first.shape[-2:]
+    src_crs = first.rio.crs
+    src_transform = first.rio.transform(recalc=False)
+    dtype = np.dtype(first.dtype if dtype is None else dtype)
+
+    warp = crs is not None or resolution is not None or bounds is not None
+    if warp:
+        crs, transform, width, height = _target_grid(
+            first, crs, resolution, bounds
+        )
+    else:
+        crs, transform = src_crs, src_transform
+        height, width = src_height, src_width
+
+    profile = {
+        'driver': 'GTiff',
+        'width': width,
+        'height': height,
+        'count': len(bands),
+        'dtype': dtype,
+        'crs': crs,
+        'transform': transform,
+        'nodata': np.nan if np.issubdtype(dtype, np.floating) else None,
+        **params
+    }
+
+    # Rasters smaller than a tile are written in strips to avoid padding
+    if min(height, width) >= block_size:
+        profile.update(tiled=True, blockxsize=block_size, blockysize=block_size)
+
+    # 2D views of the band buffers
+    arrays = [
+        band.values.reshape(src_height, src_width) for band in bands.values()
+    ]
+
+    with rasterio.open(raster_loc, 'w', **profile) as dataset:
+        for index, name in enumerate(bands, start=1):
+            dataset.set_band_description(index, name)
+
+        # All bands of a row of tiles are written before the next one,
+        # so every tile is complete when it leaves the block cache
+        for start in range(0, height, block_size):
+            stop = min(start + block_size, height)
+            window = Window(0, start, width, stop - start)
+            for index, (array, method) in enumerate(
+                    zip(arrays, methods), start=1
+            ):
+                if warp:
+                    block = _warp_window(
+                        array, src_crs, src_transform, window,
+                        crs, transform, method, n_jobs
+                    )
+                else:
+                    block = array[start:stop]
+
+                dataset.write(
+                    block.astype(dtype, copy=False),
+                    index,
+                    window=window
+                )
+
+        overviews = [factor for factor in overviews or [] if factor > 1]
+        if overviews:
+            dataset.build_overviews(
+                overviews,
+                Resampling[overview_resampling]
+            )
+            dataset.update_tags(ns='rio_overview', resampling=overview_resampling)
+
 
 def write_shapefile(
         table: pd.DataFrame,
@@ -144,4 +518,36 @@ def write_shapefile(
         crs=crs
     )
 
-    gdf.to_file(vector_loc, **params)
\ No newline at end of file
+    gdf.to_file(vector_loc, **params)
+
+
+def write_vector(
+        vector: gpd.GeoDataFrame,
+        vector_loc: Path | str,
+        **params: Any,
+) -> None:
+    """
+    Write GeoDataFrame (e.g. contour lines) to a vector file.
+    Files with .parquet extension are written as GeoParquet (needs the
+    optional pyarrow package), other files using the driver guessed from
+    their extension, e.g. GeoPackage for .gpkg.
+
+    Parameters
+    ----------
+    vector : gpd.GeoDataFrame
+        Vector data.
+    vector_loc : Path | str
+        Vector save data location.
+    **params : Any
+        Additional parameters passed to GeoDataFrame.to_parquet()
+        or GeoDataFrame.to_file()
+
+    Returns
+    -------
+    None
+    """
+
+    if Path(vector_loc).suffix.lower() == '.parquet':
+        vector.to_parquet(vector_loc, **params)
+    else:
+        vector.to_file(vector_loc, **params)
@@ -1,11 +1,1184 @@
-from typing import Any, Dict, Set, Tuple
+import atexit
+import copy
+import platform
+import shutil
+import tempfile
+import time
+import warnings
+import weakref
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Sequence, Set, Tuple
 
+import joblib
 import numpy as np
+import numpy.typing as npt
 import pandas as pd
-from joblib import parallel_backend
+import sklearn
+from joblib import (Parallel, delayed, dump, effective_n_jobs, load,
+                    parallel_backend)
+from sklearn.base import RegressorMixin
 from sklearn.ensemble import RandomForestRegressor
-from sklearn.linear_model import LinearRegression
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.linear_model import LinearRegression, SGDRegressor
+from sklearn.model_selection import (GridSearchCV, HalvingGridSearchCV,
+                                     RandomizedSearchCV)
 from sklearn.neighbors import KNeighborsRegressor
+from sklearn.pipeline import Pipeline, make_pipeline
+from sklearn.preprocessing import FunctionTransformer, StandardScaler
+
+from .postprocessing import evaluate
+from .preprocessing import derived_features
+
+try:
+    from numba import config as numba_config
+    from numba import get_num_threads, njit, prange, set_num_threads
+except ImportError:
+    njit = None
+    prange = range
+
+try:
+    from distributed import Client, LocalCluster
+except ImportError:
+    Client = None
+
+ALLOWED_BACKEND: Set[str] = {'loky', 'threading', 'multiprocessing', 'dask'}
+PROCESS_BACKEND: Set[str] = {'loky', 'multiprocessing'}
+MODEL_ALIAS: Dict[str, Set[str]] = {
+    'knn': {
+        'knn', 'k_nearest_neighbors', 'K-Nearest Neighbors'
+    },
+    'linear': {
+        'mlr', 'linear', 'linear_regression', 'Multiple Linear Regression'
+    },
+    'rf': {
+        'rf', 'random_forest', 'Random Forest'
+    },
+    'sgd': {
+        'sgd', 'sgd_regression', 'SGD Linear Regression'
+    }
+}
+STANDARDIZED_MODELS: Set[str] = {'knn', 'sgd'}
+INCREMENTAL_MODELS: Set[str] = {'sgd'}
+SEARCH_TYPES: Set[str] = {'grid', 'random', 'halving'}
+UNCERTAINTY_TYPES: Set[str] = {'std', 'interval'}
+FOREST_NODE = np.dtype([
+    ('feature', np.int32),
+    ('threshold', np.float32),
+    ('left', np.int32),
+    ('right', np.int32),
+])
+
+
+def check_backend(backend: str) -> None:
+    """
+    Check if the parallel backend is one of the allowed backends.
+
+    Parameters
+    ----------
+    backend : str
+        Backend to use for parallel processing.
+
+    Raises
+    ------
+    ValueError
+        If the backend is not allowed.
+    ImportError
+        If the backend is 'dask' and distributed is not installed.
+    """
+
+    if backend not in ALLOWED_BACKEND:
+        raise ValueError(
+            f'Invalid backend: {backend}.\n'
+            f'Allowed: {ALLOWED_BACKEND}'
+        )
+
+    if backend == 'dask' and Client is None:
+        raise ImportError(
+            'The dask backend requires the distributed package.\n'
+            'Install it using: pip install distributed'
+        )
+
+
+def local_backend(backend: str) -> str:
+    """
+    Get the joblib backend used for work that stays on this machine.
+    Fitting and searching run on the train data only, so with the dask
+    backend they use threads and only the scene prediction is sent
+    to the cluster.
+
+    Parameters
+    ----------
+    backend : str
+        Backend to use for parallel processing.
+
+    Returns
+    -------
+    str
+        Joblib backend name.
+    """
+
+    if backend == 'dask':
+        return 'threading'
+
+    return backend
+
+
+def model_key(model: str) -> str:
+    """
+    Get the short model name from its alias.
+
+    Parameters
+    ----------
+    model : str
+        Model name or one of its aliases. See MODEL_ALIAS for more details.
+
+    Returns
+    -------
+    str
+        Short model name ('knn', 'linear', 'rf', or 'sgd').
+
+    Raises
+    ------
+    ValueError
+        If the model name is not recognized.
+    """
+
+    for key, aliases in MODEL_ALIAS.items():
+        if model in aliases:
+            return key
+
+    raise ValueError(
+        f'Invalid model: {model}.\n'
+        f'Allowed: {set.union(*MODEL_ALIAS.values())}'
+    )
+
+
+def build_regressor(model: str, **params: Any) -> RegressorMixin:
+    """
+    Create an unfitted regressor based on model name.
+
+    Parameters
+    ----------
+    model : str
+        The model to use. Options are 'knn', 'linear', 'rf', or 'sgd'.
+        See MODEL_ALIAS for more details.
+    **params : Any
+        Parameters to pass to the respective model.
+        K-Nearest Neighbors and SGD Linear Regression also accept
+        standardize (bool) to scale every band to zero mean and unit
+        variance first, so no band dominates the distances or the
+        gradient steps.
+
+    Returns
+    -------
+    RegressorMixin
+        Unfitted scikit-learn regressor.
+    """
+
+    regressor_dict = {
+        'knn': KNeighborsRegressor,
+        'linear': LinearRegression,
+        'rf': RandomForestRegressor,
+        'sgd': SGDRegressor,
+    }
+
+    key = model_key(model)
+    params = dict(params)
+    standardize = (
+        params.pop('standardize', False) if key in STANDARDIZED_MODELS
+        else False
+    )
+
+    regressor = regressor_dict[key](**params)
+
+    if standardize:
+        regressor = make_pipeline(StandardScaler(), regressor)
+
+    return regressor
+
+
+def add_derived(
+        regressor: RegressorMixin,
+        derived: Dict[str, Any] | None = None
+) -> RegressorMixin:
+    """
+    Put derived features in front of a regressor, so they are calculated
+    the same way for train data and for every predicted block of pixels.
+
+    Parameters
+    ----------
+    regressor : RegressorMixin
+        Scikit-learn regressor.
+    derived : Dict[str, Any] | None, optional
+        Parameters of derived_features (stumpf, lyzenga, keep_bands, n).
+        If None or empty, the regressor is returned as is. Default is None.
+
+    Returns
+    -------
+    RegressorMixin
+        Regressor with derived features step.
+    """
+
+    if not derived:
+        return regressor
+
+    return make_pipeline(
+        FunctionTransformer(derived_features, kw_args=dict(derived)),
+        regressor
+    )
+
+
+def final_regressor(regressor: RegressorMixin) -> RegressorMixin:
+    """
+    Get the regressor at the end of (nested) pipelines.
+    """
+
+    while isinstance(regressor, Pipeline):
+        regressor = regressor[-1]
+
+    return regressor
+
+
+def is_knn(regressor: RegressorMixin) -> bool:
+    """
+    Check if a regressor is K-Nearest Neighbors,
+    with or without standardization or derived features.
+    """
+
+    return isinstance(final_regressor(regressor), KNeighborsRegressor)
+
+
+def fit_regressor(
+        model: str,
+        features_train: pd.DataFrame,
+        label_train: pd.Series,
+        backend: str = 'threading',
+        n_jobs: int = -2,
+        derived: Dict[str, Any] | None = None,
+        **params: Any
+) -> RegressorMixin:
+    """
+    Create and fit a regressor using train data.
+
+    Parameters
+    ----------
+    model : str
+        The model to use. Options are 'knn', 'linear', or 'rf'.
+        See MODEL_ALIAS for more details.
+    features_train : pd.DataFrame
+        Features from train data.
+    label_train : pd.Series
+        Label from train data.
+    backend : str, optional
+        Backend to use for parallel processing. Default is 'threading'.
+    n_jobs : int, optional
+        The number of jobs to run in parallel. Default is -2.
+    derived : Dict[str, Any] | None, optional
+        Parameters of derived_features. The derived features become part
+        of the fitted regressor. Default is None.
+    **params : Any
+        Parameters to pass to the respective model.
+
+    Returns
+    -------
+    RegressorMixin
+        Fitted scikit-learn regressor.
+    """
+
+    check_backend(backend)
+    regressor = add_derived(build_regressor(model, **params), derived)
+
+    with parallel_backend(backend=local_backend(backend), n_jobs=n_jobs):
+        regressor.fit(features_train.to_numpy(), np.asarray(label_train))
+
+    return regressor
+
+
+def warm_start_forest(
+        regressor: RegressorMixin,
+        features_train: pd.DataFrame,
+        label_train: pd.Series,
+        backend: str = 'threading',
+        n_jobs: int = -2,
+        **params: Any
+) -> RegressorMixin | None:
+    """
+    Update a fitted Random Forest to new parameters without fitting it
+    again when only the number of trees changed. Extra trees are added
+    using warm start, fewer trees are taken from the fitted ones. Trees
+    are grown one after another from the same random state, so the result
+    is the same as a new fit when random_state is fixed.
+    A copy of the regressor is updated, with or without derived features,
+    so the given regressor is left unchanged.
+
+    Parameters
+    ----------
+    regressor : RegressorMixin
+        Random Forest fitted using the same train data.
+    features_train : pd.DataFrame
+        Features from train data.
+    label_train : pd.Series
+        Label from train data.
+    backend : str, optional
+        Backend to use for parallel processing. Default is 'threading'.
+    n_jobs : int, optional
+        The number of jobs to run in parallel. Default is -2.
+    **params : Any
+        New parameters of the Random Forest.
+
+    Returns
+    -------
+    RegressorMixin | None
+        Updated copy of the regressor, or None if other parameters changed
+        and a new fit is needed.
+    """
+
+    forest = final_regressor(regressor)
+    if not isinstance(forest, RandomForestRegressor) or forest.oob_score:
+        return None
+
+    additive = {'n_estimators', 'n_jobs', 'verbose', 'warm_start'}
+    new_params = build_regressor('rf', **params).get_params()
+    old_params = forest.get_params()
+    if any(
+            new_params[key] != old_params[key]
+            for key in new_params if key not in additive
+    ):
+        return None
+
+    check_backend(backend)
+    regressor = copy.deepcopy(regressor)
+    forest = final_regressor(regressor)
+    n_estimators = new_params['n_estimators']
+    forest.set_params(n_jobs=new_params['n_jobs'], verbose=new_params['verbose'])
+
+    if n_estimators <= len(forest.estimators_):
+        forest.estimators_ = forest.estimators_[:n_estimators]
+        forest.n_estimators = n_estimators
+        return regressor
+
+    forest.set_params(warm_start=True, n_estimators=n_estimators)
+    try:
+        with parallel_backend(backend=local_backend(backend), n_jobs=n_jobs):
+            regressor.fit(features_train.to_numpy(), np.asarray(label_train))
+    finally:
+        forest.set_params(warm_start=False)
+
+    return regressor
+
+
+def _pipeline_steps(regressor: RegressorMixin) -> list:
+    """
+    Get every estimator of (nested) pipelines in order.
+    """
+
+    if not isinstance(regressor, Pipeline):
+        return [regressor]
+
+    return [
+        estimator
+        for _, step in regressor.steps
+        for estimator in _pipeline_steps(step)
+    ]
+
+
+def fit_incremental(
+        model: str,
+        chunks: Callable[[], Iterable[Tuple[pd.DataFrame, pd.Series]]],
+        n_epochs: int = 10,
+        shuffle: bool = True,
+        random_state: int | None = 0,
+        derived: Dict[str, Any] | None = None,
+        **params: Any
+) -> RegressorMixin:
+    """
+    Create and fit a regressor chunk by chunk using partial_fit,
+    so the train data never has to be held in memory as one dataframe.
+
+    Transformers that support partial_fit (e.g. the standardization
+    scaler) are fitted with one pass over the chunks first, stateless
+    ones (derived features) with the first chunk, then the regressor
+    is updated with every chunk for n_epochs passes.
+
+    Parameters
+    ----------
+    model : str
+        The model to use. Only models supporting partial_fit, i.e. 'sgd'.
+        See MODEL_ALIAS for more details.
+    chunks : Callable[[], Iterable[Tuple[pd.DataFrame, pd.Series]]]
+        Function without arguments returning a new iterable of
+        (features, label) chunks each time it is called, e.g.
+        lambda: sample_chunks(raster, read_shapefile_chunks(loc), header).
+        It is called once per pass over the train data.
+    n_epochs : int, optional
+        Number of passes over the train data. Default is 10.
+    shuffle : bool, optional
+        Whether to shuffle the rows of every chunk in every pass, since
+        survey samples are usually ordered along the survey track.
+        Default is True.
+    random_state : int | None, optional
+        Random state of the row shuffling. Default is 0.
+    derived : Dict[str, Any] | None, optional
+        Parameters of derived_features. The derived features become part
+        of the fitted regressor. Default is None.
+    **params : Any
+        Parameters to pass to the respective model. Standardization is
+        enabled unless standardize=False is given.
+
+    Returns
+    -------
+    RegressorMixin
+        Fitted scikit-learn regressor.
+
+    Raises
+    ------
+    ValueError
+        If the model does not support partial_fit, the number of epochs
+        is less than 1, or there is no train data.
+    """
+
+    if model_key(model) not in INCREMENTAL_MODELS:
+        raise ValueError(
+            f'Invalid model: {model}, it does not support partial_fit.\n'
+            f'Allowed: {set.union(*(MODEL_ALIAS[key] for key in INCREMENTAL_MODELS))}'
+        )
+
+    if n_epochs < 1:
+        raise ValueError('Allowed number of epochs: >= 1')
+
+    params = dict(params)
+    if model_key(model) in STANDARDIZED_MODELS:
+        params.setdefault('standardize', True)
+
+    regressor = add_derived(build_regressor(model, **params), derived)
+    *transformers, estimator = _pipeline_steps(regressor)
+    rng = np.random.default_rng(random_state)
+
+    def transformed(fitted: list) -> Iterable[Tuple[np.ndarray, np.ndarray]]:
+        for features, label in chunks():
+            features = features.to_numpy()
+            for transformer in fitted:
+                features = transformer.transform(features)
+            yield features, np.asarray(label)
+
+    for i, transformer in enumerate(transformers):
+        if hasattr(transformer, 'partial_fit'):
+            for features, _ in transformed(transformers[:i]):
+                transformer.partial_fit(features)
+        else:
+            for features, _ in transformed(transformers[:i]):
+                transformer.fit(features)
+                break
+
+    n_samples = 0
+    for _ in range(n_epochs):
+        for features, label in transformed(transformers):
+            if shuffle:
+                order = rng.permutation(len(label))
+                features, label = features[order], label[order]
+            estimator.partial_fit(features, label)
+            n_samples += len(label)
+
+    if n_samples == 0:
+        raise ValueError('No train data found in the chunks')
+
+    return regressor
+
+
+def compile_forest(
+        regressor: RandomForestRegressor
+) -> Dict[str, np.ndarray]:
+    """
+    Compile a fitted Random Forest into flat arrays of all trees.
+    Every node is packed into one 16 bytes record of feature, threshold,
+    left, and right, while leaf values are kept in a float32 array.
+    Thresholds are rounded down to float32 so comparing float32 features
+    gives the same split as scikit-learn.
+
+    Parameters
+    ----------
+    regressor : RandomForestRegressor
+        Fitted single output Random Forest regressor.
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        Flat forest containing roots, nodes, and value arrays.
+        Leaf nodes have a negative feature.
+    """
+
+    if not isinstance(regressor, RandomForestRegressor):
+        raise ValueError('Only RandomForestRegressor can be compiled')
+
+    trees = [estimator.tree_ for estimator in regressor.estimators_]
+    if trees[0].n_outputs != 1:
+        raise ValueError('Only single output Random Forest is supported')
+
+    node_counts = np.array([tree.node_count for tree in trees])
+    roots = np.concatenate(([0], np.cumsum(node_counts)[:-1]))
+
+    nodes = np.empty(node_counts.sum(), dtype=FOREST_NODE)
+    nodes['feature'] = np.concatenate([tree.feature for tree in trees])
+    nodes['left'] = np.concatenate(
+        [tree.children_left + root for tree, root in zip(trees, roots)]
+    )
+    nodes['right'] = np.concatenate(
+        [tree.children_right + root for tree, root in zip(trees, roots)]
+    )
+
+    # Largest float32 value that is not above the float64 threshold
+    threshold64 = np.concatenate([tree.threshold for tree in trees])
+    threshold = threshold64.astype(np.float32)
+    above = threshold.astype(np.float64) > threshold64
+    threshold[above] = np.nextafter(threshold[above], np.float32(-np.inf))
+    nodes['threshold'] = threshold
+
+    value = np.concatenate([tree.value[:, 0, 0] for tree in trees])
+
+    return {
+        'roots': roots.astype(np.int32),
+        'nodes': nodes,
+        'value': value.astype(np.float32),
+    }
+
+
+def _forest_block(
+        features: np.ndarray,
+        roots: np.ndarray,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        children: np.ndarray,
+        leaf: np.ndarray,
+        value: np.ndarray,
+) -> np.ndarray:
+    """
+    Walk every tree of a flat forest for one block of pixels at once,
+    keeping only the tree and pixel pairs that have not reached a leaf.
+    Left and right child of node i are children[2 * i] and children[2 * i + 1].
+    """
+
+    n_pixels, n_features = features.shape
+    flat_features = features.ravel()
+
+    node = np.repeat(roots, n_pixels)
+    offset = np.tile(np.arange(n_pixels) * n_features, len(roots))
+    active = np.flatnonzero(~leaf[node])
+
+    while active.size:
+        active_node = node[active]
+        x = flat_features[offset[active] + feature[active_node]]
+        active_node = children[2 * active_node + (x > threshold[active_node])]
+        node[active] = active_node
+        active = active[~leaf[active_node]]
+
+    return value[node].reshape(len(roots), n_pixels).mean(axis=0, dtype=np.float64)
+
+
+def _forest_walk(
+        features: np.ndarray,
+        roots: np.ndarray,
+        nodes: np.ndarray,
+        value: np.ndarray,
+        z_predict: np.ndarray,
+        block_size: int,
+) -> None:
+    """
+    Walk every tree of a flat forest tree by tree over blocks of pixels,
+    so the nodes of one tree stay in cache while a block is evaluated.
+    Compiled with numba when it is installed.
+    """
+
+    n_pixels = len(features)
+    n_trees = len(roots)
+    for b in prange((n_pixels + block_size - 1) // block_size):
+        start = b * block_size
+        stop = min(start + block_size, n_pixels)
+        total = np.zeros(stop - start)
+        for t in range(n_trees):
+            for i in range(start, stop):
+                index = roots[t]
+                node = nodes[index]
+                while node.feature >= 0:
+                    if features[i, node.feature] <= node.threshold:
+                        index = node.left
+                    else:
+                        index = node.right
+                    node = nodes[index]
+                total[i - start] += value[index]
+        z_predict[start:stop] = total / n_trees
+
+
+if njit is not None:
+    _forest_walk = njit(parallel=True, nogil=True)(_forest_walk)
+
+
+def forest_predict(
+        forest: Dict[str, np.ndarray],
+        features: pd.DataFrame | np.ndarray,
+        n_jobs: int = -2,
+        block_size: int = 4096,
+        dtype: npt.DTypeLike = np.float64,
+) -> np.ndarray:
+    """
+    Predict depth using a flat forest from compile_forest.
+    If numba is installed, the trees are walked by a compiled loop
+    over pixels in parallel. Otherwise, blocks of pixels are evaluated in
+    parallel threads and every block walks all trees with vectorized
+    array operations.
+
+    Parameters
+    ----------
+    forest : Dict[str, np.ndarray]
+        Flat forest from compile_forest.
+    features : pd.DataFrame | np.ndarray
+        Feature matrix with one row per pixel and one column per band.
+    n_jobs : int, optional
+        The number of threads to run in parallel. Default is -2.
+    block_size : int, optional
+        Number of pixels in every block. Default is 4096.
+    dtype : npt.DTypeLike, optional
+        Data type of the predicted depth. Default is np.float64.
+
+    Returns
+    -------
+    np.ndarray
+        An array of predicted depth.
+    """
+
+    if isinstance(features, pd.DataFrame):
+        features = features.to_numpy()
+    features = np.ascontiguousarray(features, dtype=np.float32)
+
+    z_predict = np.empty(len(features), dtype=dtype)
+
+    if njit is not None:
+        # Thread count is restored for any other numba code
+        num_threads = get_num_threads()
+        set_num_threads(
+            min(effective_n_jobs(n_jobs), numba_config.NUMBA_NUM_THREADS)
+        )
+        try:
+            _forest_walk(
+                features,
+                forest['roots'],
+                forest['nodes'],
+                forest['value'],
+                z_predict,
+                block_size
+            )
+        finally:
+            set_num_threads(num_threads)
+        return z_predict
+
+    nodes = forest['nodes']
+    feature = np.ascontiguousarray(nodes['feature'])
+    threshold = np.ascontiguousarray(nodes['threshold'])
+    children = np.column_stack((nodes['left'], nodes['right'])).ravel()
+    leaf = feature < 0
+
+    def predict_block(start: int) -> None:
+        stop = start + block_size
+        z_predict[start:stop] = _forest_block(
+            features[start:stop],
+            forest['roots'],
+            feature,
+            threshold,
+            children,
+            leaf,
+            forest['value']
+        )
+
+    Parallel(backend='threading', n_jobs=n_jobs)(
+        delayed(predict_block)(start)
+        for start in range(0, len(features), block_size)
+    )
+
+    return z_predict
+
+
+# Flat forests of fitted Random Forests, see _compiled_forest
+_compiled_forests: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def _compiled_forest(forest: RandomForestRegressor) -> Dict[str, np.ndarray]:
+    """
+    Compile a Random Forest once and reuse the flat forest until its
+    trees change (a new fit, warm start, or fewer trees).
+    """
+
+    estimators = forest.estimators_
+    cached = _compiled_forests.get(forest)
+    if (
+            cached is None
+            or cached[0] is not estimators
+            or cached[1] != len(estimators)
+    ):
+        cached = (estimators, len(estimators), compile_forest(forest))
+        _compiled_forests[forest] = cached
+
+    return cached[2]
+
+
+def _predict_threaded(
+        regressor: RegressorMixin,
+        features: np.ndarray,
+        n_jobs: int,
+        block_size: int,
+        dtype: npt.DTypeLike = np.float64,
+) -> np.ndarray:
+    """
+    Predict blocks of rows in parallel threads sharing one fitted
+    regressor, writing every block into one output array.
+    """
+
+    z_predict = np.empty(len(features), dtype=dtype)
+
+    def predict_block(start: int) -> None:
+        stop = start + block_size
+        z_predict[start:stop] = regressor.predict(features[start:stop])
+
+    Parallel(backend='threading', n_jobs=n_jobs)(
+        delayed(predict_block)(start)
+        for start in range(0, len(features), block_size)
+    )
+
+    return z_predict
+
+
+@lru_cache(maxsize=1)
+def _cached_regressor(model_loc: str) -> RegressorMixin:
+    """
+    Load a dumped regressor once per worker process.
+    """
+
+    return load(model_loc)
+
+
+def _predict_block(
+        model_loc: str,
+        features: np.ndarray,
+) -> np.ndarray:
+    """
+    Predict one block of a memory-mapped feature matrix inside a worker.
+    """
+
+    return _cached_regressor(model_loc).predict(features)
+
+
+def _predict_partition(
+        model: RegressorMixin | Dict[str, np.ndarray],
+        features: np.ndarray,
+) -> np.ndarray:
+    """
+    Predict one partition of the feature matrix inside a dask worker,
+    using either a fitted regressor or a flat forest.
+    """
+
+    if isinstance(model, dict):
+        return forest_predict(model, features=features, n_jobs=1)
+
+    return model.predict(features)
+
+
+# Dask clients of the session, reused by every prediction, see _dask_client
+_dask_clients: Dict[Tuple[str | None, int], Any] = {}
+
+
+@atexit.register
+def _close_dask_clients() -> None:
+    """
+    Close the dask clients and local clusters started in the session.
+    """
+
+    for client in _dask_clients.values():
+        cluster = client.cluster
+        client.close()
+        if cluster is not None:
+            cluster.close()
+    _dask_clients.clear()
+
+
+def _dask_client(scheduler: str | None, n_jobs: int) -> Any:
+    """
+    Get a dask client connected to the scheduler address, or to a local
+    cluster with one worker process per job. The client (and its local
+    cluster) is started once per session and reused by later calls.
+    """
+
+    key = (scheduler, 0 if scheduler else effective_n_jobs(n_jobs))
+    client = _dask_clients.get(key)
+    if client is not None and client.status == 'running':
+        return client
+
+    if scheduler:
+        client = Client(scheduler)
+    else:
+        client = Client(LocalCluster(
+            n_workers=key[1],
+            threads_per_worker=1,
+            processes=True,
+            dashboard_address=None
+        ))
+    _dask_clients[key] = client
+
+    return client
+
+
+def _predict_dask(
+        model: RegressorMixin | Dict[str, np.ndarray],
+        features: np.ndarray,
+        n_jobs: int,
+        block_size: int,
+        scheduler: str | None,
+) -> np.ndarray:
+    """
+    Scatter partitions of rows to dask workers, broadcast the model
+    once to every worker, and gather the predicted partitions in order.
+    The dask client of the session is reused, see _dask_client.
+    """
+
+    client = _dask_client(scheduler, n_jobs)
+
+    # New keys on every call, so data of an earlier call that is still
+    # being released from the reused cluster is never shared. The model
+    # is scattered in a list, as a flat forest dict would be scattered
+    # as one key per array
+    shared_model = client.scatter([model], broadcast=True, hash=False)[0]
+    partitions = client.scatter([
+        features[start:start + block_size]
+        for start in range(0, len(features), block_size)
+    ], hash=False)
+    futures = [
+        client.submit(_predict_partition, shared_model, partition)
+        for partition in partitions
+    ]
+
+    return np.concatenate(client.gather(futures))
+
+
+def predict_array(
+        regressor: RegressorMixin,
+        features: pd.DataFrame | np.ndarray,
+        backend: str = 'threading',
+        n_jobs: int = -2,
+        block_size: int = 262144,
+        flat_forest: bool = False,
+        knn_block_size: int = 65536,
+        scheduler: str | None = None,
+        mask: np.ndarray | None = None,
+        dtype: npt.DTypeLike = np.float64,
+) -> np.ndarray:
+    """
+    Predict depth from a feature matrix using a fitted regressor.
+
+    With the threading backend, the whole matrix is passed to the regressor
+    and the parallelism is left to scikit-learn, except for K-Nearest
+    Neighbors, which queries its fitted index in batches of rows across
+    parallel threads so the neighbor distances and indices never exist
+    for the whole scene at once. Pipelines (e.g. with derived features)
+    are predicted in the same batches, so the transformed features only
+    exist for one batch at a time. With process based backends
+    (loky and multiprocessing), the feature matrix is dumped once into a
+    memory-mapped file and the regressor is dumped once next to it, so
+    every worker attaches to the same pixels without copying them and
+    predicts its own block of rows. With the dask backend, blocks of rows
+    are scattered to the workers of a dask cluster, the regressor is
+    broadcast to every worker once, and the predicted blocks are gathered
+    back in order. Feature matrices that fit in one block, such as test
+    data, are predicted locally.
+
+    Parameters
+    ----------
+    regressor : RegressorMixin
+        Fitted scikit-learn regressor.
+    features : pd.DataFrame | np.ndarray
+        Feature matrix with one row per pixel and one column per band.
+    backend : str, optional
+        Backend to use for parallel processing. Default is 'threading'.
+    n_jobs : int, optional
+        The number of jobs to run in parallel. Default is -2.
+    block_size : int, optional
+        Number of rows predicted by each worker task when using process
+        based or dask backends. Default is 262144.
+    flat_forest : bool, optional
+        Predict Random Forest using flat node arrays (see compile_forest)
+        in parallel numba threads instead of scikit-learn. The flat forest
+        is compiled once per fitted forest. Without numba, scikit-learn is
+        used with a warning. Other regressors are not affected.
+        Default is False.
+    knn_block_size : int, optional
+        Number of rows in every K-Nearest Neighbors or pipeline batch when
+        using the threading backend. Default is 65536.
+    scheduler : str | None, optional
+        Address of the dask scheduler (e.g. 'tcp://10.0.0.1:8786') when
+        using the dask backend. The workers need sdb to be installed.
+        If None, a local cluster with n_jobs single threaded worker
+        processes is used. The client (and local cluster) is started on
+        the first prediction and reused for the rest of the session.
+        Default is None.
+    mask : np.ndarray | None, optional
+        Boolean array (e.g. a water mask) with one value per row, in any
+        shape. Only rows where mask is True are predicted, the other rows
+        are NaN. If None, every row is predicted. Default is None.
+    dtype : npt.DTypeLike, optional
+        Data type of the predicted depth, e.g. np.float32 to halve
+        the memory. Default is np.float64.
+
+    Returns
+    -------
+    np.ndarray
+        An array of predicted depth.
+    """
+
+    check_backend(backend)
+
+    if isinstance(features, pd.DataFrame):
+        features = features.to_numpy()
+
+    options = {
+        'backend': backend,
+        'n_jobs': n_jobs,
+        'block_size': block_size,
+        'flat_forest': flat_forest,
+        'knn_block_size': knn_block_size,
+        'scheduler': scheduler,
+    }
+
+    if mask is None:
+        return _predict_rows(regressor, features, **options, dtype=dtype)
+
+    mask = np.ravel(mask).astype(bool)
+    z_predict = np.full(len(features), np.nan, dtype=dtype)
+    if not mask.any():
+        # Nothing to predict, e.g. an all land scene
+        return z_predict
+
+    z_predict[mask] = _predict_rows(
+        regressor, features[mask], **options, dtype=dtype
+    )
+
+    return z_predict
+
+
+def _predict_rows(
+        regressor: RegressorMixin,
+        features: np.ndarray,
+        backend: str,
+        n_jobs: int,
+        block_size: int,
+        flat_forest: bool,
+        knn_block_size: int,
+        scheduler: str | None,
+        dtype: npt.DTypeLike,
+) -> np.ndarray:
+    """
+    Predict every row of a feature matrix using the fastest path for
+    the regressor and backend. See predict_array.
+    """
+
+    forest = final_regressor(regressor)
+    if flat_forest and njit is None:
+        # The numpy tree walk is slower than scikit-learn
+        warnings.warn(
+            'numba is not installed, '
+            'predicting Random Forest with scikit-learn',
+            RuntimeWarning
+        )
+        flat_forest = False
+
+    if flat_forest and isinstance(forest, RandomForestRegressor):
+        if forest is not regressor:
+            features = regressor[:-1].transform(features)
+        model = _compiled_forest(forest)
+    else:
+        model = regressor
+
+    if backend == 'dask' and len(features) > block_size:
+        return _predict_dask(
+            model,
+            features=features,
+            n_jobs=n_jobs,
+            block_size=block_size,
+            scheduler=scheduler
+        ).astype(dtype, copy=False)
+
+    if model is not regressor:
+        return forest_predict(
+            model,
+            features=features,
+            n_jobs=n_jobs,
+            dtype=dtype
+        )
+
+    if backend == 'threading' and (
+            is_knn(regressor) or isinstance(regressor, Pipeline)
+    ):
+        return _predict_threaded(
+            regressor,
+            features=features,
+            n_jobs=n_jobs,
+            block_size=knn_block_size,
+            dtype=dtype
+        )
+
+    if backend not in PROCESS_BACKEND or len(features) <= block_size:
+        with parallel_backend(backend=local_backend(backend), n_jobs=n_jobs):
+            return regressor.predict(features).astype(dtype, copy=False)
+
+    temp_dir = Path(tempfile.mkdtemp(prefix='sdb_'))
+    try:
+        model_loc = str(temp_dir / 'regressor.joblib')
+        dump(regressor, model_loc)
+
+        features_loc = temp_dir / 'features.joblib'
+        dump(np.ascontiguousarray(features), features_loc)
+        shared_features = load(features_loc, mmap_mode='r')
+
+        starts = range(0, len(shared_features), block_size)
+        blocks = Parallel(backend=backend, n_jobs=n_jobs)(
+            delayed(_predict_block)(
+                model_loc,
+                shared_features[start:start + block_size]
+            )
+            for start in starts
+        )
+
+        del shared_features
+        z_predict = np.concatenate(blocks).astype(dtype, copy=False)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    return z_predict
+
+
+def _forest_spread(
+        forest: RandomForestRegressor,
+        features: np.ndarray,
+        method: str,
+        quantiles: Tuple[float, float],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Predict one block of pixels tree by tree, accumulating the mean and
+    the spread of tree predictions without keeping every tree at once
+    for standard deviation (Welford running moments).
+    """
+
+    features = np.ascontiguousarray(features, dtype=np.float32)
+
+    if method == 'interval':
+        trees = np.empty((len(forest.estimators_), len(features)))
+        for t, tree in enumerate(forest.estimators_):
+            trees[t] = tree.predict(features, check_input=False)
+        low, high = np.quantile(trees, quantiles, axis=0)
+        return trees.mean(axis=0), high - low
+
+    mean = np.zeros(len(features))
+    m2 = np.zeros(len(features))
+    for t, tree in enumerate(forest.estimators_, start=1):
+        z_tree = tree.predict(features, check_input=False)
+        delta = z_tree - mean
+        mean += delta / t
+        m2 += delta * (z_tree - mean)
+
+    return mean, np.sqrt(m2 / len(forest.estimators_))
+
+
+def predict_uncertainty(
+        regressor: RegressorMixin,
+        features: pd.DataFrame | np.ndarray,
+        method: str = 'std',
+        quantiles: Tuple[float, float] = (0.05, 0.95),
+        n_jobs: int = -2,
+        block_size: int = 16384,
+        mask: np.ndarray | None = None,
+        dtype: npt.DTypeLike = np.float64,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Predict depth and its per-pixel uncertainty from the spread of
+    Random Forest trees. Blocks of pixels are predicted in parallel
+    threads and every block accumulates over trees one at a time, so
+    tree predictions never exist for the whole scene at once.
+    Trees are always walked by scikit-learn on local threads, the
+    backend, flat forest, and dask scheduler options of predict_array
+    do not apply.
+
+    Parameters
+    ----------
+    regressor : RegressorMixin
+        Fitted Random Forest, with or without derived features.
+    features : pd.DataFrame | np.ndarray
+        Feature matrix with one row per pixel and one column per band.
+    method : {'std', 'interval'}, optional
+        Standard deviation of tree predictions, or the width of
+        the quantile interval of tree predictions. Default is 'std'.
+    quantiles : Tuple[float, float], optional
+        Lower and upper quantiles of the interval. Default is (0.05, 0.95).
+    n_jobs : int, optional
+        The number of threads to run in parallel. Default is -2.
+    block_size : int, optional
+        Number of pixels in every block. Default is 16384.
+    mask : np.ndarray | None, optional
+        Boolean array (e.g. a water mask). Only rows where mask is True
+        are predicted, the others are NaN. Default is None.
+    dtype : npt.DTypeLike, optional
+        Data type of the predicted depth and uncertainty.
+        Default is np.float64.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        A tuple containing (predicted depth, uncertainty).
+
+    Raises
+    ------
+    ValueError
+        If the method is not allowed or the regressor is not
+        a Random Forest.
+    """
+
+    if method not in UNCERTAINTY_TYPES:
+        raise ValueError(
+            f'Invalid method: {method}.\n'
+            f'Allowed: {UNCERTAINTY_TYPES}'
+        )
+
+    forest = final_regressor(regressor)
+    if not isinstance(forest, RandomForestRegressor):
+        raise ValueError(
+            f'Invalid regressor: {type(forest).__name__}.\n'
+            f'Allowed: {{{RandomForestRegressor.__name__}}}'
+        )
+
+    if isinstance(features, pd.DataFrame):
+        features = features.to_numpy()
+
+    rows = np.arange(len(features))
+    if mask is not None:
+        rows = rows[np.ravel(mask).astype(bool)]
+
+    z_predict = np.full(len(features), np.nan, dtype=dtype)
+    z_uncertainty = np.full(len(features), np.nan, dtype=dtype)
+
+    def predict_block(start: int) -> None:
+        block_rows = rows[start:start + block_size]
+        block = features[block_rows]
+        if forest is not regressor:
+            block = regressor[:-1].transform(block)
+        z_predict[block_rows], z_uncertainty[block_rows] = _forest_spread(
+            forest,
+            block,
+            method=method,
+            quantiles=quantiles
+        )
+
+    Parallel(backend='threading', n_jobs=n_jobs)(
+        delayed(predict_block)(start)
+        for start in range(0, len(rows), block_size)
+    )
+
+    return z_predict, z_uncertainty
 
 
 def prediction(
@@ -16,8 +1189,17 @@ def prediction(
         features_test: pd.DataFrame | None = None,
         backend: str = 'threading',
         n_jobs: int = -2,
+        flat_forest: bool = False,
+        scheduler: str | None = None,
+        mask: np.ndarray | None = None,
+        derived: Dict[str, Any] | None = None,
+        dtype: npt.DTypeLike = np.float64,
+        uncertainty: str | None = None,
         **params: Any
-) -> Tuple[np.ndarray, np.ndarray | None]:
+) -> (
+    Tuple[np.ndarray, np.ndarray | None]
+    | Tuple[np.ndarray, np.ndarray | None, np.ndarray]
+):
     """
     Predicting depth using different models.
 
@@ -25,7 +1207,7 @@ def prediction(
     ----------
     model : str
         The model to use for prediction. Options are 'knn', 'linear', or 'rf'.
-        See model_alias_dict for more details.
+        See MODEL_ALIAS for more details.
     unraveled_band : pd.DataFrame
         Unraveled raster data.
     features_train : pd.DataFrame
@@ -36,8 +1218,35 @@ def prediction(
         Features from test data.
     backend : str, optional
         Backend to use for parallel processing. Default is 'threading'.
+        With 'loky' or 'multiprocessing', the unraveled raster data is
+        shared with the workers through a memory-mapped file.
+        With 'dask', the unraveled raster data is predicted on a dask
+        cluster while the model is fitted locally.
     n_jobs : int, optional
         The number of jobs to run in parallel. Default is -2.
+    flat_forest : bool, optional
+        Predict Random Forest using flat node arrays instead of
+        scikit-learn. See compile_forest. Default is False.
+    scheduler : str | None, optional
+        Address of the dask scheduler when using the dask backend.
+        If None, a local cluster is used. See predict_array.
+        Default is None.
+    mask : np.ndarray | None, optional
+        Boolean array (e.g. a water mask). Only unraveled raster rows where
+        mask is True are predicted, the others are NaN. Default is None.
+    derived : Dict[str, Any] | None, optional
+        Parameters of derived_features (e.g. Stumpf log ratios) that are
+        calculated for train data and every predicted pixel in the same
+        way. Default is None.
+    dtype : npt.DTypeLike, optional
+        Data type of the predicted depth. Default is np.float64.
+    uncertainty : {'std', 'interval'} | None, optional
+        Random Forest only. Also calculate per-pixel uncertainty of the
+        unraveled raster data from the spread of tree predictions in the
+        same pass on local threads, so backend, flat_forest, and scheduler
+        are only used for test data. The uncertainty is returned as a
+        third element only when it is requested. See predict_uncertainty.
+        Default is None.
     **params : Dict[str, Union[str, int, float, bool]]
         Parameters to pass to the respective model.
         See sklearn documentation for more details.
@@ -47,48 +1256,485 @@ def prediction(
 
     Returns
     -------
-    np.ndarray
-        An array of predicted depth from trained model using unraveled raster data.
+    Tuple[np.ndarray, np.ndarray | None]
+        A tuple containing (predicted depth of unraveled raster data,
+        predicted depth of test data or None).
+    Tuple[np.ndarray, np.ndarray | None, np.ndarray]
+        If uncertainty is given, a tuple containing (predicted depth of
+        unraveled raster data, predicted depth of test data or None,
+        uncertainty of unraveled raster data).
     """
 
-    allowed_backend: Set[str] = {'loky', 'threading', 'multiprocessing'}
-    if backend not in allowed_backend:
-        raise ValueError(
-            f'Invalid backend: {backend}.\n'
-            f'Allowed: {allowed_backend}'
+    regressor = fit_regressor(
+        model,
+        features_train=features_train,
+        label_train=label_train,
+        backend=backend,
+        n_jobs=n_jobs,
+        derived=derived,
+        **params
+    )
+
+    if uncertainty is not None:
+        z_predict, z_uncertainty = predict_uncertainty(
+            regressor=regressor,
+            features=unraveled_band,
+            method=uncertainty,
+            n_jobs=n_jobs,
+            mask=mask,
+            dtype=dtype
+        )
+    else:
+        z_predict = predict_array(
+            regressor=regressor,
+            features=unraveled_band,
+            backend=backend,
+            n_jobs=n_jobs,
+            flat_forest=flat_forest,
+            scheduler=scheduler,
+            mask=mask,
+            dtype=dtype
         )
 
-    model_alias_dict: Dict[str, Set[str]] = {
-        'knn': {
-            'knn', 'k_nearest_neighbors', 'K-Nearest Neighbors'
-        },
-        'linear': {
-            'mlr', 'linear', 'linear_regression', 'Multiple Linear Regression'
+    if features_test is not None:
+        z_validate = predict_array(
+            regressor=regressor,
+            features=features_test,
+            backend=backend,
+            n_jobs=n_jobs,
+            flat_forest=flat_forest,
+            dtype=dtype
+        )
+    else:
+        z_validate = None
+
+    if uncertainty is not None:
+        return z_predict, z_validate, z_uncertainty
+
+    return z_predict, z_validate
+
+
+def save_model(
+        regressor: RegressorMixin,
+        model_loc: Path | str,
+        metadata: Dict[str, Any] | None = None,
+) -> None:
+    """
+    Save a fitted regressor together with its metadata into one file.
+    Library versions and the saving time are added to the metadata
+    automatically.
+
+    Parameters
+    ----------
+    regressor : RegressorMixin
+        Fitted scikit-learn regressor.
+    model_loc : Path | str
+        Model save location.
+    metadata : Dict[str, Any] | None, optional
+        Information needed to apply the model again, such as band names,
+        sensor, preprocessing settings, and training metrics.
+        Default is None.
+
+    Returns
+    -------
+    None
+    """
+
+    model_metadata = dict(metadata or {})
+    model_metadata.update({
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'versions': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'scikit-learn': sklearn.__version__,
+            'joblib': joblib.__version__,
         },
-        'rf': {
-            'rf', 'random_forest', 'Random Forest'
+    })
+
+    dump({'regressor': regressor, 'metadata': model_metadata}, model_loc)
+
+
+def load_model(
+        model_loc: Path | str
+) -> Tuple[RegressorMixin, Dict[str, Any]]:
+    """
+    Load a fitted regressor and its metadata that were saved by save_model.
+
+    Parameters
+    ----------
+    model_loc : Path | str
+        Model file location.
+
+    Returns
+    -------
+    Tuple[RegressorMixin, Dict[str, Any]]
+        A tuple containing (fitted regressor, metadata).
+
+    Raises
+    ------
+    ValueError
+        If the file is not a saved SDB model.
+    """
+
+    saved = load(model_loc)
+
+    if not isinstance(saved, dict) or {'regressor', 'metadata'} - set(saved):
+        raise ValueError(f'Not a saved SDB model: {model_loc}')
+
+    return saved['regressor'], saved['metadata']
+
+
+def apply_model(
+        model_loc: Path | str | None,
+        unraveled_band: pd.DataFrame,
+        backend: str = 'threading',
+        n_jobs: int = -2,
+        flat_forest: bool = False,
+        scheduler: str | None = None,
+        mask: np.ndarray | None = None,
+        dtype: npt.DTypeLike = np.float64,
+        model: Tuple[RegressorMixin, Dict[str, Any]] | None = None,
+) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Predict depth over new raster data using a saved model
+    without retraining it.
+
+    Parameters
+    ----------
+    model_loc : Path | str | None
+        Model file location, None if model is given.
+    unraveled_band : pd.DataFrame
+        Unraveled raster data.
+    backend : str, optional
+        Backend to use for parallel processing. Default is 'threading'.
+    n_jobs : int, optional
+        The number of jobs to run in parallel. Default is -2.
+    flat_forest : bool, optional
+        Predict Random Forest using flat node arrays instead of
+        scikit-learn. See compile_forest. Default is False.
+    scheduler : str | None, optional
+        Address of the dask scheduler when using the dask backend.
+        If None, a local cluster is used. See predict_array.
+        Default is None.
+    mask : np.ndarray | None, optional
+        Boolean array (e.g. a water mask). Only unraveled raster rows where
+        mask is True are predicted, the others are NaN. Default is None.
+    dtype : npt.DTypeLike, optional
+        Data type of the predicted depth. Default is np.float64.
+    model : Tuple[RegressorMixin, Dict[str, Any]] | None, optional
+        Regressor and metadata already loaded by load_model, used instead
+        of loading model_loc again. Default is None.
+
+    Returns
+    -------
+    Tuple[np.ndarray, Dict[str, Any]]
+        A tuple containing (predicted depth, model metadata).
+
+    Raises
+    ------
+    ValueError
+        If neither model_loc nor model is given, or if the raster bands
+        differ from the bands used to train the model.
+    """
+
+    if model is None:
+        if model_loc is None:
+            raise ValueError(
+                'Invalid model: None.\n'
+                'Allowed: model_loc or model'
+            )
+        model = load_model(model_loc)
+    regressor, metadata = model
+
+    bands = metadata.get('bands')
+    if bands is not None and list(unraveled_band.columns) != list(bands):
+        raise ValueError(
+            f'Band mismatch: {list(unraveled_band.columns)}.\n'
+            f'Model was trained using: {list(bands)}'
+        )
+
+    z_predict = predict_array(
+        regressor=regressor,
+        features=unraveled_band,
+        backend=backend,
+        n_jobs=n_jobs,
+        flat_forest=flat_forest,
+        scheduler=scheduler,
+        mask=mask,
+        dtype=dtype
+    )
+
+    return z_predict, metadata
+
+
+def parameter_search(
+        model: str,
+        features_train: pd.DataFrame,
+        label_train: pd.Series,
+        param_grid: Dict[str, Sequence[Any]],
+        search: str = 'grid',
+        cv: int = 5,
+        n_iter: int = 10,
+        random_state: int = 0,
+        backend: str = 'threading',
+        n_jobs: int = -2,
+        derived: Dict[str, Any] | None = None,
+        **params: Any
+) -> Tuple[Dict[str, Any], pd.DataFrame]:
+    """
+    Search model parameters using cross validation over train data.
+    The features are extracted once and every candidate is fitted on the
+    same table, with candidates and folds fitted in parallel. Derived
+    features do not learn from data, so they are calculated once before
+    the search.
+
+    Parameters
+    ----------
+    model : str
+        The model to use. Options are 'knn', 'linear', or 'rf'.
+        See MODEL_ALIAS for more details.
+    features_train : pd.DataFrame
+        Features from train data.
+    label_train : pd.Series
+        Label from train data.
+    param_grid : Dict[str, Sequence[Any]]
+        Candidate values of every searched parameter.
+    search : {'grid', 'random', 'halving'}, optional
+        Exhaustive grid search, random search of n_iter candidates, or
+        successive halving grid search. Default is 'grid'.
+    cv : int, optional
+        Number of cross validation folds. Default is 5.
+    n_iter : int, optional
+        Number of sampled candidates for random search. Default is 10.
+    random_state : int, optional
+        Random state of random and successive halving search.
+        Default is 0.
+    backend : str, optional
+        Backend to use for parallel processing. Default is 'threading'.
+    n_jobs : int, optional
+        The number of jobs to run in parallel. Default is -2.
+    derived : Dict[str, Any] | None, optional
+        Parameters of derived_features. Default is None.
+    **params : Any
+        Fixed parameters of the model that are not searched.
+
+    Returns
+    -------
+    Tuple[Dict[str, Any], pd.DataFrame]
+        A tuple containing (best parameters, leaderboard).
+        Best parameters include the fixed parameters and the leaderboard
+        is ranked by cross validated RMSE. For halving search, every
+        candidate is listed once with the score of its last iteration
+        ('iter', on 'n_samples' train samples), and candidates of later
+        iterations rank first.
+    """
+
+    check_backend(backend)
+
+    if search not in SEARCH_TYPES:
+        raise ValueError(
+            f'Invalid search: {search}.\n'
+            f'Allowed: {SEARCH_TYPES}'
+        )
+
+    fixed_params = {
+        key: value for key, value in params.items() if key not in param_grid
+    }
+    estimator = build_regressor(
+        model,
+        **{key: value for key, value in fixed_params.items()
+           if key != 'standardize'}
+    )
+
+    # Standardization is searched by switching the scaler step on or off
+    if model_key(model) in STANDARDIZED_MODELS:
+        estimator = make_pipeline(StandardScaler(), estimator)
+        step = f'{estimator.steps[-1][0]}__'
+        scaler = {True: StandardScaler(), False: 'passthrough'}
+        estimator.set_params(
+            standardscaler=scaler[bool(fixed_params.get('standardize'))]
+        )
+        search_grid = {
+            ('standardscaler' if key == 'standardize' else step + key): (
+                [scaler[bool(value)] for value in values]
+                if key == 'standardize' else list(values)
+            )
+            for key, values in param_grid.items()
         }
+    else:
+        step = ''
+        search_grid = {key: list(values) for key, values in param_grid.items()}
+
+    search_options = {
+        'scoring': 'neg_root_mean_squared_error',
+        'cv': cv,
+        'n_jobs': n_jobs,
     }
+    if search == 'grid':
+        searcher = GridSearchCV(estimator, search_grid, **search_options)
+    elif search == 'random':
+        searcher = RandomizedSearchCV(
+            estimator,
+            search_grid,
+            n_iter=n_iter,
+            random_state=random_state,
+            **search_options
+        )
+    else:
+        searcher = HalvingGridSearchCV(
+            estimator,
+            search_grid,
+            random_state=random_state,
+            **search_options
+        )
+
+    features_train = features_train.to_numpy()
+    if derived:
+        features_train = derived_features(features_train, **derived)
 
-    if model in model_alias_dict['knn']:
-        regressor = KNeighborsRegressor(**params)
-    elif model in model_alias_dict['linear']:
-        regressor = LinearRegression(**params)
-    elif model in model_alias_dict['rf']:
-        regressor = RandomForestRegressor(**params)
+    with parallel_backend(backend=local_backend(backend), n_jobs=n_jobs):
+        searcher.fit(features_train, np.asarray(label_train))
+
+    def readable(candidate: Dict[str, Any]) -> Dict[str, Any]:
+        named = {}
+        for key, value in candidate.items():
+            if key == 'standardscaler':
+                named['standardize'] = value != 'passthrough'
+            else:
+                named[key.removeprefix(step)] = value
+        return named
+
+    results = searcher.cv_results_
+    leaderboard = pd.DataFrame([readable(p) for p in results['params']])
+    leaderboard['rmse'] = -results['mean_test_score']
+    leaderboard['rmse_std'] = results['std_test_score']
+    leaderboard['fit_time'] = results['mean_fit_time']
+    if 'iter' in results:
+        # Halving search scores surviving candidates again on more samples,
+        # so only the last iteration of every candidate is kept and
+        # candidates of later iterations rank first
+        leaderboard['iter'] = results['iter']
+        leaderboard['n_samples'] = results['n_resources']
+        candidate = [
+            repr(sorted(candidate_params.items()))
+            for candidate_params in results['params']
+        ]
+        last = pd.Series(results['iter']).groupby(candidate).idxmax()
+        leaderboard = leaderboard.loc[np.sort(last.to_numpy())]
+        leaderboard = leaderboard.sort_values(
+            ['iter', 'rmse'], ascending=[False, True]
+        )
+        leaderboard.insert(0, 'rank', np.arange(1, len(leaderboard) + 1))
     else:
-        raise ValueError(
-            f'Invalid model: {model}.\n'
-            f'Allowed: {set.union(*model_alias_dict.values())}'
+        leaderboard.insert(0, 'rank', results['rank_test_score'])
+        leaderboard = leaderboard.sort_values(['rank', 'rmse'])
+    leaderboard = leaderboard.reset_index(drop=True)
+
+    best_params = dict(fixed_params)
+    best_params.update(readable(searcher.best_params_))
+
+    return best_params, leaderboard
+
+
+def _fit_evaluate(
+        model: str,
+        params: Dict[str, Any],
+        features_train: np.ndarray,
+        label_train: np.ndarray,
+        features_test: np.ndarray,
+        label_test: np.ndarray,
+        derived: Dict[str, Any] | None = None,
+) -> Tuple[RegressorMixin, Dict[str, float]]:
+    """
+    Fit one model and evaluate it against test data, measuring both steps.
+    """
+
+    start = time.perf_counter()
+    regressor = add_derived(build_regressor(model, **params), derived)
+    regressor.fit(features_train, label_train)
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    z_validate = regressor.predict(features_test)
+    predict_time = time.perf_counter() - start
+
+    rmse, mae, r2 = evaluate(label_test, z_validate)
+
+    return regressor, {
+        'rmse': rmse,
+        'mae': mae,
+        'r2': r2,
+        'fit_time': fit_time,
+        'test_time': predict_time,
+    }
+
+
+def compare_models(
+        models: Dict[str, Dict[str, Any]],
+        features_train: pd.DataFrame,
+        label_train: pd.Series,
+        features_test: pd.DataFrame,
+        label_test: pd.Series,
+        backend: str = 'threading',
+        n_jobs: int = -2,
+        derived: Dict[str, Any] | None = None,
+) -> Tuple[pd.DataFrame, Dict[str, RegressorMixin]]:
+    """
+    Train and evaluate several models concurrently on the same train and
+    test data, so preprocessing and splitting only happen once.
+
+    Parameters
+    ----------
+    models : Dict[str, Dict[str, Any]]
+        Model names (see MODEL_ALIAS) and the parameters of each model.
+    features_train : pd.DataFrame
+        Features from train data.
+    label_train : pd.Series
+        Label from train data.
+    features_test : pd.DataFrame
+        Features from test data.
+    label_test : pd.Series
+        Label from test data.
+    backend : str, optional
+        Backend to use for parallel processing. Default is 'threading'.
+    n_jobs : int, optional
+        The number of jobs to run in parallel. Default is -2.
+    derived : Dict[str, Any] | None, optional
+        Parameters of derived_features that are added to every model.
+        Default is None.
+
+    Returns
+    -------
+    Tuple[pd.DataFrame, Dict[str, RegressorMixin]]
+        A tuple containing (comparison table, fitted regressors).
+        The comparison table has RMSE, MAE, R squared, fit time, and
+        test prediction time of every model, sorted by RMSE.
+    """
+
+    check_backend(backend)
+    for model in models:
+        model_key(model)
+
+    train_arrays = (features_train.to_numpy(), np.asarray(label_train))
+    test_arrays = (features_test.to_numpy(), np.asarray(label_test))
+
+    outputs = Parallel(
+        backend=local_backend(backend),
+        n_jobs=min(len(models), effective_n_jobs(n_jobs))
+    )(
+        delayed(_fit_evaluate)(
+            model, params, *train_arrays, *test_arrays, derived=derived
         )
+        for model, params in models.items()
+    )
 
-    with parallel_backend(backend=backend, n_jobs=n_jobs):
-        regressor.fit(features_train, label_train)
-        z_predict = regressor.predict(unraveled_band)
+    regressors = {}
+    rows = []
+    for model, (regressor, scores) in zip(models, outputs):
+        regressors[model] = regressor
+        rows.append({'model': model, **scores})
 
-        if features_test is not None:
-            z_validate = regressor.predict(features_test)
-        else:
-            z_validate = None
+    comparison = pd.DataFrame(rows).sort_values('rmse').reset_index(drop=True)
 
-    return z_predict, z_validate
\ No newline at end of file
+    return comparison, regressors
@@ -1,11 +1,30 @@
-from typing import Tuple
+from typing import Dict, Sequence, Set, Tuple
 
-import matplotlib.pyplot as plt
+import contourpy
+import geopandas as gpd
 import numpy as np
+import pandas as pd
+import shapely
 import xarray as xr
+from joblib import Parallel, delayed, effective_n_jobs
+from matplotlib import colormaps
 from matplotlib.axes import Axes
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.colors import LogNorm
 from matplotlib.figure import Figure
-from sklearn import metrics
+from scipy import ndimage
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
+
+from .utils import median_filter
+
+PLOT_MODES: Set[str] = {'scatter', 'density', 'hexbin'}
+OVERVIEW_METHODS: Set[str] = {'average', 'nearest'}
+FILL_METHODS: Set[str] = {'nearest', 'idw'}
+# Depth bins (m) for per-bin accuracy, following the IHO S-44 survey
+# orders (shallow water up to 40 m) and CATZOC depth ranges
+DEPTH_BINS: Tuple[float, ...] = (0.0, 2.0, 5.0, 10.0, 20.0, 30.0, 40.0, np.inf)
 
 
 def out_depth_filter(
@@ -45,13 +64,514 @@ def out_depth_filter(
     return filtered_array
 
 
+def _limit_rows(
+        block: np.ndarray,
+        top_limit: float,
+        bottom_limit: float,
+        flip: bool
+) -> None:
+    """
+    Limit and flip a block of depth rows in place.
+    """
+
+    with np.errstate(invalid='ignore'):
+        block[(block > top_limit) | (block < bottom_limit)] = np.nan
+
+    if flip:
+        np.negative(block, out=block)
+
+
+def postprocess_depth(
+        array: np.ndarray,
+        filter_size: int | None = 3,
+        method: str = 'exact',
+        top_limit: float = 0.0,
+        bottom_limit: float = -12.0,
+        flip: bool = False,
+        n_jobs: int = -2,
+        block_size: int = 4194304,
+        out: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Apply median filter, depth limit, and depth direction to a 2D depth
+    prediction in one pass over blocks of rows, writing every step in
+    place into a single output array.
+    Gives the same result as median_filter, out_depth_filter, and
+    multiplying by -1 one after another.
+
+    Parameters
+    ----------
+    array : np.ndarray
+        2D array of depth data in positive up direction.
+    filter_size : int | None, optional
+        Size of the median filter window (>= 3 and odd), or None to skip
+        the median filter. Default is 3.
+    method : str, optional
+        Median filter method, 'exact' or 'separable'.
+        See median_filter for more details. Default is 'exact'.
+    top_limit : float, optional
+        Top depth limit in positive up. Default value is 0.0.
+    bottom_limit : float, optional
+        Bottom depth limit in positive up. Default value is -12.0.
+    flip : bool, optional
+        Whether to change the depth direction to positive down.
+        Default is False.
+    n_jobs : int, optional
+        The number of threads to run in parallel. Default is -2.
+    block_size : int, optional
+        Number of window values held in memory at a time by each thread.
+        Default is 4194304.
+    out : np.ndarray | None, optional
+        Output array with the same shape as array. It can be the array
+        itself when the median filter is skipped. If None, a new array
+        is created. Default is None.
+
+    Returns
+    -------
+    np.ndarray
+        Post-processed array.
+    """
+
+    # Exchange value of top_limit and bottom_limit if top < bottom
+    if top_limit < bottom_limit:
+        top_limit, bottom_limit = bottom_limit, top_limit
+
+    if filter_size is not None:
+        return median_filter(
+            array,
+            filter_size=filter_size,
+            method=method,
+            n_jobs=n_jobs,
+            block_size=block_size,
+            out=out,
+            block_func=lambda block: _limit_rows(
+                block, top_limit, bottom_limit, flip
+            )
+        )
+
+    if out is None:
+        out = array.copy()
+    elif out is not array:
+        out[...] = array
+
+    step = max(block_size // array.shape[1], 1)
+    Parallel(n_jobs=n_jobs, backend='threading')(
+        delayed(_limit_rows)(
+            out[start:start + step], top_limit, bottom_limit, flip
+        )
+        for start in range(0, array.shape[0], step)
+    )
+
+    return out
+
+
+def _hole_labels(
+        array: np.ndarray,
+        start: int,
+        stop: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Label holes (connected NaN cells) of array rows from start to stop.
+    Returns the size of every hole and the labels of the first and
+    last rows, the only rows where a hole can continue into another block.
+    """
+
+    labels, _ = ndimage.label(np.isnan(array[start:stop]), output=np.int32)
+
+    return np.bincount(labels.ravel())[1:], labels[0], labels[-1]
+
+
+def _hole_rows(
+        array: np.ndarray,
+        fill: np.ndarray,
+        start: int,
+        stop: int,
+        small_hole: np.ndarray
+) -> None:
+    """
+    Label holes of array rows from start to stop again and mark the
+    cells of small holes into the same rows of fill.
+    """
+
+    labels, _ = ndimage.label(np.isnan(array[start:stop]), output=np.int32)
+    fill[start:stop] = small_hole[labels]
+
+
+def _small_holes(
+        array: np.ndarray,
+        max_hole_size: int,
+        n_jobs: int,
+        block_rows: int
+) -> np.ndarray:
+    """
+    Boolean mask of cells in holes that are not larger than max_hole_size.
+    Holes are labelled in blocks of rows, and holes crossing block seams
+    are merged with connected components of a graph of their labels.
+    """
+
+    starts = range(0, array.shape[0], block_rows)
+    blocks = Parallel(n_jobs=n_jobs, backend='threading')(
+        delayed(_hole_labels)(
+            array, start, min(start + block_rows, array.shape[0])
+        )
+        for start in starts
+    )
+
+    # Global label of every hole is its block offset plus its block label
+    offsets = np.cumsum([0] + [len(sizes) for sizes, _, _ in blocks])
+    sizes = np.concatenate([sizes for sizes, _, _ in blocks])
+    if not len(sizes):
+        return np.zeros(array.shape, dtype=bool)
+
+    # Vertically touching holes of two blocks are one hole
+    edges = []
+    for (_, _, bottom), (_, top, _), upper, lower in zip(
+            blocks[:-1], blocks[1:], offsets[:-2], offsets[1:-1]
+    ):
+        seam = (bottom > 0) & (top > 0)
+        edges.append(np.column_stack([
+            bottom[seam] - 1 + upper, top[seam] - 1 + lower
+        ]))
+    edges = np.concatenate(edges) if edges else np.empty((0, 2), dtype=int)
+
+    graph = coo_matrix(
+        (np.ones(len(edges), dtype=np.int8), (edges[:, 0], edges[:, 1])),
+        shape=(len(sizes), len(sizes))
+    )
+    _, hole = connected_components(graph, directed=False)
+    small = np.bincount(hole, weights=sizes)[hole] <= max_hole_size
+
+    fill = np.empty(array.shape, dtype=bool)
+    Parallel(n_jobs=n_jobs, backend='threading')(
+        delayed(_hole_rows)(
+            array, fill, start, min(start + block_rows, array.shape[0]),
+            np.concatenate([[False], small[offsets[block]:offsets[block + 1]]])
+        )
+        for block, start in enumerate(starts)
+    )
+
+    return fill
+
+
+def _fill_rows(
+        array: np.ndarray,
+        filled: np.ndarray,
+        fill: np.ndarray,
+        start: int,
+        stop: int,
+        halo: int,
+        method: str,
+        n_neighbors: int,
+        power: float
+) -> None:
+    """
+    Fill the marked cells of array rows from start to stop using
+    valid cells from the same rows and halo rows around them.
+    """
+
+    core_fill = fill[start:stop]
+    if not core_fill.any():
+        return
+
+    top = max(start - halo, 0)
+    bottom = min(stop + halo, array.shape[0])
+    tile = array[top:bottom]
+    valid = np.isfinite(tile)
+    if not valid.any():
+        return
+
+    targets = np.argwhere(core_fill)
+    targets[:, 0] += start - top
+
+    if method == 'nearest':
+        # Indices of the nearest valid cell for every cell
+        indices = ndimage.distance_transform_edt(
+            ~valid, return_distances=False, return_indices=True
+        )
+        values = tile[
+            indices[0][targets[:, 0], targets[:, 1]],
+            indices[1][targets[:, 0], targets[:, 1]]
+        ]
+    else:
+        # Only valid cells around the holes are used as sources
+        near_hole = ndimage.distance_transform_edt(~fill[top:bottom]) <= halo
+        sources = np.argwhere(valid & near_hole)
+        distances, index = cKDTree(sources).query(
+            targets, k=min(n_neighbors, len(sources))
+        )
+        distances = distances.reshape(len(targets), -1)
+        index = index.reshape(len(targets), -1)
+        weights = 1 / distances**power
+        source_values = tile[sources[:, 0], sources[:, 1]][index]
+        values = (weights * source_values).sum(axis=1) / weights.sum(axis=1)
+
+    filled[start:stop][core_fill] = values
+
+
+def fill_gaps(
+        array: np.ndarray,
+        max_hole_size: int = 100,
+        method: str = 'nearest',
+        n_neighbors: int = 8,
+        power: float = 2.0,
+        n_jobs: int = -2,
+        block_rows: int = 512
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fill holes (connected NaN cells) of a 2D depth prediction that are
+    not larger than max_hole_size cells, e.g. from sun glint, clouds,
+    or filtered depth. Larger NaN areas such as land stay NaN.
+    Holes are labelled and filled in blocks of rows on a thread pool,
+    each block only using valid cells that can be the nearest ones to
+    its holes, so no label array of the whole grid is held in memory.
+
+    Parameters
+    ----------
+    array : np.ndarray
+        2D array of depth data.
+    max_hole_size : int, optional
+        Maximum number of cells of a filled hole. Default is 100.
+    method : str, optional
+        'nearest' to use the value of the nearest valid cell (distance
+        transform), or 'idw' for inverse distance weighting of the
+        nearest valid cells (KD-tree). Default is 'nearest'.
+    n_neighbors : int, optional
+        Number of valid cells used by 'idw'. They are searched only within
+        a halo of about sqrt(max_hole_size / pi) + 2 rows around each block
+        of holes, so they can differ from the nearest cells of the whole
+        grid, and fewer are used where not enough valid cells are that
+        close. Default is 8.
+    power : float, optional
+        Power of inverse distance weights used by 'idw'. Default is 2.0.
+    n_jobs : int, optional
+        The number of threads to run in parallel. Default is -2.
+    block_rows : int, optional
+        Number of rows labelled and filled at a time by each thread.
+        Default is 512.
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        A tuple containing (filled array, boolean mask of filled cells).
+    """
+
+    if method not in FILL_METHODS:
+        raise ValueError(
+            f'Invalid method: {method}.\n'
+            f'Allowed: {FILL_METHODS}'
+        )
+
+    fill = _small_holes(array, max_hole_size, n_jobs, block_rows)
+
+    filled = array.copy()
+    if not fill.any():
+        return filled, fill
+
+    # A hole of n cells has no cell farther than about sqrt(n / pi)
+    # from its edge, so its nearest valid cells are within the halo
+    halo = int(np.ceil(np.sqrt(max_hole_size / np.pi))) + 2
+
+    Parallel(n_jobs=n_jobs, backend='threading')(
+        delayed(_fill_rows)(
+            array, filled, fill, start, min(start + block_rows, array.shape[0]),
+            halo, method, n_neighbors, power
+        )
+        for start in range(0, array.shape[0], block_rows)
+    )
+
+    return filled, fill
+
+
+def _residual_rows(
+        tree: cKDTree,
+        residual: np.ndarray,
+        x: np.ndarray,
+        y: np.ndarray,
+        out: np.ndarray,
+        start: int,
+        stop: int,
+        radius: float,
+        n_neighbors: int,
+        power: float
+) -> None:
+    """
+    Interpolate residuals of points within radius onto grid rows
+    from start to stop using inverse distance weighting.
+    """
+
+    xx, yy = np.meshgrid(x, y[start:stop])
+    distances, index = tree.query(
+        np.column_stack([xx.ravel(), yy.ravel()]),
+        k=n_neighbors,
+        distance_upper_bound=radius
+    )
+    distances = distances.reshape(xx.size, -1)
+    index = index.reshape(xx.size, -1)
+
+    # Missing neighbors have infinite distance and index len(residual)
+    found = np.isfinite(distances)
+    weights = np.zeros_like(distances)
+    weights[found] = 1 / np.maximum(distances[found], 1e-12)**power
+    values = np.append(residual, 0.0)[index]
+
+    weight_sum = weights.sum(axis=1)
+    with np.errstate(invalid='ignore'):
+        surface = (weights * values).sum(axis=1) / weight_sum
+    surface[weight_sum == 0] = np.nan
+
+    out[start:stop] = surface.reshape(xx.shape)
+
+
+def residual_surface(
+        raster: xr.DataArray,
+        x: np.ndarray,
+        y: np.ndarray,
+        residual: np.ndarray,
+        radius: float,
+        n_neighbors: int = 12,
+        power: float = 2.0,
+        n_jobs: int = -2,
+        block_size: int = 4194304
+) -> np.ndarray:
+    """
+    Interpolate residuals (e.g. predicted - true depth) of test points onto
+    the raster grid using inverse distance weighting of the nearest points
+    within a search radius (KD-tree), to show where a model is wrong.
+    Grid rows are interpolated in blocks on a thread pool.
+
+    Parameters
+    ----------
+    raster : xr.DataArray
+        Raster data in dataarray, only its grid (x and y) is used.
+    x : np.ndarray
+        Point x coordinates in raster CRS.
+    y : np.ndarray
+        Point y coordinates in raster CRS.
+    residual : np.ndarray
+        Point residuals.
+    radius : float
+        Search radius in raster CRS units (e.g. meters). Cells without
+        any point within the radius are NaN.
+    n_neighbors : int, optional
+        Maximum number of points used for each cell. Default is 12.
+    power : float, optional
+        Power of inverse distance weights. Default is 2.0.
+    n_jobs : int, optional
+        The number of threads to run in parallel. Default is -2.
+    block_size : int, optional
+        Approximate number of neighbor distances computed at a time by
+        each thread. Default is 4194304.
+
+    Returns
+    -------
+    np.ndarray
+        2D array of interpolated residuals.
+    """
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    residual = np.asarray(residual, dtype=np.float64)
+    valid = np.isfinite(x) & np.isfinite(y) & np.isfinite(residual)
+
+    grid_x = raster.x.values
+    grid_y = raster.y.values
+    out = np.full((grid_y.size, grid_x.size), np.nan)
+    if not valid.any():
+        return out
+
+    tree = cKDTree(np.column_stack([x[valid], y[valid]]))
+    n_neighbors = min(n_neighbors, int(valid.sum()))
+
+    step = max(block_size // (grid_x.size * n_neighbors), 1)
+    Parallel(n_jobs=n_jobs, backend='threading')(
+        delayed(_residual_rows)(
+            tree, residual[valid], grid_x, grid_y, out,
+            start, min(start + step, grid_y.size),
+            radius, n_neighbors, power
+        )
+        for start in range(0, grid_y.size, step)
+    )
+
+    return out
+
+
+def contour_lines(
+        raster: xr.DataArray,
+        levels: Sequence[float] = (0.0, -2.0, -5.0, -10.0),
+        simplify: float = 0.0,
+        chunk_size: int = 512,
+        n_jobs: int = -2
+) -> gpd.GeoDataFrame:
+    """
+    Extract depth contour lines (isobaths) from a depth prediction.
+    The raster is contoured in square chunks on several threads and the
+    line parts are merged across chunk edges into seamless lines.
+
+    Parameters
+    ----------
+    raster : xr.DataArray
+        Depth data with one band in dataarray. NaN cells are not contoured.
+    levels : Sequence[float], optional
+        Contour depths in the same direction as the raster values.
+        Default is (0.0, -2.0, -5.0, -10.0).
+    simplify : float, optional
+        Simplification tolerance in raster CRS units (e.g. meters),
+        0 to keep every vertex. Default is 0.0.
+    chunk_size : int, optional
+        Number of cells on each side of a chunk. Default is 512.
+    n_jobs : int, optional
+        The number of threads to run in parallel. Default is -2.
+
+    Returns
+    -------
+    gpd.GeoDataFrame
+        Contour lines with their depth in raster CRS.
+    """
+
+    generator = contourpy.contour_generator(
+        raster.x.values,
+        raster.y.values,
+        np.ma.masked_invalid(np.squeeze(raster.values)),
+        name='threaded',
+        line_type=contourpy.LineType.Separate,
+        chunk_size=chunk_size,
+        thread_count=effective_n_jobs(n_jobs)
+    )
+
+    depths, geometries = [], []
+    for level in levels:
+        parts = generator.lines(level)
+        if not parts:
+            continue
+
+        sizes = [len(part) for part in parts]
+        lines = shapely.linestrings(
+            np.concatenate(parts),
+            indices=np.repeat(np.arange(len(parts)), sizes)
+        )
+        merged = shapely.line_merge(shapely.multilinestrings(lines))
+        if simplify > 0:
+            merged = shapely.simplify(merged, simplify)
+
+        lines = shapely.get_parts(merged)
+        depths.extend([level] * len(lines))
+        geometries.extend(lines)
+
+    return gpd.GeoDataFrame(
+        {'depth': np.asarray(depths, dtype=np.float64)},
+        geometry=geometries,
+        crs=raster.rio.crs
+    )
+
+
 def reshape_prediction(
         array: np.ndarray,
         raster: xr.DataArray
 ) -> np.ndarray:
     """
     Reshape depth prediction in 1D array to a 2D array shape
-    that is similar to its source raster.
+    that is similar to its source raster. Only the raster shape is used,
+    so the raster pixels are not loaded, and the array is not copied.
 
     Parameters
     ----------
@@ -66,11 +586,163 @@ def reshape_prediction(
         Reshaped array.
     """
 
-    reshaped = array.reshape(raster.values[0].shape)
+    reshaped = array.reshape(raster.shape[-2:])
 
     return reshaped
 
 
+def _error_metrics(
+        true_val: np.ndarray,
+        residual: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate error metrics along the last axis of true values and
+    residuals (predicted - true), for one sample or a stack of resamples.
+    """
+
+    abs_residual = np.abs(residual)
+    mse = np.mean(residual**2, axis=-1)
+    true_mean = np.mean(true_val, axis=-1, keepdims=True)
+    total = np.sum((true_val - true_mean)**2, axis=-1)
+    median_ae, p95_ae = np.percentile(abs_residual, [50, 95], axis=-1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r2 = 1 - mse * true_val.shape[-1] / total
+
+    return {
+        'rmse': np.sqrt(mse),
+        'mae': np.mean(abs_residual, axis=-1),
+        'r2': r2,
+        'bias': np.mean(residual, axis=-1),
+        'std': np.std(residual, axis=-1, ddof=1),
+        'median_ae': median_ae,
+        'p95_ae': p95_ae,
+    }
+
+
+def _decimate(array: np.ndarray, method: str) -> np.ndarray:
+    """
+    Halve the size of a 2D array by averaging 2 x 2 blocks (ignoring NaN)
+    or taking their top left value.
+    """
+
+    if method == 'nearest':
+        return array[::2, ::2]
+
+    rows, cols = array.shape
+    if rows % 2 or cols % 2:
+        padded = np.full(
+            (rows + rows % 2, cols + cols % 2), np.nan, dtype=array.dtype
+        )
+        padded[:rows, :cols] = array
+        array = padded
+    blocks = array.reshape(array.shape[0] // 2, 2, array.shape[1] // 2, 2)
+
+    valid = np.isfinite(blocks)
+    if valid.all():
+        return blocks.mean(axis=(1, 3), dtype=array.dtype)
+
+    total = np.where(valid, blocks, 0).sum(axis=(1, 3))
+    count = valid.sum(axis=(1, 3))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(count > 0, total / count, np.nan).astype(array.dtype)
+
+
+def overview_pyramid(
+        array: np.ndarray,
+        method: str = 'average',
+        min_size: int = 256
+) -> Dict[int, np.ndarray]:
+    """
+    Build overview levels of a 2D depth prediction by halving its size
+    again and again, each level from the previous one, until the longer
+    side is not more than min_size.
+
+    Parameters
+    ----------
+    array : np.ndarray
+        2D array of depth data.
+    method : str, optional
+        'average' to average 2 x 2 pixels (ignoring NaN), or 'nearest'
+        to take one of them. Default is 'average'.
+    min_size : int, optional
+        Longer side of the coarsest level in pixels. Default is 256.
+
+    Returns
+    -------
+    Dict[int, np.ndarray]
+        Decimation factor and array of every level. Factor 1 is the
+        input array itself (not copied).
+    """
+
+    if method not in OVERVIEW_METHODS:
+        raise ValueError(
+            f'Invalid method: {method}.\n'
+            f'Allowed: {OVERVIEW_METHODS}'
+        )
+
+    if not np.issubdtype(array.dtype, np.floating):
+        array = array.astype(np.float64)
+
+    pyramid = {1: array}
+    factor, level = 1, array
+    while max(level.shape) > min_size:
+        factor, level = factor * 2, _decimate(level, method)
+        pyramid[factor] = level
+
+    return pyramid
+
+
+def quicklook(
+        pyramid: Dict[int, np.ndarray],
+        size: int = 256,
+        cmap: str = 'viridis_r',
+        percentiles: Tuple[float, float] = (2, 98)
+) -> np.ndarray:
+    """
+    Create a colour-mapped image of depth prediction from the coarsest
+    overview level that is at least size pixels on its longer side.
+
+    Parameters
+    ----------
+    pyramid : Dict[int, np.ndarray]
+        Overview levels from overview_pyramid.
+    size : int, optional
+        Minimum longer side of the image in pixels. Default is 256.
+    cmap : str, optional
+        Matplotlib colormap name. Default is 'viridis_r'.
+    percentiles : Tuple[float, float], optional
+        Percentiles of depth mapped to the first and last colours.
+        Default is (2, 98).
+
+    Returns
+    -------
+    np.ndarray
+        RGBA image in uint8 with the shape of (rows, columns, 4).
+        NaN pixels are transparent.
+    """
+
+    adequate = [
+        factor for factor, level in pyramid.items() if max(level.shape) >= size
+    ]
+    level = pyramid[max(adequate) if adequate else min(pyramid)]
+
+    finite = np.isfinite(level)
+    if finite.any():
+        low, high = np.percentile(level[finite], percentiles)
+    else:
+        low, high = 0.0, 1.0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scaled = (level - low) / (high - low if high > low else 1.0)
+
+    rgba = colormaps[cmap](np.clip(scaled, 0, 1), bytes=True)
+    rgba[~finite] = 0
+
+    return rgba
+
+
 def evaluate(
         true_val: np.ndarray,
         pred_val: np.ndarray
@@ -92,11 +764,157 @@ def evaluate(
         Tuple of RMSE, MAE, and R Squared.
     """
 
-    rmse = float(metrics.root_mean_squared_error(true_val, pred_val))
-    mae = float(metrics.mean_absolute_error(true_val, pred_val))
-    r2 = float(metrics.r2_score(true_val, pred_val))
+    true_val = np.asarray(true_val, dtype=np.float64)
+    residual = np.asarray(pred_val, dtype=np.float64) - true_val
+    scores = _error_metrics(true_val, residual)
+
+    return float(scores['rmse']), float(scores['mae']), float(scores['r2'])
+
+
+def _bootstrap_block(
+        true_val: np.ndarray,
+        residual: np.ndarray,
+        n_resamples: int,
+        seed: np.random.SeedSequence
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate error metrics of a block of bootstrap resamples.
+    """
+
+    rng = np.random.default_rng(seed)
+    index = rng.integers(0, len(residual), size=(n_resamples, len(residual)))
+
+    return _error_metrics(true_val[index], residual[index])
+
+
+def accuracy_report(
+        true_val: np.ndarray,
+        pred_val: np.ndarray,
+        depth_bins: Sequence[float] = DEPTH_BINS,
+        depth_direction: str = 'up',
+        n_bootstrap: int = 1000,
+        confidence: float = 0.95,
+        n_jobs: int = -2,
+        block_size: int = 4194304,
+        random_state: int | None = 0
+) -> Dict[str, pd.DataFrame]:
+    """
+    Evaluate predicted values from true values for hydrographic quality
+    assessment. Every metric is calculated from one array of residuals
+    (predicted - true), and its confidence interval from bootstrap
+    resamples that are calculated in parallel blocks.
+
+    Parameters
+    ----------
+    true_val : np.ndarray
+        True values.
+    pred_val : np.ndarray
+        Predicted values.
+    depth_bins : Sequence[float], optional
+        Edges of depth bins (positive down) for per-bin accuracy.
+        Default is DEPTH_BINS.
+    depth_direction : {'up', 'down'}, optional
+        Direction of the true values, either positive up ('up') or
+        positive down ('down'). Points above the datum are left out of
+        the depth bins. Default is 'up'.
+    n_bootstrap : int, optional
+        Number of bootstrap resamples, 0 to skip confidence intervals.
+        Default is 1000.
+    confidence : float, optional
+        Confidence level of the intervals. Default is 0.95.
+    n_jobs : int, optional
+        The number of threads to run in parallel. Default is -2.
+    block_size : int, optional
+        Number of resampled values held in memory at a time by each
+        thread. Default is 4194304.
+    random_state : int | None, optional
+        Random state of the bootstrap resamples. Default is 0.
+
+    Returns
+    -------
+    Dict[str, pd.DataFrame]
+        'metrics': RMSE, MAE, R Squared, bias (mean error), standard
+        deviation of error, median absolute error, and 95th percentile
+        absolute error with their confidence intervals.
+        'depth_bins': number of points, RMSE, and bias in every depth bin.
+    """
+
+    if not 0 < confidence < 1:
+        raise ValueError('Allowed confidence: between 0 and 1')
 
-    return rmse, mae, r2
+    depth_direction_dict = {
+        'up': -1.0,
+        'down': 1.0
+    }
+
+    allowed_depth_direction = set(depth_direction_dict.keys())
+    if depth_direction not in allowed_depth_direction:
+        raise ValueError(
+            f'Invalid depth direction: {depth_direction}.\n'
+            f'Allowed: {allowed_depth_direction}'
+        )
+
+    true_val = np.asarray(true_val, dtype=np.float64)
+    residual = np.asarray(pred_val, dtype=np.float64) - true_val
+    scores = _error_metrics(true_val, residual)
+
+    metrics_df = pd.DataFrame({
+        'metric': list(scores.keys()),
+        'value': [float(value) for value in scores.values()],
+    })
+
+    if n_bootstrap > 0:
+        step = max(block_size // len(residual), 1)
+        sizes = [
+            min(step, n_bootstrap - start)
+            for start in range(0, n_bootstrap, step)
+        ]
+        seeds = np.random.SeedSequence(random_state).spawn(len(sizes))
+        blocks = Parallel(n_jobs=n_jobs, backend='threading')(
+            delayed(_bootstrap_block)(true_val, residual, size, seed)
+            for size, seed in zip(sizes, seeds)
+        )
+
+        tail = (1 - confidence) / 2 * 100
+        for bound, percent in (('lower', tail), ('upper', 100 - tail)):
+            metrics_df[bound] = [
+                float(np.nanpercentile(
+                    np.concatenate([block[key] for block in blocks]),
+                    percent
+                ))
+                for key in scores
+            ]
+
+    # Every bin statistic from one pass of bincount over the residuals,
+    # binned on positive down depth so points above the datum fall out
+    edges = np.asarray(depth_bins, dtype=np.float64)
+    depth = true_val * depth_direction_dict[depth_direction]
+    bin_index = np.digitize(depth, edges) - 1
+    inside = (depth >= 0) & (bin_index >= 0) & (bin_index < len(edges) - 1)
+    n_bins = len(edges) - 1
+    count = np.bincount(bin_index[inside], minlength=n_bins)
+    sum_error = np.bincount(
+        bin_index[inside], weights=residual[inside], minlength=n_bins
+    )
+    sum_squared = np.bincount(
+        bin_index[inside], weights=residual[inside]**2, minlength=n_bins
+    )
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bins_df = pd.DataFrame({
+            'depth_bin': [
+                f'{low:g}-{high:g} m' if np.isfinite(high) else f'> {low:g} m'
+                for low, high in zip(edges[:-1], edges[1:])
+            ],
+            'count': count,
+            'rmse': np.sqrt(sum_squared / count),
+            'bias': sum_error / count,
+        })
+
+    return {
+        'metrics': metrics_df,
+        'depth_bins': bins_df[bins_df['count'] > 0].reset_index(drop=True),
+    }
 
 
 def scatter_plotter(
@@ -104,11 +922,16 @@ def scatter_plotter(
         pred_val: np.ndarray,
         plot_color: str = 'royalblue',
         line_color: str = 'r',
-        title: str = 'Scatter Plot'
+        title: str = 'Scatter Plot',
+        mode: str = 'scatter',
+        bins: int = 100,
+        cmap: str = 'viridis'
 ) -> Tuple[Figure, Axes]:
     """
     Create a scatter plot of in situ depth against predicted depth
     and plot a pred_val=true_val line.
+    The figure is drawn on its own Agg canvas without pyplot,
+    so it can be created and saved from any thread.
 
     Parameters
     ----------
@@ -122,6 +945,16 @@ def scatter_plotter(
         Line color. Default is 'r'.
     title : str
         Graph title. Default is 'Scatter Plot'.
+    mode : str
+        'scatter' to draw every point, or 'density' (2D histogram) or
+        'hexbin' to draw the number of points in bins, which takes the
+        same time for any number of points. Default is 'scatter'.
+    bins : int
+        Number of bins along each axis for 'density' and 'hexbin'.
+        Default is 100.
+    cmap : str
+        Colormap of the number of points for 'density' and 'hexbin'.
+        Default is 'viridis'.
 
     Returns
     -------
@@ -129,12 +962,67 @@ def scatter_plotter(
         A tuple containing (matplotlib figure, matplotlib axes).
     """
 
-    fig, ax = plt.subplots(figsize=(5, 5))
-    ax.scatter(true_val, pred_val, marker='.', color=plot_color, facecolors='none')
-    min_val, max_val = round(np.nanmin(true_val)), round(np.nanmax(true_val))
-    ax.plot([min_val, max_val], [min_val, max_val], color=line_color)
+    if mode not in PLOT_MODES:
+        raise ValueError(
+            f'Invalid mode: {mode}.\n'
+            f'Allowed: {PLOT_MODES}'
+        )
+
+    true_val = np.asarray(true_val, dtype=np.float64)
+    pred_val = np.asarray(pred_val, dtype=np.float64)
+
+    fig = Figure(figsize=(5, 5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
     ax.set_xlabel('True Depth')
     ax.set_ylabel('Predicted Depth')
     ax.set_title(title)
 
-    return fig, ax
\ No newline at end of file
+    valid = np.isfinite(true_val) & np.isfinite(pred_val)
+    if not valid.any():
+        # No finite pair of points, an empty plot
+        return fig, ax
+
+    if mode == 'scatter':
+        ax.scatter(true_val, pred_val, marker='.', color=plot_color, facecolors='none')
+    else:
+        low = min(true_val[valid].min(), pred_val[valid].min())
+        high = max(true_val[valid].max(), pred_val[valid].max())
+        if low == high:
+            # Every point at one value, widen the range around it
+            low, high = low - 0.5, high + 0.5
+
+        if mode == 'density':
+            counts, x_edges, y_edges = np.histogram2d(
+                true_val[valid],
+                pred_val[valid],
+                bins=bins,
+                range=[[low, high], [low, high]]
+            )
+            image = ax.imshow(
+                np.ma.masked_equal(counts.T, 0),
+                origin='lower',
+                extent=(x_edges[0], x_edges[-1], y_edges[0], y_edges[-1]),
+                aspect='auto',
+                cmap=cmap,
+                norm=LogNorm(vmin=1, vmax=max(counts.max(), 2)),
+                interpolation='nearest'
+            )
+        else:
+            image = ax.hexbin(
+                true_val[valid],
+                pred_val[valid],
+                gridsize=bins,
+                extent=(low, high, low, high),
+                cmap=cmap,
+                mincnt=1
+            )
+            counts = image.get_array()
+            image.set_norm(LogNorm(vmin=1, vmax=max(counts.max(), 2)))
+
+        fig.colorbar(image, ax=ax, label='Number of Points')
+
+    min_val, max_val = round(np.nanmin(true_val)), round(np.nanmax(true_val))
+    ax.plot([min_val, max_val], [min_val, max_val], color=line_color)
+
+    return fig, ax
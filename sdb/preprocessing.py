@@ -1,15 +1,21 @@
-from typing import Tuple
+import warnings
+from typing import Iterable, Iterator, Sequence, Tuple
 
 import geopandas as gpd
 import numpy as np
+import numpy.typing as npt
 import pandas as pd
 import xarray as xr
+from affine import Affine
 from sklearn.model_selection import train_test_split
 
 from .utils import point_sampling
 
 
-def unravel(raster: xr.DataArray) -> pd.DataFrame:
+def unravel(
+        raster: xr.DataArray,
+        dtype: npt.DTypeLike = np.float64
+) -> pd.DataFrame:
     """
     Unravel every band from rioxarray raster input to become a 1D array
     and stack it over every band in the form of columns.
@@ -20,6 +26,9 @@ def unravel(raster: xr.DataArray) -> pd.DataFrame:
     ----------
     raster : xr.DataArray
         DataArray from rioxarray.
+    dtype : npt.DTypeLike, optional
+        Data type of the unraveled bands, e.g. np.float32 to halve
+        the memory. Default is np.float64.
 
     Returns
     -------
@@ -28,25 +37,19 @@ def unravel(raster: xr.DataArray) -> pd.DataFrame:
     """
 
     # Check raster size
+    values = raster.values
     nbands = len(raster.band)
-    ndata = raster.values[0].size
+    ndata = values[0].size
 
-    # Create empty array based on raster size
-    bands_array = np.empty((nbands, ndata))
+    # Create empty array based on raster size, one column per band
+    bands_array = np.empty((ndata, nbands), dtype=dtype)
 
     # Ravel arrays from each raster bands
     for i in range(nbands):
-        bands_array[i, :] = np.ravel(raster.values[i])
-
-    # Transpose the array
-    bands_array = bands_array.T
+        bands_array[:, i] = np.ravel(values[i])
 
-    # Change inf and -inf values to nan (if any)
-    bands_array[bands_array == np.inf] = np.nan
-    bands_array[bands_array == -np.inf] = np.nan
-
-    # Replace nan values with -999.0
-    bands_array[np.isnan(bands_array)] = -999.0
+    # Replace inf, -inf, and nan values with -999.0
+    bands_array[~np.isfinite(bands_array)] = -999.0
 
     # Create dataframe from bands array
     bands_df = pd.DataFrame(
@@ -57,6 +60,78 @@ def unravel(raster: xr.DataArray) -> pd.DataFrame:
     return bands_df
 
 
+def derived_features(
+        features: np.ndarray | pd.DataFrame,
+        stumpf: Sequence[Tuple[int, int]] = (),
+        lyzenga: Sequence[int] = (),
+        keep_bands: bool = True,
+        n: float = 1000.0
+) -> np.ndarray:
+    """
+    Calculate derived features from band values, such as Stumpf log ratio,
+    ln(n * Ri) / ln(n * Rj) (Stumpf et al., 2003), and Lyzenga log band,
+    ln(Ri) (Lyzenga, 1978). Band values are clipped to a small positive
+    value before taking logarithms, and non finite features are changed
+    to -999.0 the same way as unravel.
+
+    Parameters
+    ----------
+    features : np.ndarray | pd.DataFrame
+        Feature matrix with one row per pixel and one column per band.
+    stumpf : Sequence[Tuple[int, int]], optional
+        Band number pairs (starting from 1) of every log ratio,
+        e.g. [(2, 3)] for ln(n * band 2) / ln(n * band 3). Default is ().
+    lyzenga : Sequence[int], optional
+        Band numbers (starting from 1) of every log band. Default is ().
+    keep_bands : bool, optional
+        Whether to keep the band values in front of derived features.
+        Default is True.
+    n : float, optional
+        Stumpf constant that keeps the logarithms positive.
+        Default is 1000.0.
+
+    Returns
+    -------
+    np.ndarray
+        Feature matrix with band values (if kept) and derived features.
+
+    Raises
+    ------
+    ValueError
+        If a band number is not in the feature matrix.
+    """
+
+    if isinstance(features, pd.DataFrame):
+        features = features.to_numpy()
+
+    nbands = features.shape[1]
+    used_bands = set(lyzenga).union(*stumpf)
+    if not used_bands <= set(range(1, nbands + 1)):
+        raise ValueError(
+            f'Invalid band: {sorted(used_bands - set(range(1, nbands + 1)))}.\n'
+            f'Allowed: {set(range(1, nbands + 1))}'
+        )
+
+    floor = 1e-6
+    columns = [features] if keep_bands else []
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if stumpf:
+            numerator, denominator = np.array(stumpf).T - 1
+            log_bands = np.log(np.maximum(n * features, floor))
+            columns.append(log_bands[:, numerator] / log_bands[:, denominator])
+
+        if lyzenga:
+            columns.append(
+                np.log(np.maximum(features[:, np.array(lyzenga) - 1], floor))
+            )
+
+    derived = np.hstack(columns)
+    derived[~np.isfinite(derived)] = -999.0
+
+    return derived
+
+
 def reproject_vector(
         raster: xr.DataArray,
         vector: gpd.GeoDataFrame
@@ -129,6 +204,155 @@ def clip_vector(
     return new_vector
 
 
+def aggregate_raster(
+        raster: xr.DataArray,
+        factor: int,
+        block_rows: int = 1024
+) -> xr.DataArray:
+    """
+    Resample raster to a coarser working resolution by averaging blocks
+    of factor x factor pixels (area average), ignoring NaN pixels.
+    Edge blocks beyond the raster extent only average the pixels inside.
+    The raster is read and averaged in blocks of rows with vectorized
+    operations, so a lazily loaded raster is never read at once.
+
+    Parameters
+    ----------
+    raster : xr.DataArray
+        DataArray from rioxarray.
+    factor : int
+        Number of pixels on each side of an averaged block, e.g. 5 to
+        resample 2 m pixels to 10 m. 1 returns the raster unchanged.
+    block_rows : int, optional
+        Number of raster rows averaged at once, by default 1024.
+
+    Returns
+    -------
+    xr.DataArray
+        Resampled raster with updated coordinates and transform.
+    """
+
+    if factor < 1:
+        raise ValueError(
+            f'Invalid factor: {factor}.\n'
+            'Allowed: >= 1'
+        )
+
+    if factor == 1:
+        return raster
+
+    n_bands, height, width = raster.shape
+    out_height = -(-height // factor)
+    out_width = -(-width // factor)
+    dtype = np.result_type(raster.dtype, np.float32)
+    out = np.empty((n_bands, out_height, out_width), dtype=dtype)
+
+    step = max(block_rows // factor, 1)
+    for start in range(0, out_height, step):
+        stop = min(start + step, out_height)
+        # Only the rows of this block are read from lazily loaded rasters
+        block = raster.isel(
+            y=slice(start * factor, stop * factor)
+        ).values.astype(dtype, copy=False)
+
+        # Pad partial edge blocks with NaN to whole blocks
+        pad_rows = (stop - start) * factor - block.shape[1]
+        pad_cols = out_width * factor - width
+        if pad_rows or pad_cols:
+            block = np.pad(
+                block,
+                ((0, 0), (0, pad_rows), (0, pad_cols)),
+                constant_values=np.nan
+            )
+
+        with warnings.catch_warnings():
+            # All NaN blocks stay NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            out[:, start:stop] = np.nanmean(
+                block.reshape(n_bands, stop - start, factor, out_width, factor),
+                axis=(2, 4)
+            )
+
+    transform = raster.rio.transform(recalc=False) * Affine.scale(factor)
+    x, _ = transform * (np.arange(out_width) + 0.5, np.full(out_width, 0.5))
+    _, y = transform * (np.full(out_height, 0.5), np.arange(out_height) + 0.5)
+
+    band_dim, y_dim, x_dim = raster.dims
+
+    resampled = xr.DataArray(
+        out,
+        dims=raster.dims,
+        coords={
+            band_dim: raster.coords[band_dim],
+            y_dim: y,
+            x_dim: x
+        },
+        attrs=dict(raster.attrs)
+    )
+
+    if raster.rio.crs is not None:
+        resampled.rio.write_crs(raster.rio.crs, inplace=True)
+
+    resampled.rio.write_transform(transform, inplace=True)
+    resampled.rio.write_nodata(np.nan, encoded=False, inplace=True)
+
+    if 'source' in raster.encoding:
+        resampled.encoding['source'] = raster.encoding['source']
+
+    return resampled
+
+
+def aggregate_samples(
+        raster: xr.DataArray,
+        vector: gpd.GeoDataFrame,
+        header: str,
+        group_header: str | None = None
+) -> gpd.GeoDataFrame:
+    """
+    Resample depth samples to the raster grid consistently with
+    aggregate_raster, averaging the depth of samples in the same pixel
+    into one sample at the pixel center.
+
+    Parameters
+    ----------
+    raster : xr.DataArray
+        Raster data, e.g. resampled by aggregate_raster.
+    vector : gpd.GeoDataFrame
+        Vector data of depth points in the raster CRS (see clip_vector).
+    header : str
+        Header name of depth data.
+    group_header : str | None, optional
+        Header name of an attribute kept separately in each pixel,
+        e.g. the attribute used by split_attribute. Default is None.
+
+    Returns
+    -------
+    gpd.GeoDataFrame
+        Averaged depth samples (and group attribute) at pixel centers.
+    """
+
+    transform = raster.rio.transform(recalc=False)
+    col, row = ~transform * (vector.geometry.x.values, vector.geometry.y.values)
+
+    keys = ['row', 'col'] + ([group_header] if group_header else [])
+    table = pd.DataFrame({
+        'row': np.floor(row).astype(np.int64),
+        'col': np.floor(col).astype(np.int64),
+        header: vector[header].values,
+    })
+    if group_header:
+        table[group_header] = vector[group_header].values
+
+    table = table.groupby(keys, sort=False)[header].mean().reset_index()
+    x, y = transform * (table['col'] + 0.5, table['row'] + 0.5)
+
+    return gpd.GeoDataFrame(
+        table.drop(columns=['row', 'col']),
+        geometry=gpd.points_from_xy(x, y),
+        crs=vector.crs
+    )
+
+
 def in_depth_filter(
         vector: gpd.GeoDataFrame,
         header: str,
@@ -192,7 +416,8 @@ def in_depth_filter(
 def features_label(
         raster: xr.DataArray,
         vector: gpd.GeoDataFrame,
-        header: str
+        header: str,
+        dtype: npt.DTypeLike | None = None
 ) -> pd.DataFrame:
     """
     Extract raster values which are considered as features based on
@@ -209,6 +434,9 @@ def features_label(
         Vector data of depth points in GeoDataFrame type.
     header : str
         Header name of depth data.
+    dtype : npt.DTypeLike | None, optional
+        Data type of the features. If None, the raster data type is kept.
+        Default is None.
 
     Returns
     -------
@@ -221,7 +449,7 @@ def features_label(
     z = vector[header]
 
     # Sampling image based on sample location
-    df = point_sampling(raster, x, y)
+    df = point_sampling(raster, x, y, dtype=dtype)
 
     # Append depth data to the dataframe
     df['z'] = z
@@ -232,12 +460,57 @@ def features_label(
     return df
 
 
+def sample_chunks(
+        raster: xr.DataArray,
+        vector_chunks: Iterable[gpd.GeoDataFrame],
+        header: str,
+        dtype: npt.DTypeLike | None = None
+) -> Iterator[Tuple[pd.DataFrame, pd.Series]]:
+    """
+    Extract features and label chunk by chunk from depth samples that are
+    read in parts (e.g. using read_shapefile_chunks), so only one chunk of
+    samples is kept in memory at a time. Samples outside the raster are
+    dropped.
+
+    Parameters
+    ----------
+    raster : xr.DataArray
+        DataArray from rioxarray.
+    vector_chunks : Iterable[gpd.GeoDataFrame]
+        Chunks of depth points in GeoDataFrame type.
+    header : str
+        Header name of depth data.
+    dtype : npt.DTypeLike | None, optional
+        Data type of the features. If None, the raster data type is kept.
+        Default is None.
+
+    Yields
+    ------
+    Tuple[pd.DataFrame, pd.Series]
+        Features (without xy coordinates) and label of the next chunk.
+    """
+
+    for vector in vector_chunks:
+        vector = clip_vector(raster, vector).reset_index(drop=True)
+
+        if vector.empty:
+            continue
+
+        df = features_label(raster, vector, header, dtype=dtype)
+
+        if df.empty:
+            continue
+
+        yield df.drop(columns=['x', 'y', 'z']), df['z']
+
+
 def split_random(
         raster: xr.DataArray,
         vector: gpd.GeoDataFrame,
         header: str,
         train_size: float = 0.75,
-        random_state: int = 0
+        random_state: int = 0,
+        dtype: npt.DTypeLike | None = None
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
     """
     Split train and test data randomly based on percentage.
@@ -258,6 +531,9 @@ def split_random(
         Train data size, by default 0.75.
     random_state : int, optional
         Random state, by default 0.
+    dtype : npt.DTypeLike | None, optional
+        Data type of the features. If None, the raster data type is kept.
+        Default is None.
 
     Returns
     -------
@@ -265,7 +541,7 @@ def split_random(
         A tuple containing (features_train, features_test, z_train, z_test).
     """
 
-    df = features_label(raster, vector, header)
+    df = features_label(raster, vector, header, dtype=dtype)
     features = df.drop(columns=['z'])
     z = df['z']
 
@@ -289,7 +565,8 @@ def split_attribute(
         vector: gpd.GeoDataFrame,
         depth_header: str,
         split_header: str,
-        group_name: str
+        group_name: str,
+        dtype: npt.DTypeLike | None = None
 ) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
     """
     Split train and test data based on assigned attribute.
@@ -310,6 +587,9 @@ def split_attribute(
         Header name of data that separates train and test data.
     group_name : str
         Group name that identifies the data as train data.
+    dtype : npt.DTypeLike | None, optional
+        Data type of the features. If None, the raster data type is kept.
+        Default is None.
 
     Returns
     -------
@@ -320,10 +600,164 @@ def split_attribute(
     train = vector[vector[split_header] == group_name].reset_index(drop=True)
     test = vector[vector[split_header] != group_name].reset_index(drop=True)
 
-    df_train = features_label(raster, train, depth_header)
+    df_train = features_label(raster, train, depth_header, dtype=dtype)
     features_train, z_train = df_train.drop(columns=['z']), df_train['z']
 
-    df_test = features_label(raster, test, depth_header)
+    df_test = features_label(raster, test, depth_header, dtype=dtype)
     features_test, z_test = df_test.drop(columns=['z']), df_test['z']
 
-    return features_train, features_test, z_train, z_test
\ No newline at end of file
+    return features_train, features_test, z_train, z_test
+
+
+def water_index(
+        raster: xr.DataArray,
+        green_band: int,
+        ir_band: int,
+        block_rows: int = 1024
+) -> np.ndarray:
+    """
+    Calculate normalized difference water index, (green - ir) / (green + ir),
+    block by block of raster rows.
+    Using a near infrared band gives NDWI (McFeeters, 1996), while using
+    a short wave infrared band gives MNDWI (Xu, 2006).
+
+    Parameters
+    ----------
+    raster : xr.DataArray
+        DataArray from rioxarray.
+    green_band : int
+        Band number of the green band.
+    ir_band : int
+        Band number of the near infrared (NDWI) or
+        short wave infrared (MNDWI) band.
+    block_rows : int, optional
+        Number of raster rows calculated at once, by default 1024.
+
+    Returns
+    -------
+    np.ndarray
+        2D array of water index with NaN where the index is undefined.
+
+    Raises
+    ------
+    ValueError
+        If the band number is not in the raster.
+    """
+
+    for band in (green_band, ir_band):
+        if band not in raster.band.values:
+            raise ValueError(
+                f'Invalid band: {band}.\n'
+                f'Allowed: {set(raster.band.values.tolist())}'
+            )
+
+    green = raster.sel(band=green_band)
+    ir = raster.sel(band=ir_band)
+    index = np.empty(green.shape, dtype=np.float32)
+
+    for start in range(0, green.shape[0], block_rows):
+        rows = slice(start, start + block_rows)
+        green_block = green.isel(y=rows).values.astype(np.float32)
+        ir_block = ir.isel(y=rows).values.astype(np.float32)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            index[rows] = (green_block - ir_block) / (green_block + ir_block)
+
+    index[~np.isfinite(index)] = np.nan
+
+    return index
+
+
+def otsu_threshold(
+        values: np.ndarray,
+        bins: int = 256
+) -> float:
+    """
+    Find the threshold that best separates values into two classes
+    by maximizing between class variance (Otsu, 1979).
+
+    Parameters
+    ----------
+    values : np.ndarray
+        Array of values. NaN values are ignored.
+    bins : int, optional
+        Number of histogram bins, by default 256.
+
+    Returns
+    -------
+    float
+        Otsu threshold.
+
+    Raises
+    ------
+    ValueError
+        If there is no finite value.
+    """
+
+    values = values[np.isfinite(values)]
+    if not values.size:
+        raise ValueError(
+            'Invalid values: no finite value.\n'
+            'Allowed: at least one finite value'
+        )
+
+    # A single value can not be separated, every value is below it
+    if values.min() == values.max():
+        return float(values.max())
+
+    hist, edges = np.histogram(values, bins=bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+
+    weight_low = np.cumsum(hist)
+    weight_high = weight_low[-1] - weight_low
+    sum_low = np.cumsum(hist * centers)
+    sum_high = sum_low[-1] - sum_low
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_low = sum_low / weight_low
+        mean_high = sum_high / weight_high
+        variance = weight_low * weight_high * (mean_low - mean_high) ** 2
+
+    return float(edges[np.nanargmax(variance[:-1]) + 1])
+
+
+def water_mask(
+        raster: xr.DataArray,
+        green_band: int,
+        ir_band: int,
+        threshold: float | None = 0.0,
+        block_rows: int = 1024
+) -> Tuple[np.ndarray, float]:
+    """
+    Separate water from land pixels using NDWI or MNDWI (see water_index).
+    Pixels with water index above the threshold are water.
+
+    Parameters
+    ----------
+    raster : xr.DataArray
+        DataArray from rioxarray.
+    green_band : int
+        Band number of the green band.
+    ir_band : int
+        Band number of the near infrared (NDWI) or
+        short wave infrared (MNDWI) band.
+    threshold : float | None, optional
+        Water index threshold. If None, the threshold is found using
+        Otsu method. Default is 0.0.
+    block_rows : int, optional
+        Number of raster rows calculated at once, by default 1024.
+
+    Returns
+    -------
+    Tuple[np.ndarray, float]
+        A tuple containing (2D boolean water mask, used threshold).
+    """
+
+    index = water_index(raster, green_band, ir_band, block_rows=block_rows)
+
+    if threshold is None:
+        threshold = otsu_threshold(index)
+
+    mask = index > threshold
+
+    return mask, threshold
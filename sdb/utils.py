@@ -1,14 +1,19 @@
+from typing import Callable, List, Tuple
+
 import numpy as np
+import numpy.typing as npt
 import pandas as pd
 import xarray as xr
-from scipy import ndimage
+from joblib import Parallel, delayed
+from numpy.lib.stride_tricks import sliding_window_view
 
 
 def point_sampling(
         raster: xr.DataArray,
         x: pd.Series,
         y: pd.Series,
-        include_xy: bool = True
+        include_xy: bool = True,
+        dtype: npt.DTypeLike | None = None
 ) -> pd.DataFrame:
     """
     Extract raster values from a dataarray based on xy coordinates.
@@ -24,6 +29,9 @@ def point_sampling(
         Y coordinates.
     include_xy : bool, optional
         Whether to include the x and y coordinates in the output DataFrame. Default is True.
+    dtype : npt.DTypeLike | None, optional
+        Data type of the extracted raster values. If None, the raster
+        data type is kept. Default is None.
 
     Returns
     -------
@@ -39,6 +47,9 @@ def point_sampling(
 
     point_samples = raster.sel(x=x_in, y=y_in, method='nearest').values.T
 
+    if dtype is not None:
+        point_samples = point_samples.astype(dtype, copy=False)
+
     point_samples_df = pd.DataFrame(
         point_samples,
         columns=[f'band_{i}' for i in raster.band.values]
@@ -50,12 +61,127 @@ def point_sampling(
     return point_samples_df
 
 
+def _median_rows(
+        array: np.ndarray,
+        out: np.ndarray,
+        start: int,
+        stop: int,
+        size: Tuple[int, int]
+) -> None:
+    """
+    Calculate NaN-aware median filter of array rows from start to stop
+    and write it into the same rows of out.
+    """
+
+    half_rows, half_cols = size[0] // 2, size[1] // 2
+    top = max(start - half_rows, 0)
+    bottom = min(stop + half_rows, array.shape[0])
+
+    # Same edge handling as ndimage.median_filter ('reflect' mode)
+    tile = np.pad(
+        array[top:bottom],
+        (
+            (half_rows - (start - top), half_rows - (bottom - stop)),
+            (half_cols, half_cols)
+        ),
+        mode='symmetric'
+    )
+    windows = sliding_window_view(tile, size).reshape(
+        stop - start, array.shape[1], -1
+    )
+    kth = windows.shape[-1] // 2
+
+    filtered = np.partition(windows, kth, axis=-1)[..., kth]
+
+    nan_windows = np.isnan(windows)
+    if nan_windows.any():
+        center = array[start:stop]
+        fix = nan_windows.any(axis=-1) & ~np.isnan(center)
+        if fix.any():
+            # NaN are sorted last, so the median is in the first n values
+            sorted_windows = np.sort(windows[fix], axis=-1)
+            n_valid = np.count_nonzero(~nan_windows[fix], axis=-1)
+            index = np.arange(len(n_valid))
+            filtered[fix] = (
+                sorted_windows[index, (n_valid - 1) // 2]
+                + sorted_windows[index, n_valid // 2]
+            ) / 2
+        filtered[np.isnan(center)] = np.nan
+
+    out[start:stop] = filtered
+
+
+def _median_sizes(filter_size: int, method: str) -> List[Tuple[int, int]]:
+    """
+    Get window sizes of every median filter pass.
+    """
+
+    if filter_size < 3 or filter_size % 2 == 0:
+        raise ValueError('Allowed value: >= 3 and odd numbers')
+
+    sizes_dict = {
+        'exact': [(filter_size, filter_size)],
+        'separable': [(1, filter_size), (filter_size, 1)],
+    }
+
+    if method not in sizes_dict:
+        raise ValueError(
+            f'Invalid method: {method}.\n'
+            f'Allowed: {set(sizes_dict.keys())}'
+        )
+
+    return sizes_dict[method]
+
+
+def _block_rows(
+        shape: Tuple[int, ...],
+        size: Tuple[int, int],
+        block_size: int
+) -> List[Tuple[int, int]]:
+    """
+    Split array rows into blocks holding about block_size window values.
+    """
+
+    step = max(block_size // (shape[1] * size[0] * size[1]), 1)
+
+    return [
+        (start, min(start + step, shape[0]))
+        for start in range(0, shape[0], step)
+    ]
+
+
+def _median_block(
+        array: np.ndarray,
+        out: np.ndarray,
+        start: int,
+        stop: int,
+        size: Tuple[int, int],
+        block_func: Callable[[np.ndarray], None] | None
+) -> None:
+    """
+    Calculate median filter of array rows from start to stop, then
+    apply block_func to the filtered rows while they are in memory.
+    """
+
+    _median_rows(array, out, start, stop, size)
+    if block_func is not None:
+        block_func(out[start:stop])
+
+
 def median_filter(
         array: np.ndarray,
-        filter_size: int = 3
+        filter_size: int = 3,
+        method: str = 'exact',
+        n_jobs: int = -2,
+        block_size: int = 4194304,
+        out: np.ndarray | None = None,
+        block_func: Callable[[np.ndarray], None] | None = None
 ) -> np.ndarray:
     """
-    Calculate median filter of a 2D array.
+    Calculate median filter of a 2D array, keeping its data type.
+    The array is filtered in blocks of rows (with overlapping edge rows)
+    on a thread pool. NaN values inside a window are ignored and
+    NaN pixels stay NaN, so gaps do not spread into valid depth.
 
     Parameters
     ----------
@@ -63,18 +189,54 @@ def median_filter(
         2D array data.
     filter_size : int, optional
         Size of the median filter window. Must be >= 3 and odd. Default is 3.
+    method : str, optional
+        'exact' for the median of the square window, or 'separable' for
+        the median of row medians, an approximation that is much faster
+        for large windows. Default is 'exact'.
+    n_jobs : int, optional
+        The number of threads to run in parallel. Default is -2.
+    block_size : int, optional
+        Number of window values held in memory at a time by each thread.
+        Default is 4194304.
+    out : np.ndarray | None, optional
+        Output array with the same shape as array, other than array
+        itself. If None, a new array is created. Default is None.
+    block_func : Callable[[np.ndarray], None] | None, optional
+        Function that changes a block of filtered rows in place, run
+        on every block right after its last filter pass (e.g. a depth
+        limit). Default is None.
+
     Returns
     -------
     np.ndarray
         Filtered array.
     """
 
-    if filter_size < 3 or filter_size % 2 == 0:
-        raise ValueError('Allowed value: >= 3 and odd numbers')
+    sizes = _median_sizes(filter_size, method)
+
+    if out is None:
+        out = np.empty_like(array)
+    elif np.shares_memory(out, array):
+        raise ValueError('Output array has to be a new array for median filter')
 
-    filtered = ndimage.median_filter(array, size=filter_size)
+    # Only the first separable pass needs its own array, the last
+    # (or only) pass is written into out
+    source = array
+    for size in sizes[:-1]:
+        filtered = np.empty_like(array)
+        Parallel(n_jobs=n_jobs, backend='threading')(
+            delayed(_median_rows)(source, filtered, start, stop, size)
+            for start, stop in _block_rows(array.shape, size, block_size)
+        )
+        source = filtered
 
-    return filtered
+    last_size = sizes[-1]
+    Parallel(n_jobs=n_jobs, backend='threading')(
+        delayed(_median_block)(source, out, start, stop, last_size, block_func)
+        for start, stop in _block_rows(array.shape, last_size, block_size)
+    )
+
+    return out
 
 
 def array_to_dataarray(
@@ -86,6 +248,9 @@ def array_to_dataarray(
     """
     Create a new DataArray from a 2D Numpy array based on 
     rioxarray image specification but only contain 1 band.
+    Only the image metadata (coordinates, CRS, transform) is used, so the
+    image pixels are not loaded, and the array is wrapped without a copy.
+    Floating point arrays get NaN as nodata.
 
     Parameters
     ----------
@@ -104,18 +269,28 @@ def array_to_dataarray(
         A DataArray with the same dimension and coordinates as input DataArray.
     """
 
+    band_dim, y_dim, x_dim = data_array.dims
+
     new_da = xr.DataArray(
         array[np.newaxis, :, :],
         dims=data_array.dims,
         coords={
-            'band': [band_name],
-            'y': data_array.coords['y'],
-            'x': data_array.coords['x']
+            band_dim: [band_name],
+            y_dim: data_array.coords[y_dim],
+            x_dim: data_array.coords[x_dim]
         },
-        attrs=data_array.attrs if attrs else None
+        attrs=dict(data_array.attrs) if attrs else None
     )
 
     if data_array.rio.crs is not None:
         new_da.rio.write_crs(data_array.rio.crs, inplace=True)
 
-    return new_da
\ No newline at end of file
+    new_da.rio.write_transform(
+        data_array.rio.transform(recalc=False),
+        inplace=True
+    )
+
+    if np.issubdtype(array.dtype, np.floating):
+        new_da.rio.write_nodata(np.nan, encoded=False, inplace=True)
+
+    return new_da
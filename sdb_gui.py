@@ -1,3 +1,4 @@
+import copy
 import datetime
 import logging
 import pprint
@@ -8,13 +9,18 @@ from collections import OrderedDict
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Tuple, Union
 
+import joblib
 import numpy as np
 import pandas as pd
-from PyQt5.QtCore import QSettings, Qt, QThread, pyqtSignal
-from PyQt5.QtGui import QIcon
+import xarray as xr
+from pyproj import CRS
+from pyproj.exceptions import CRSError
+from PyQt5.QtCore import QSettings, Qt, QThread, QUrl, pyqtSignal
+from PyQt5.QtGui import QIcon, QImage, QTextDocument
 from PyQt5.QtWidgets import (QApplication, QCheckBox, QComboBox, QDialog,
                              QDoubleSpinBox, QErrorMessage, QFileDialog,
-                             QGridLayout, QLabel, QMessageBox, QProgressBar,
+                             QGridLayout, QLabel, QLineEdit, QMessageBox,
+                             QProgressBar,
                              QPushButton, QScrollArea, QSpinBox, QTableWidget,
                              QTableWidgetItem, QTextBrowser, QVBoxLayout,
                              QWidget)
@@ -26,6 +32,8 @@ from sdb.gui_utils import acronym, str2bool, to_title
 SDB_GUI_VERSION: str = '4.1.0'
 LOG_NAME: str = 'sdb_gui.log'
 PROGRESS_STEP: int = 6
+APPLY_PROGRESS_STEP: int = 3
+MODEL_FORMAT: str = 'SDB Model (*.joblib)'
 DEPTH_DIRECTION: Dict[str, Tuple[str, bool]] = {
     'Positive Up': ('up', False),
     'Positive Down': ('down', True),
@@ -38,6 +46,62 @@ EVALUATION_TYPES: Dict[str, bool] = {
     'Use Current Prediction': False,
     'Recalculate from Test Data': True,
 }
+SEARCH_TYPES: Dict[str, str] = {
+    'Grid Search': 'grid',
+    'Random Search': 'random',
+    'Successive Halving': 'halving',
+}
+RF_ENGINES: Dict[str, bool] = {
+    'Scikit-Learn': False,
+    'Flattened Trees': True,
+}
+UNCERTAINTY_TYPES: Dict[str, str | None] = {
+    'Disabled': None,
+    'Tree Standard Deviation': 'std',
+    '90% Tree Interval': 'interval',
+}
+MEDIAN_METHODS: Dict[str, str] = {
+    'Exact': 'exact',
+    'Separable (Fast)': 'separable',
+}
+FILL_METHODS: Dict[str, str] = {
+    'Nearest': 'nearest',
+    'Inverse Distance Weighting': 'idw',
+}
+SCATTER_MODES: Dict[str, str] = {
+    'Scatter': 'scatter',
+    'Density (2D Histogram)': 'density',
+    'Hexbin': 'hexbin',
+}
+CONTOUR_FORMATS: Dict[str, str] = {
+    'GeoPackage': '.gpkg',
+    'GeoParquet': '.parquet',
+}
+RESAMPLING_METHODS: Dict[str, str] = {
+    'Bilinear': 'bilinear',
+    'Nearest': 'nearest',
+    'Cubic': 'cubic',
+    'Average': 'average',
+}
+# Categorical extra bands, reprojected with nearest resampling
+MASK_BANDS: List[str] = ['Water Mask', 'Filled Mask']
+QUICKLOOK_SIZE: int = 256
+SENSOR_TAGS: List[str] = [
+    'SENSOR', 'SPACECRAFT_ID', 'SPACECRAFT', 'SATELLITE', 'PLATFORM', 'MISSION'
+]
+SENSOR_PREFIXES: Dict[str, str] = {
+    'S2A': 'Sentinel-2',
+    'S2B': 'Sentinel-2',
+    'S2C': 'Sentinel-2',
+    'LC08': 'Landsat 8',
+    'LC09': 'Landsat 9',
+    'LE07': 'Landsat 7',
+    'LT05': 'Landsat 5',
+}
+PRECISION: Dict[str, type] = {
+    'Double (float64)': np.float64,
+    'Single (float32)': np.float32,
+}
 DEM_FORMATS: List[str] = [
     'GeoTIFF (*.tif)',
     'ASCII Gridded XYZ (*.xyz)',
@@ -68,6 +132,9 @@ FILES: Dict[str, Dict[str, str]] = {
         'Scikit Learn': 'licenses/scikit-learn_license',
     }
 }
+# Last fitted model and its predictions, reused when only
+# the number of Random Forest trees changes or nothing changes
+model_session: Dict[str, Any] = {}
 
 
 class SDBWidget(QWidget):
@@ -210,7 +277,7 @@ class SDBWidget(QWidget):
         grid4 = QGridLayout()
         row_grid4 = 1
         makePredictionButton = QPushButton('Generate Prediction')
-        makePredictionButton.clicked.connect(self._predict)
+        makePredictionButton.clicked.connect(lambda: self._predict())
         grid4.addWidget(makePredictionButton, row_grid4, 1, 1, 2)
 
         resetSettingsButton = QPushButton('Reset Settings')
@@ -226,6 +293,20 @@ class SDBWidget(QWidget):
         saveFileButton.clicked.connect(self._saveOptionWindow)
         grid4.addWidget(saveFileButton, row_grid4, 3, 1, 2)
 
+        row_grid4 += 1
+        applyModelButton = QPushButton('Apply Saved Model')
+        applyModelButton.clicked.connect(self._applyModel)
+        grid4.addWidget(applyModelButton, row_grid4, 1, 1, 2)
+
+        parameterSearchButton = QPushButton('Parameter Search')
+        parameterSearchButton.clicked.connect(self._searchOptionWindow)
+        grid4.addWidget(parameterSearchButton, row_grid4, 3, 1, 2)
+
+        row_grid4 += 1
+        compareModelsButton = QPushButton('Compare Models')
+        compareModelsButton.clicked.connect(self._compareOptionWindow)
+        grid4.addWidget(compareModelsButton, row_grid4, 1, 1, 4)
+
         row_grid4 += 1
         resultInfo = QLabel('Result Information')
         grid4.addWidget(resultInfo, row_grid4, 1, 1, 2)
@@ -284,7 +365,13 @@ class SDBWidget(QWidget):
 
                     _ = saved_settings['method']
 
-                    return saved_settings
+                    defaults = default_values()
+                    settings = fill_missing(saved_settings, defaults)
+                    # available backends depend on this version, not on saved settings
+                    settings['processing']['backend_set'] = (
+                        defaults['processing']['backend_set']
+                    )
+                    return settings
                 except KeyError as e:
                     logger.warning(f'Missing or invalid settings structure: {e}, loading defaults')
                     return default_values()
@@ -495,11 +582,10 @@ class SDBWidget(QWidget):
 
             self.img_size = Path(self.imglocList.toPlainText()).stat().st_size
 
-            global image_raw
-            image_raw = sdb.read_geotiff(self.imglocList.toPlainText())
-
-            global bands_df
-            bands_df = sdb.unravel(image_raw)
+            global image_native, image_raw, bands_df
+            image_native = sdb.read_geotiff(self.imglocList.toPlainText())
+            image_raw, bands_df = working_image(image_native)
+            model_session.clear()
 
             self.loadImageLabel.setText(Path(self.imglocList.toPlainText()).name)
 
@@ -587,6 +673,7 @@ class SDBWidget(QWidget):
 
             global sample_raw
             sample_raw = sdb.read_shapefile(self.samplelocList.toPlainText())
+            model_session.clear()
 
             proc_op_dict.update({
                 'current_selection': SELECTION_TYPES['RANDOM']
@@ -739,6 +826,213 @@ class SDBWidget(QWidget):
         self.saveSettings()
 
 
+    def _searchOptionWindow(self):
+        """
+        Parameter search option User Interface
+        """
+
+        method = self.methodCB.currentText()
+        method_options = option_pool['method'][method]
+        search_options = proc_op_dict['search']
+
+        self.searchOptionDialog = QDialog()
+        self.searchOptionDialog.setWindowTitle(
+            f'Parameter Search ({acronym(method)})'
+        )
+        self.searchOptionDialog.setWindowIcon(
+            QIcon(resource_path(FILES['icons']['setting']))
+        )
+
+        grid = QGridLayout()
+        row = 1
+        searchTypeLabel = QLabel('Search Type:')
+        grid.addWidget(searchTypeLabel, row, 1, 1, 2)
+
+        self.searchTypeCB = QComboBox()
+        self.searchTypeCB.addItems(list(SEARCH_TYPES.keys()))
+        self.searchTypeCB.setCurrentText(search_options['type'])
+        grid.addWidget(self.searchTypeCB, row, 3, 1, 2)
+
+        row += 1
+        cvLabel = QLabel('Cross Validation Folds:')
+        grid.addWidget(cvLabel, row, 1, 1, 2)
+
+        self.cvSB = QSpinBox()
+        self.cvSB.setRange(2, 20)
+        self.cvSB.setValue(search_options['cv'])
+        self.cvSB.setAlignment(Qt.AlignRight)
+        grid.addWidget(self.cvSB, row, 3, 1, 2)
+
+        row += 1
+        nIterLabel = QLabel('Random Candidates:')
+        grid.addWidget(nIterLabel, row, 1, 1, 2)
+
+        self.nIterSB = QSpinBox()
+        self.nIterSB.setRange(1, 1000)
+        self.nIterSB.setValue(search_options['n_iter'])
+        self.nIterSB.setAlignment(Qt.AlignRight)
+        grid.addWidget(self.nIterSB, row, 3, 1, 2)
+
+        row += 1
+        candidateLabel = QLabel('Candidate Values (comma separated)')
+        grid.addWidget(candidateLabel, row, 1, 1, 4)
+
+        self.search_widgets = {}
+        for param, values in method_options['search_space'].items():
+            row += 1
+            label = QLabel(to_title(param) + ':')
+            grid.addWidget(label, row, 1, 1, 2)
+
+            widget = QLineEdit(', '.join(str(value) for value in values))
+            self.search_widgets[param] = widget
+            grid.addWidget(widget, row, 3, 1, 2)
+
+        row += 1
+        searchButton = QPushButton('Search')
+        searchButton.clicked.connect(self._searchAction)
+        grid.addWidget(searchButton, row, 3, 1, 1)
+
+        cancelButton = QPushButton('Cancel')
+        cancelButton.clicked.connect(self.searchOptionDialog.close)
+        grid.addWidget(cancelButton, row, 4, 1, 1)
+
+        self.searchOptionDialog.setLayout(grid)
+
+        self.searchOptionDialog.exec_()
+
+
+    def _searchAction(self):
+        """
+        Loading candidate values of parameter search and sending them
+        to SearchProcess Class
+        """
+
+        method = self.methodCB.currentText()
+        method_options = option_pool['method'][method]
+
+        try:
+            search_space = OrderedDict()
+            for param, widget in self.search_widgets.items():
+                value_type = type(method_options['model_parameters'][param])
+                texts = [
+                    text.strip() for text in widget.text().split(',')
+                    if text.strip()
+                ]
+                if not texts:
+                    raise ValueError(f'no candidate value for {param}')
+                if value_type is bool:
+                    search_space[param] = [str2bool(text) for text in texts]
+                else:
+                    search_space[param] = [value_type(text) for text in texts]
+        except ValueError as e:
+            logger.error(f'invalid candidate values: {e}')
+            self.searchOptionDialog.close()
+            self._warningWithoutClear(
+                'Please insert valid candidate values!'
+            )
+            self._searchOptionWindow()
+            return
+
+        method_options['search_space'] = search_space
+        proc_op_dict['search'].update({
+            'type': self.searchTypeCB.currentText(),
+            'cv': self.cvSB.value(),
+            'n_iter': self.nIterSB.value(),
+        })
+        logger.info(f'{method} search space updated: {dict(search_space)}')
+
+        self.searchOptionDialog.close()
+        self._predict(process_class=SearchProcess)
+
+
+    def _compareOptionWindow(self):
+        """
+        Model comparison option User Interface
+        """
+
+        compare_options = proc_op_dict['compare']
+
+        self.compareOptionDialog = QDialog()
+        self.compareOptionDialog.setWindowTitle('Compare Models')
+        self.compareOptionDialog.setWindowIcon(
+            QIcon(resource_path(FILES['icons']['setting']))
+        )
+
+        grid = QGridLayout()
+        row = 1
+        methodLabel = QLabel('Method')
+        grid.addWidget(methodLabel, row, 1, 1, 2)
+
+        compareLabel = QLabel('Compare')
+        grid.addWidget(compareLabel, row, 3, 1, 1)
+
+        predictLabel = QLabel('Predict Scene')
+        grid.addWidget(predictLabel, row, 4, 1, 1)
+
+        self.compare_widgets = {}
+        for method in option_pool['method']:
+            row += 1
+            label = QLabel(method)
+            grid.addWidget(label, row, 1, 1, 2)
+
+            compareCheckBox = QCheckBox()
+            compareCheckBox.setChecked(method in compare_options['models'])
+            grid.addWidget(compareCheckBox, row, 3, 1, 1)
+
+            predictCheckBox = QCheckBox()
+            predictCheckBox.setChecked(method in compare_options['predict'])
+            grid.addWidget(predictCheckBox, row, 4, 1, 1)
+
+            self.compare_widgets[method] = (compareCheckBox, predictCheckBox)
+
+        row += 1
+        compareButton = QPushButton('Compare')
+        compareButton.clicked.connect(self._compareAction)
+        grid.addWidget(compareButton, row, 3, 1, 1)
+
+        cancelButton = QPushButton('Cancel')
+        cancelButton.clicked.connect(self.compareOptionDialog.close)
+        grid.addWidget(cancelButton, row, 4, 1, 1)
+
+        self.compareOptionDialog.setLayout(grid)
+
+        self.compareOptionDialog.exec_()
+
+
+    def _compareAction(self):
+        """
+        Loading selected methods to compare and sending them
+        to CompareProcess Class
+        """
+
+        models = [
+            method for method, (compare, predict) in self.compare_widgets.items()
+            if compare.isChecked() or predict.isChecked()
+        ]
+        predict = [
+            method for method, (_, predict) in self.compare_widgets.items()
+            if predict.isChecked()
+        ]
+
+        if len(models) < 2 or not predict:
+            self.compareOptionDialog.close()
+            self._warningWithoutClear(
+                'Please select at least two methods to compare '
+                'and one method to predict!'
+            )
+            self._compareOptionWindow()
+            return
+
+        proc_op_dict['compare'].update({
+            'models': models,
+            'predict': predict,
+        })
+        logger.info(f'compare {models} and predict {predict}')
+
+        self.compareOptionDialog.close()
+        self._predict(process_class=CompareProcess)
+
+
     def _processingOptionWindow(self):
         """
         Processing option User Interface
@@ -770,6 +1064,128 @@ class SDBWidget(QWidget):
         self.njobsSB.setAlignment(Qt.AlignRight)
         grid.addWidget(self.njobsSB, row, 3, 1, 2)
 
+        row += 1
+        schedulerLabel = QLabel('Dask Scheduler:')
+        grid.addWidget(schedulerLabel, row, 1, 1, 2)
+
+        self.schedulerLE = QLineEdit()
+        self.schedulerLE.setPlaceholderText('Local Cluster')
+        self.schedulerLE.setText(proc_op_dict['dask_scheduler'])
+        grid.addWidget(self.schedulerLE, row, 3, 1, 2)
+
+        row += 1
+        uncertaintyLabel = QLabel('RF Uncertainty:')
+        grid.addWidget(uncertaintyLabel, row, 1, 1, 2)
+
+        self.uncertaintyCB = QComboBox()
+        self.uncertaintyCB.addItems(list(UNCERTAINTY_TYPES.keys()))
+        self.uncertaintyCB.setCurrentText(proc_op_dict['uncertainty'])
+        grid.addWidget(self.uncertaintyCB, row, 3, 1, 2)
+
+        row += 1
+        precisionLabel = QLabel('Precision:')
+        grid.addWidget(precisionLabel, row, 1, 1, 2)
+
+        self.precisionCB = QComboBox()
+        self.precisionCB.addItems(list(PRECISION.keys()))
+        self.precisionCB.setCurrentText(proc_op_dict['precision'])
+        grid.addWidget(self.precisionCB, row, 3, 1, 2)
+
+        row += 1
+        workingResolutionLabel = QLabel('Working Resolution:')
+        grid.addWidget(workingResolutionLabel, row, 1, 1, 2)
+
+        self.workingResolutionSB = QSpinBox()
+        self.workingResolutionSB.setRange(1, 100)
+        self.workingResolutionSB.setSpecialValueText('Native')
+        self.workingResolutionSB.setSuffix(' x Pixel Size')
+        self.workingResolutionSB.setToolTip(
+            'Average blocks of pixels (and samples in them) before '
+            'sampling and prediction'
+        )
+        self.workingResolutionSB.setValue(proc_op_dict['working_resolution'])
+        self.workingResolutionSB.setAlignment(Qt.AlignRight)
+        grid.addWidget(self.workingResolutionSB, row, 3, 1, 2)
+
+        row += 1
+        rfEngineLabel = QLabel('RF Inference Engine:')
+        grid.addWidget(rfEngineLabel, row, 1, 1, 2)
+
+        self.rfEngineCB = QComboBox()
+        self.rfEngineCB.addItems(list(RF_ENGINES.keys()))
+        self.rfEngineCB.setCurrentText(proc_op_dict['rf_engine'])
+        grid.addWidget(self.rfEngineCB, row, 3, 1, 2)
+
+        row += 1
+        water_options = proc_op_dict['water_mask']
+        self.waterMaskCheckBox = QCheckBox('Predict Water Pixels Only')
+        self.waterMaskCheckBox.setChecked(water_options['enabled'])
+        grid.addWidget(self.waterMaskCheckBox, row, 1, 1, 4)
+
+        row += 1
+        greenBandLabel = QLabel('Green Band:')
+        grid.addWidget(greenBandLabel, row, 1, 1, 1)
+
+        self.greenBandSB = QSpinBox()
+        self.greenBandSB.setRange(1, 100)
+        self.greenBandSB.setValue(water_options['green_band'])
+        self.greenBandSB.setAlignment(Qt.AlignRight)
+        grid.addWidget(self.greenBandSB, row, 2, 1, 1)
+
+        irBandLabel = QLabel('NIR/SWIR Band:')
+        grid.addWidget(irBandLabel, row, 3, 1, 1)
+
+        self.irBandSB = QSpinBox()
+        self.irBandSB.setRange(1, 100)
+        self.irBandSB.setValue(water_options['ir_band'])
+        self.irBandSB.setAlignment(Qt.AlignRight)
+        grid.addWidget(self.irBandSB, row, 4, 1, 1)
+
+        row += 1
+        self.otsuCheckBox = QCheckBox('Otsu Threshold')
+        self.otsuCheckBox.setChecked(water_options['otsu'])
+        grid.addWidget(self.otsuCheckBox, row, 1, 1, 2)
+
+        self.waterThresholdDSB = QDoubleSpinBox()
+        self.waterThresholdDSB.setRange(-1.0, 1.0)
+        self.waterThresholdDSB.setDecimals(2)
+        self.waterThresholdDSB.setSingleStep(0.05)
+        self.waterThresholdDSB.setValue(water_options['threshold'])
+        self.waterThresholdDSB.setAlignment(Qt.AlignRight)
+        self.waterThresholdDSB.setEnabled(not water_options['otsu'])
+        self.otsuCheckBox.toggled.connect(
+            lambda checked: self.waterThresholdDSB.setEnabled(not checked)
+        )
+        grid.addWidget(self.waterThresholdDSB, row, 3, 1, 2)
+
+        row += 1
+        derived_options = proc_op_dict['derived']
+        stumpfLabel = QLabel('Stumpf Log Ratios:')
+        grid.addWidget(stumpfLabel, row, 1, 1, 2)
+
+        self.stumpfLE = QLineEdit()
+        self.stumpfLE.setPlaceholderText('e.g. 2/3, 2/1')
+        self.stumpfLE.setText(
+            ', '.join(f'{i}/{j}' for i, j in derived_options['stumpf'])
+        )
+        grid.addWidget(self.stumpfLE, row, 3, 1, 2)
+
+        row += 1
+        lyzengaLabel = QLabel('Lyzenga Log Bands:')
+        grid.addWidget(lyzengaLabel, row, 1, 1, 2)
+
+        self.lyzengaLE = QLineEdit()
+        self.lyzengaLE.setPlaceholderText('e.g. 1, 2, 3')
+        self.lyzengaLE.setText(
+            ', '.join(str(band) for band in derived_options['lyzenga'])
+        )
+        grid.addWidget(self.lyzengaLE, row, 3, 1, 2)
+
+        row += 1
+        self.keepBandsCheckBox = QCheckBox('Keep Band Values with Derived Features')
+        self.keepBandsCheckBox.setChecked(derived_options['keep_bands'])
+        grid.addWidget(self.keepBandsCheckBox, row, 1, 1, 4)
+
         row += 1
         evalTypeLabel = QLabel('Evaluation Type:')
         grid.addWidget(evalTypeLabel, row, 1, 1, 2)
@@ -825,8 +1241,67 @@ class SDBWidget(QWidget):
             self._processingOptionWindow()
             return
 
+        try:
+            sdb.modeling.check_backend(self.backendCB.currentText())
+        except ImportError as e:
+            self.processingOptionDialog.close()
+            self._warningWithoutClear(str(e))
+            self._processingOptionWindow()
+            return
+
+        try:
+            stumpf = [
+                [int(band) for band in pair.split('/')]
+                for pair in self.stumpfLE.text().split(',') if pair.strip()
+            ]
+            lyzenga = [
+                int(band)
+                for band in self.lyzengaLE.text().split(',') if band.strip()
+            ]
+            if any(len(pair) != 2 for pair in stumpf):
+                raise ValueError(f'invalid log ratio: {stumpf}')
+        except ValueError:
+            self.processingOptionDialog.close()
+            self._warningWithoutClear(
+                'Please insert log ratios as band pairs (e.g. 2/3, 2/1) '
+                'and log bands as band numbers (e.g. 1, 2, 3)!'
+            )
+            self._processingOptionWindow()
+            return
+
         proc_op_dict['backend'] = self.backendCB.currentText()
         proc_op_dict['n_jobs'] = self.njobsSB.value()
+        proc_op_dict['dask_scheduler'] = self.schedulerLE.text().strip()
+        proc_op_dict['rf_engine'] = self.rfEngineCB.currentText()
+        proc_op_dict['uncertainty'] = self.uncertaintyCB.currentText()
+        proc_op_dict['precision'] = self.precisionCB.currentText()
+        resampled = (
+            proc_op_dict['working_resolution']
+            != self.workingResolutionSB.value()
+        )
+        proc_op_dict['working_resolution'] = self.workingResolutionSB.value()
+        global image_raw, bands_df
+        if resampled and 'image_native' in globals():
+            image_raw, bands_df = working_image(image_native)
+            model_session.clear()
+        elif 'bands_df' in globals():
+            bands_df = bands_df.astype(
+                PRECISION[proc_op_dict['precision']],
+                copy=False
+            )
+            model_session.clear()
+        proc_op_dict['derived'].update({
+            'stumpf': stumpf,
+            'lyzenga': lyzenga,
+            'keep_bands': self.keepBandsCheckBox.isChecked(),
+        })
+        proc_op_dict['water_mask'].update({
+            'enabled': self.waterMaskCheckBox.isChecked(),
+            'green_band': self.greenBandSB.value(),
+            'ir_band': self.irBandSB.value(),
+            'otsu': self.otsuCheckBox.isChecked(),
+            'threshold': self.waterThresholdDSB.value(),
+        })
         proc_op_dict['current_eval'] = self.evalTypeCB.currentText()
         proc_op_dict['current_selection'] = self.trainSelectCB.currentText()
 
@@ -936,16 +1411,21 @@ class SDBWidget(QWidget):
             logger.error(f'failed to update groups: {e}')
 
 
-    def _predict(self):
+    def _predict(self, process_class: type = None):
         """
         Sending parameters and inputs from widget to Process Class
+        or one of its subclasses (SearchProcess or CompareProcess)
         """
 
+        if process_class is None:
+            process_class = Process
+
         logging.debug('Sending user inputs to process class')
         self.saveSettings()
 
         self.resultText.clear()
         self.progressBar.setValue(0)
+        self.progressBar.setMaximum(PROGRESS_STEP)
 
         global time_list
         time_list = []
@@ -961,11 +1441,13 @@ class SDBWidget(QWidget):
                 proc_op_dict['current_selection']
             ]['parameters'],
             'eval_type': proc_op_dict['current_eval'],
+            'search': dict(proc_op_dict['search']),
+            'compare': dict(proc_op_dict['compare']),
         }
 
         try:
             if sample_raw[self.depthHeaderCB.currentText()].dtype == 'float':
-                self.sdbProcess = Process()
+                self.sdbProcess = process_class()
                 self.widget_signal.connect(self.sdbProcess.inputs)
                 self.widget_signal.emit(init_input)
                 self.sdbProcess.start()
@@ -982,6 +1464,43 @@ class SDBWidget(QWidget):
             )
 
 
+    def _applyModel(self):
+        """
+        Selecting a saved model and sending it to ApplyModel Class
+        to predict depth over the loaded image without retraining
+        """
+
+        fname = QFileDialog.getOpenFileName(
+            self,
+            'Open Model File',
+            str(self.dir_path),
+            f'All Files (*.*) ;; {MODEL_FORMAT}',
+            MODEL_FORMAT
+        )
+
+        if not fname[0]:
+            return
+
+        self.model_loc = Path(fname[0])
+        self.dir_path = self.model_loc.parent
+        self.settings.setValue('last_directory', self.dir_path)
+        logger.info(f'applying saved model: {self.model_loc}')
+
+        self.resultText.clear()
+        self.progressBar.setValue(0)
+        self.progressBar.setMaximum(APPLY_PROGRESS_STEP)
+
+        global time_list
+        time_list = []
+
+        self.sdbProcess = ApplyModel(self.model_loc)
+        self.sdbProcess.time_signal.connect(self._timeCounting)
+        self.sdbProcess.thread_signal.connect(self._applyResults)
+        self.sdbProcess.warning_with_clear.connect(self._warningWithClear)
+        self.sdbProcess.warning_without_clear.connect(self._warningWithoutClear)
+        self.sdbProcess.start()
+
+
     def _timeCounting(self, time_text: List[Union[datetime.datetime, str]]) -> None:
         """
         Receive time value on every step and its corresponding processing
@@ -1003,13 +1522,16 @@ class SDBWidget(QWidget):
         Counting runtimes using saved time values and printing result info.
         """
 
-        if EVALUATION_TYPES[proc_op_dict['current_eval']]:
+        if (
+                EVALUATION_TYPES[proc_op_dict['current_eval']]
+                or 'comparison' in result_dict
+        ):
             print_eval_type = (
                 'Evaluated using predicted values that was generated from '
                 'recalculation of depth prediction using the existing model'
                 ' and test data'
             )
-        elif not EVALUATION_TYPES[proc_op_dict['current_eval']]:
+        else:
             print_eval_type = (
                 'Evaluated using predicted values that was generated from '
                 'point samples of the existing predicted values'
@@ -1018,6 +1540,18 @@ class SDBWidget(QWidget):
         print_selection_info = (
             f'Parallel Backend:\t{proc_op_dict["backend"]}\n'
             f'Processing Cores:\t{proc_op_dict["n_jobs"]}\n'
+        )
+        if proc_op_dict['backend'] == 'dask':
+            print_selection_info += (
+                'Dask Scheduler:\t'
+                f'{proc_op_dict["dask_scheduler"] or "Local Cluster"}\n'
+            )
+        print_selection_info += (
+            f'RF Inference Engine:\t{proc_op_dict["rf_engine"]}\n'
+            f'{uncertainty_info(result_dict)}'
+            f'Precision:\t\t{proc_op_dict["precision"]}\n'
+            f'{self._waterMaskInfo(result_dict)}'
+            f'{derived_info()}'
             f'Train Data Selection:\t{proc_op_dict["current_selection"]}\n'
         )
         parameters = proc_op_dict['selection'][proc_op_dict['current_selection']]
@@ -1058,11 +1592,53 @@ class SDBWidget(QWidget):
         time_diff = time_array[1:] - time_array[:-1]
         runtime = np.append(time_diff, time_list[-1] - time_list[0])
 
+        if 'comparison' in end_results:
+            comparison = end_results['comparison'].copy()
+            comparison['model'] = comparison['model'].map(acronym)
+            print_comparison_info = (
+                'Model Comparison:\t'
+                'Evaluated using recalculation from test data\n'
+                f'{comparison.round(3).to_string(index=False)}\n'
+                f'Predicted:\t\t{", ".join(end_results["compared_predictions"])}\n\n'
+            )
+            step_names = [
+                'Clipping', 'Filtering', 'Splitting', 'Comparing', 'Predicting'
+            ]
+        else:
+            print_comparison_info = ''
+            step_names = [
+                'Clipping', 'Filtering', 'Splitting', 'Modeling', 'Evaluation'
+            ]
+
+        print_runtime_info = ''
+        for step_name, step_runtime in zip(step_names, runtime):
+            print_runtime_info += f'{step_name} Runtime:\t{step_runtime}\n'
+        print_runtime_info += f'Overall Runtime:\t{runtime[-1]}\n'
+
+        if 'leaderboard' in end_results:
+            search_info = end_results['search']
+            print_search_info = (
+                f'Parameter Search:\t{search_info["type"]} '
+                f'({search_info["cv"]}-fold cross validation, '
+                f'{end_results["leaderboard"].shape[0]} candidates)\n'
+                f'{end_results["leaderboard"].head(10).to_string(index=False)}\n'
+                f'Search Runtime:\t{end_results["search_runtime"]}\n\n'
+            )
+            self.saveSettings()
+        else:
+            print_search_info = ''
+
+        if 'model_fit' in end_results:
+            print_model_fit = f'Model Fit:\t\t{end_results["model_fit"]}\n'
+        else:
+            print_model_fit = ''
+
         global print_result_info
         print_result_info = (
             f'Software Version:\t{SDB_GUI_VERSION}\n\n'
             f'Image Input:\t\t{Path(self.imglocList.toPlainText())} '
             f'({round(self.img_size / 2**20, 2)} MiB)\n'
+            f'{working_resolution_info()}'
             f'Sample Data:\t\t{Path(self.samplelocList.toPlainText())} '
             f'({round(sample_size / 2**20, 2)} MiB)\n'
             f'Selected Header:\t{self.depthHeaderCB.currentText()}\n'
@@ -1078,30 +1654,124 @@ class SDBWidget(QWidget):
             f'({round(train_size_percent, 2)} % of used sample)\n'
             f'Test Data:\t\t{end_results["test"].shape[0]} points '
             f'({round((100 - train_size_percent), 2)} % of used sample)\n\n'
-            f'Method:\t\t{self.methodCB.currentText()}\n'
+            f'{print_comparison_info}'
+            f'Method:\t\t{end_results.get("method", self.methodCB.currentText())}\n'
+            f'{print_model_fit}'
             f'{print_parameters_info}\n'
+            f'{print_search_info}'
             f'{print_eval_type}\n'
             f'RMSE:\t\t{round(rmse, 3)}\n'
             f'MAE:\t\t{round(mae, 3)}\n'
             f'R\u00B2:\t\t{round(r2, 3)}\n\n'
+            f'{accuracy_info(end_results)}'
             f'{print_selection_info}\n'
-            f'Clipping Runtime:\t{runtime[0]}\n'
-            f'Filtering Runtime:\t{runtime[1]}\n'
-            f'Splitting Runtime:\t{runtime[2]}\n'
-            f'Modeling Runtime:\t{runtime[3]}\n'
-            f'Evaluation Runtime:\t{runtime[4]}\n'
-            f'Overall Runtime:\t{runtime[5]}\n\n'
+            f'{print_runtime_info}\n'
+            f'CRS:\t\t{daz_predict.rio.crs}\n'
+            f'Dimensions:\t\t{daz_predict.rio.width} x '
+            f'{daz_predict.rio.height} pixels\n'
+            f'Pixel Size:\t\t{abs(daz_predict.rio.resolution()[0])} , '
+            f'{abs(daz_predict.rio.resolution()[1])}\n'
+            'Min/Max:\t\t'
+            f'{np.nanmin(daz_predict.values[0]):.2f}/'
+            f'{np.nanmax(daz_predict.values[0]):.2f}\n\n'
+        )
+
+        self.resultText.setText(print_result_info)
+        self._showQuicklook(end_results)
+
+
+    def _showQuicklook(self, results: Dict[str, Any]) -> None:
+        """
+        Showing colour-mapped depth prediction under result information
+        """
+
+        if 'quicklook' not in results:
+            return
+
+        rgba = np.ascontiguousarray(results['quicklook'])
+        height, width = rgba.shape[:2]
+        image = QImage(
+            rgba.data, width, height, 4 * width, QImage.Format_RGBA8888
+        ).copy()
+
+        self.resultText.document().addResource(
+            QTextDocument.ImageResource, QUrl('quicklook://dem'), image
+        )
+        self.resultText.append(
+            f'<img src="quicklook://dem" width="{min(width, QUICKLOOK_SIZE)}">'
+        )
+
+
+    def _waterMaskInfo(self, results: Dict[str, Any]) -> str:
+        """
+        Printing water mask bands, threshold, and water percentage
+        """
+
+        if 'water_mask' not in results:
+            return 'Water Mask:\t\tDisabled\n'
+
+        water_options = proc_op_dict['water_mask']
+        threshold_type = 'Otsu' if water_options['otsu'] else 'Fixed'
+        water_percent = np.nanmean(results['water_mask'].values) * 100
+
+        return (
+            f'Water Mask:\t\tBand {water_options["green_band"]} and '
+            f'Band {water_options["ir_band"]}\n'
+            f'Water Threshold:\t{results["water_threshold"]:.3f} '
+            f'({threshold_type})\n'
+            f'Water Pixels:\t\t{water_percent:.2f}%\n'
+        )
+
+
+    def _applyResults(self, result_dict: Dict[str, Any]) -> None:
+        """
+        Recieve depth prediction from a saved model and printing
+        the model metadata and result info.
+        """
+
+        global end_results
+        end_results = result_dict
+
+        daz_predict = end_results['daz_predict']
+        metadata = end_results['model_metadata']
+
+        print_metadata_info = ''
+        for key, value in metadata.get('parameters', {}).items():
+            print_metadata_info += f'{to_title(key)}:\t\t{value}\n'
+        for key, value in metadata.get('metrics', {}).items():
+            print_metadata_info += f'Test {key.upper()}:\t\t{round(value, 3)}\n'
+
+        time_array = np.array(time_list)
+        runtime = time_array[1:] - time_array[:-1]
+
+        global print_result_info
+        print_result_info = (
+            f'Software Version:\t{SDB_GUI_VERSION}\n\n'
+            f'Image Input:\t\t{Path(self.imglocList.toPlainText())} '
+            f'({round(self.img_size / 2**20, 2)} MiB)\n'
+            f'Model Input:\t\t{self.model_loc}\n'
+            f'Model Created:\t\t{metadata.get("created")}\n'
+            f'Trained Image:\t\t{metadata.get("image")}\n'
+            f'Trained Sensor:\t\t{metadata.get("sensor")}\n'
+            f'Image Sensor:\t\t{end_results["image_sensor"]}\n'
+            f'Bands:\t\t{", ".join(metadata.get("bands", []))}\n\n'
+            f'Method:\t\t{metadata.get("method")}\n'
+            f'{print_metadata_info}\n'
+            f'{self._waterMaskInfo(end_results)}\n'
+            f'Prediction Runtime:\t{runtime[0]}\n'
+            f'Overall Runtime:\t{time_list[-1] - time_list[0]}\n\n'
             f'CRS:\t\t{daz_predict.rio.crs}\n'
             f'Dimensions:\t\t{daz_predict.rio.width} x '
             f'{daz_predict.rio.height} pixels\n'
             f'Pixel Size:\t\t{abs(daz_predict.rio.resolution()[0])} , '
             f'{abs(daz_predict.rio.resolution()[1])}\n'
             'Min/Max:\t\t'
-            f'{daz_predict.values[0].min():.2f}/'
-            f'{daz_predict.values[0].max():.2f}\n\n'
+            f'{np.nanmin(daz_predict.values[0]):.2f}/'
+            f'{np.nanmax(daz_predict.values[0]):.2f}\n\n'
         )
 
         self.resultText.setText(print_result_info)
+        self._showQuicklook(end_results)
 
 
     def _stopProcess(self):
@@ -1239,8 +1909,33 @@ class SDBWidget(QWidget):
                 'filter': {
                     'disable': self.medianFilterCheckBox.isChecked(),
                     'size': self.medianFilterSB.value(),
+                    'method': self.medianMethodCB.currentText(),
+                },
+                'fill': {
+                    'enabled': self.fillGapsCheckBox.isChecked(),
+                    'max_hole_size': self.fillSizeSB.value(),
+                    'method': self.fillMethodCB.currentText(),
+                },
+                'residual': {
+                    'save': self.residualCheckBox.isChecked(),
+                    'radius': self.residualRadiusDSB.value(),
+                },
+                'reproject': {
+                    'enabled': self.reprojectCheckBox.isChecked(),
+                    'crs': self.targetCrsLE.text(),
+                    'resolution': self.targetResolutionDSB.value(),
+                    'resampling': self.resamplingCB.currentText(),
+                    'extent': self.targetExtentLE.text(),
+                },
+                'contour': {
+                    'save': self.contourCheckBox.isChecked(),
+                    'levels': self.contourLevelsLE.text(),
+                    'format': self.contourFormatCB.currentText(),
                 },
                 'scatter_plot': self.scatterPlotCheckBox.isChecked(),
+                'scatter_mode': self.scatterModeCB.currentText(),
+                'model': self.saveModelCheckBox.isChecked(),
+                'water_mask': self.waterMaskBandCheckBox.isChecked(),
                 'train_test': {
                     'save': self.trainTestDataCheckBox.isChecked(),
                     'format': self.trainTestFormatCB.currentText(),
@@ -1314,30 +2009,142 @@ class SDBWidget(QWidget):
         grid.addWidget(self.medianFilterCheckBox, row, 3, 1, 2)
 
         row += 1
-        saveFileButton = QPushButton('Save File Location')
-        saveFileButton.clicked.connect(
-            lambda:self.fileDialog(
-                command=QFileDialog.getSaveFileName,
-                window_text='Save File',
-                file_type=self.dataTypeCB.currentText(),
-                text_browser=self.savelocList
-            )
-        )
-        grid.addWidget(saveFileButton, row, 1, 1, 4)
+        medianMethodLabel = QLabel('Median Filter Method:')
+        grid.addWidget(medianMethodLabel, row, 1, 1, 1)
+
+        self.medianMethodCB = QComboBox()
+        self.medianMethodCB.addItems(list(MEDIAN_METHODS.keys()))
+        self.medianMethodCB.setCurrentText(save_set['filter']['method'])
+        grid.addWidget(self.medianMethodCB, row, 2, 1, 1)
 
         row += 1
-        locLabel = QLabel('Location:')
-        grid.addWidget(locLabel, row, 1, 1, 4)
+        self.fillGapsCheckBox = QCheckBox('Fill Gaps up to')
+        self.fillGapsCheckBox.setChecked(save_set['fill']['enabled'])
+        grid.addWidget(self.fillGapsCheckBox, row, 1, 1, 1)
+
+        self.fillSizeSB = QSpinBox()
+        self.fillSizeSB.setRange(1, 1000000)
+        self.fillSizeSB.setValue(save_set['fill']['max_hole_size'])
+        self.fillSizeSB.setSuffix(' pixels')
+        self.fillSizeSB.setAlignment(Qt.AlignRight)
+        grid.addWidget(self.fillSizeSB, row, 2, 1, 1)
+
+        self.fillMethodCB = QComboBox()
+        self.fillMethodCB.addItems(list(FILL_METHODS.keys()))
+        self.fillMethodCB.setCurrentText(save_set['fill']['method'])
+        grid.addWidget(self.fillMethodCB, row, 3, 1, 2)
 
         row += 1
-        self.savelocList = QTextBrowser()
-        grid.addWidget(self.savelocList, row, 1, 1, 4)
+        self.reprojectCheckBox = QCheckBox('Reproject to')
+        self.reprojectCheckBox.setChecked(save_set['reproject']['enabled'])
+        grid.addWidget(self.reprojectCheckBox, row, 1, 1, 1)
+
+        self.targetCrsLE = QLineEdit(save_set['reproject']['crs'])
+        self.targetCrsLE.setPlaceholderText('Image CRS, e.g. EPSG:32748')
+        grid.addWidget(self.targetCrsLE, row, 2, 1, 1)
+
+        self.targetResolutionDSB = QDoubleSpinBox()
+        self.targetResolutionDSB.setRange(0.0, 1000000.0)
+        self.targetResolutionDSB.setDecimals(6)
+        self.targetResolutionDSB.setSpecialValueText('Auto Resolution')
+        self.targetResolutionDSB.setValue(
+            save_set['reproject']['resolution']
+        )
+        self.targetResolutionDSB.setAlignment(Qt.AlignRight)
+        grid.addWidget(self.targetResolutionDSB, row, 3, 1, 1)
+
+        self.resamplingCB = QComboBox()
+        self.resamplingCB.addItems(list(RESAMPLING_METHODS.keys()))
+        self.resamplingCB.setCurrentText(save_set['reproject']['resampling'])
+        grid.addWidget(self.resamplingCB, row, 4, 1, 1)
+
+        row += 1
+        targetExtentLabel = QLabel('Extent:')
+        grid.addWidget(targetExtentLabel, row, 1, 1, 1)
+
+        self.targetExtentLE = QLineEdit(save_set['reproject']['extent'])
+        self.targetExtentLE.setPlaceholderText(
+            'Whole image, or left, bottom, right, top in target CRS'
+        )
+        grid.addWidget(self.targetExtentLE, row, 2, 1, 3)
+
+        row += 1
+        self.residualCheckBox = QCheckBox('Save Residual Surface within')
+        self.residualCheckBox.setChecked(save_set['residual']['save'])
+        grid.addWidget(self.residualCheckBox, row, 1, 1, 1)
+
+        self.residualRadiusDSB = QDoubleSpinBox()
+        self.residualRadiusDSB.setRange(0.01, 1000000.0)
+        self.residualRadiusDSB.setDecimals(2)
+        self.residualRadiusDSB.setValue(save_set['residual']['radius'])
+        self.residualRadiusDSB.setAlignment(Qt.AlignRight)
+        self.residualRadiusDSB.setToolTip(
+            'Search radius for test points in image CRS units (e.g. meters)'
+        )
+        grid.addWidget(self.residualRadiusDSB, row, 2, 1, 1)
+
+        residualLabel = QLabel('CRS units')
+        grid.addWidget(residualLabel, row, 3, 1, 2)
+
+        row += 1
+        self.contourCheckBox = QCheckBox('Save Contours at')
+        self.contourCheckBox.setChecked(save_set['contour']['save'])
+        grid.addWidget(self.contourCheckBox, row, 1, 1, 1)
+
+        self.contourLevelsLE = QLineEdit(save_set['contour']['levels'])
+        self.contourLevelsLE.setToolTip(
+            'Comma separated depths in the save depth direction'
+        )
+        grid.addWidget(self.contourLevelsLE, row, 2, 1, 1)
+
+        self.contourFormatCB = QComboBox()
+        self.contourFormatCB.addItems(list(CONTOUR_FORMATS.keys()))
+        self.contourFormatCB.setCurrentText(save_set['contour']['format'])
+        grid.addWidget(self.contourFormatCB, row, 3, 1, 2)
+
+        row += 1
+        saveFileButton = QPushButton('Save File Location')
+        saveFileButton.clicked.connect(
+            lambda:self.fileDialog(
+                command=QFileDialog.getSaveFileName,
+                window_text='Save File',
+                file_type=self.dataTypeCB.currentText(),
+                text_browser=self.savelocList
+            )
+        )
+        grid.addWidget(saveFileButton, row, 1, 1, 4)
+
+        row += 1
+        locLabel = QLabel('Location:')
+        grid.addWidget(locLabel, row, 1, 1, 4)
+
+        row += 1
+        self.savelocList = QTextBrowser()
+        grid.addWidget(self.savelocList, row, 1, 1, 4)
 
         row += 1
         self.scatterPlotCheckBox = QCheckBox('Save Scatter Plot')
         self.scatterPlotCheckBox.setChecked(save_set['scatter_plot'])
         grid.addWidget(self.scatterPlotCheckBox, row, 1, 1, 2)
 
+        self.saveModelCheckBox = QCheckBox('Save Model')
+        self.saveModelCheckBox.setChecked(save_set['model'])
+        grid.addWidget(self.saveModelCheckBox, row, 3, 1, 2)
+
+        row += 1
+        scatterModeLabel = QLabel('Scatter Plot Type:')
+        grid.addWidget(scatterModeLabel, row, 1, 1, 1)
+
+        self.scatterModeCB = QComboBox()
+        self.scatterModeCB.addItems(list(SCATTER_MODES.keys()))
+        self.scatterModeCB.setCurrentText(save_set['scatter_mode'])
+        grid.addWidget(self.scatterModeCB, row, 2, 1, 1)
+
+        row += 1
+        self.waterMaskBandCheckBox = QCheckBox('Save Water Mask')
+        self.waterMaskBandCheckBox.setChecked(save_set['water_mask'])
+        grid.addWidget(self.waterMaskBandCheckBox, row, 1, 1, 4)
+
         row += 1
         self.trainTestDataCheckBox = QCheckBox('Save Training and Testing Data in')
         self.trainTestDataCheckBox.setChecked(save_set['train_test']['save'])
@@ -1376,127 +2183,29 @@ class SDBWidget(QWidget):
 
     def _saveAction(self):
         """
-        Saving predicted depth, training and testing data, and/or report into file.
-        Applying median filter (or not) to the predicted depth array before saving.
+        Checking save options and sending them with the processing results
+        to SaveProcess class, which post processes predicted depth and saves
+        it, training and testing data, and/or report in the background.
         """
 
         try:
-            daz_filtered = end_results['daz_predict'].copy()
-
-            if not self.medianFilterCheckBox.isChecked():
-                print_filter_info = (
-                    f'Median Filter Size:\t{self.medianFilterSB.value()}'
-                )
-
-                daz_filtered.values[0] = sdb.median_filter(
-                    daz_filtered.values[0],
-                    filter_size=self.medianFilterSB.value()
-                )
-                daz_filtered.band_name.values[0] = 'filtered'
-            else:
-                print_filter_info = 'Median Filter Size:\tDisabled'
-
-            daz_filtered.values[0] = sdb.out_depth_filter(
-                array=daz_filtered.values[0],
-                top_limit=self.saveLimitADSB.value(),
-                bottom_limit=self.saveLimitBDSB.value()
-            )
-
-            train_df_copy = end_results['train'].copy()
-            test_df_copy = end_results['test'].copy()
-
-            if DEPTH_DIRECTION[self.depthDirectionSaveCB.currentText()][1]:
-                daz_filtered.values[0] *=-1
-                test_df_copy['z'] *=-1
-                test_df_copy['z_validate'] *=-1
-                train_df_copy['z'] *=-1
-
             if not self.savelocList.toPlainText():
                 raise ValueError('empty save location')
 
-            save_loc = Path(self.savelocList.toPlainText())
-
-            if self.saveDEMCheckBox.isChecked():
-                sdb.write_geotiff(
-                    daz_filtered,
-                    save_loc
-                )
-                new_img_size = Path(save_loc).stat().st_size
-                print_dem_info = (
-                    f'{print_filter_info}\n\n'
-                    f'DEM Output:\t\t{save_loc} '
-                    f'({round(new_img_size / 2**10 / 2**10, 2)} MiB)\n'
-                )
-                logger.info(
-                    f'DEM with the size of {new_img_size} B has been saved'
-                )
-                logger.debug(f'DEM location: {save_loc}')
-            elif not self.saveDEMCheckBox.isChecked():
-                print_dem_info = (
-                    'DEM Output:\t\tNot Saved\n'
-                )
-
-            if self.trainTestDataCheckBox.isChecked():
-                print_train_test_info = self._trainTestSave(
-                    train_data=train_df_copy,
-                    test_data=test_df_copy,
-                    save_location=save_loc,
-                    data_format=self.trainTestFormatCB.currentText(),
-                    split=TRAIN_TEST_SAVE[self.trainTestFormatCB.currentText()],
-                )
-
-                logger.info(
-                    f'splitted train and test data with {
-                        self.trainTestFormatCB.currentText()
-                    } format has been saved'
-                )
-            elif not self.trainTestDataCheckBox.isChecked():
-                print_train_test_info = (
-                    'Train dna Test Data Output:\tNot Saved\n'
-                )
-
-            if self.scatterPlotCheckBox.isChecked():
-                scatter_plot_loc = Path(save_loc).with_name(
-                    f'{Path(save_loc).stem}_scatter_plot.png'
-                )
-                scatter_plot = sdb.scatter_plotter(
-                    true_val=test_df_copy['z'],
-                    pred_val=test_df_copy['z_validate'],
-                    title=self.methodCB.currentText()
-                )
-                scatter_plot[0].savefig(scatter_plot_loc)
-
-                scatter_plot_size = Path(scatter_plot_loc).stat().st_size
+            if (
+                    not self.medianFilterCheckBox.isChecked()
+                    and self.medianFilterSB.value() % 2 == 0
+            ):
+                raise ValueError('Allowed value: >= 3 and odd numbers')
 
-                print_scatter_plot_info = (
-                    f'Scatter Plot:\t{scatter_plot_loc} '
-                    f'({round(scatter_plot_size / 2**10, 2)} KiB)\n'
-                )
-                logger.info('scatter plot has been saved')
-                logger.debug(f'scatter plot location: {scatter_plot_loc}')
-            elif not self.scatterPlotCheckBox.isChecked():
-                print_scatter_plot_info = 'Scatter Plot:\t\tNotSaved\n'
-
-            self.resultText.append(print_dem_info)
-            self.resultText.append(print_train_test_info)
-            self.resultText.append(print_scatter_plot_info)
-
-            if self.reportCheckBox.isChecked():
-                report_save_loc = Path(save_loc).with_name(
-                    f'{Path(save_loc).stem}_report.txt'
-                )
-                report = open(report_save_loc, 'w')
+            target_grid = self._targetGrid()
 
-                report.write(
-                    print_result_info +
-                    print_dem_info +
-                    print_train_test_info +
-                    print_scatter_plot_info
-                )
-                logger.info('report has been saved')
-                logger.debug(f'report location: {report_save_loc}')
+            if self.contourCheckBox.isChecked():
+                contour_levels = self._contourLevels()
+            else:
+                contour_levels = None
         except ValueError as e:
-            if 'Allowed value: >= 3 or odd numbers' in str(e):
+            if 'Allowed value: >= 3 and odd numbers' in str(e):
                 self.saveOptionDialog.close()
                 self._warningWithoutClear(
                     'Please insert odd number on filter size!'
@@ -1508,87 +2217,110 @@ class SDBWidget(QWidget):
                     'Please insert save location!'
                 )
                 self._saveOptionWindow()
+            elif 'invalid target grid' in str(e):
+                self.saveOptionDialog.close()
+                self._warningWithoutClear(
+                    'Please insert a valid CRS and extent '
+                    '(left, bottom, right, top) to reproject!'
+                )
+                self._saveOptionWindow()
+            elif 'invalid contour levels' in str(e):
+                self.saveOptionDialog.close()
+                self._warningWithoutClear(
+                    'Please insert comma separated numbers on contour levels!'
+                )
+                self._saveOptionWindow()
+            return None
 
+        save_loc = Path(self.savelocList.toPlainText())
+        method = self.methodCB.currentText()
 
-    def _trainTestSave(
-        self,
-        train_data: pd.DataFrame,
-        test_data: pd.DataFrame,
-        save_location: Path | str,
-        data_format: str,
-        split: bool,
-    ) -> str:
+        # Closing the dialog stores the save options in save_set
+        self.saveOptionDialog.close()
+
+        logger.info(f'saving results: {save_loc}')
+        self.saveProcess = SaveProcess(
+            results=end_results,
+            result_info=print_result_info,
+            save_loc=save_loc,
+            method=method,
+            target_grid=target_grid,
+            contour_levels=contour_levels
+        )
+        self.saveProcess.thread_signal.connect(self._saveResults)
+        self.saveProcess.warning_without_clear.connect(self._warningWithoutClear)
+        self.saveProcess.start()
+
+
+    def _saveResults(self, save_info: Dict[str, str]) -> None:
         """
-        Saving splitted train and test data into file
-        and returning the print info to be shown in result text browser.
+        Recieve saved output info from SaveProcess and showing it
+        in result text browser
         """
 
-        if split:
-            train_save_loc = Path(save_location).with_name(
-                f'{Path(save_location).stem}_train{data_format}'
-            )
-            test_save_loc = Path(save_location).with_name(
-                f'{Path(save_location).stem}_test{data_format}'
-            )
-            if data_format == '.csv':
-                train_data.to_csv(train_save_loc, index=False)
-                test_data.to_csv(test_save_loc, index=False)
-            elif data_format == '.shp':
-                sdb.write_shapefile(
-                    train_data,
-                    train_save_loc,
-                    x_col_name='x',
-                    y_col_name='y',
-                    crs=end_results['sample_gdf'].crs
-                )
-                sdb.write_shapefile(
-                    test_data,
-                    test_save_loc,
-                    x_col_name='x',
-                    y_col_name='y',
-                    crs=end_results['sample_gdf'].crs
-                )
+        for print_info in save_info.values():
+            self.resultText.append(print_info)
 
-            train_data_size = Path(train_save_loc).stat().st_size
-            test_data_size = Path(test_save_loc).stat().st_size
-            print_info = (
-                f'Train Data Output:\t{train_save_loc} '
-                f'{round(train_data_size / 2**10 / 2**10, 2)} MiB\n'
-                f'Test Data output:\t{test_save_loc} '
-                f'{round(test_data_size / 2**10 / 2**10, 2)} MiB\n'
-            )
-            logger.debug(f'train data location: {train_save_loc}')
-            logger.debug(f'test data location: {test_save_loc}')
-        else:
-            merge_data_loc = Path(save_location).with_name(
-                f'{Path(save_location).stem}_splitted_data{data_format}'
-            )
-            if data_format =='.gpkg':
-                sdb.write_shapefile(
-                    train_data,
-                    merge_data_loc,
-                    x_col_name='x',
-                    y_col_name='y',
-                    crs=end_results['sample_gdf'].crs,
-                    layer='train_data'
-                )
-                sdb.write_shapefile(
-                    test_data,
-                    merge_data_loc,
-                    x_col_name='x',
-                    y_col_name='y',
-                    crs=end_results['sample_gdf'].crs,
-                    layer='test_data'
-                )
 
-            train_test_data_size = Path(merge_data_loc).stat().st_size
-            print_info = (
-                f'Train and Test Data Output:\t{merge_data_loc} '
-                f'{round(train_test_data_size / 2**10 / 2**10, 2)} MiB\n'
-            )
-            logger.debug(f'train & test data location: {merge_data_loc}')
+    def _targetGrid(self) -> Dict[str, Any]:
+        """
+        Reprojection parameters of the saved rasters from save options,
+        empty if reprojection is disabled
+        """
 
-        return print_info
+        if not self.reprojectCheckBox.isChecked():
+            return {}
+
+        target_grid = {
+            'resampling': RESAMPLING_METHODS[self.resamplingCB.currentText()],
+            'n_jobs': proc_op_dict['n_jobs'],
+        }
+
+        try:
+            if self.targetCrsLE.text().strip():
+                target_grid['crs'] = CRS.from_user_input(
+                    self.targetCrsLE.text().strip()
+                ).to_string()
+
+            if self.targetExtentLE.text().strip():
+                extent = [
+                    float(value)
+                    for value in self.targetExtentLE.text().split(',')
+                ]
+                if (
+                        len(extent) != 4
+                        or extent[0] >= extent[2]
+                        or extent[1] >= extent[3]
+                ):
+                    raise ValueError
+                target_grid['bounds'] = extent
+        except (CRSError, ValueError):
+            raise ValueError('invalid target grid')
+
+        if self.targetResolutionDSB.value() > 0:
+            target_grid['resolution'] = self.targetResolutionDSB.value()
+
+        return target_grid
+
+
+    def _contourLevels(self) -> List[float]:
+        """
+        Depth contour levels from save options
+        """
+
+        try:
+            levels = [
+                float(level)
+                for level in self.contourLevelsLE.text().split(',')
+                if level.strip()
+            ]
+        except ValueError:
+            raise ValueError('invalid contour levels')
+
+        if not levels:
+            raise ValueError('invalid contour levels')
+
+        return levels
 
 
     def _getDEMExtension(self, text: str) -> str:
@@ -1685,6 +2417,8 @@ class Process(QThread):
         self.train_select = input_dict['train_select']
         self.selection = input_dict['selection']
         self.eval_type = input_dict['eval_type']
+        self.search = input_dict['search']
+        self.compare = input_dict['compare']
 
 
     def preprocess(self):
@@ -1720,6 +2454,20 @@ class Process(QThread):
             lower_limit=self.limit_b_value
         )
 
+        if proc_op_dict['working_resolution'] > 1:
+            logger.debug('average depth samples in working resolution pixels')
+            if self.train_select == SELECTION_TYPES['ATTRIBUTE']:
+                group_header = self.selection['header']
+            else:
+                group_header = None
+
+            depth_filtered_sample = sdb.aggregate_samples(
+                raster=image_raw,
+                vector=depth_filtered_sample,
+                header=self.depth_label,
+                group_header=group_header
+            )
+
         if not self._is_running:
             return None
 
@@ -1733,7 +2481,8 @@ class Process(QThread):
                 vector=depth_filtered_sample,
                 header=self.depth_label,
                 train_size=self.selection['train_size'],
-                random_state=self.selection['random_state']
+                random_state=self.selection['random_state'],
+                dtype=PRECISION[proc_op_dict['precision']]
             )
         elif self.train_select == SELECTION_TYPES['ATTRIBUTE']:
             f_train, f_test, z_train, z_test = sdb.split_attribute(
@@ -1741,7 +2490,8 @@ class Process(QThread):
                 vector=depth_filtered_sample,
                 depth_header=self.depth_label,
                 split_header=self.selection['header'],
-                group_name=self.selection['group']
+                group_name=self.selection['group'],
+                dtype=PRECISION[proc_op_dict['precision']]
             )
 
         results = {
@@ -1775,7 +2525,9 @@ class Process(QThread):
         split_list = [time_split, 'Modeling...\n']
         self.time_signal.emit(split_list)
 
-        model_parameters = option_pool['method'][method]['model_parameters']
+        model_parameters = self.modelParameters(method, results)
+        if model_parameters is None or not self._is_running:
+            return None
         logger.info(f'model parameters: {model_parameters}')
 
         global print_parameters_info
@@ -1792,29 +2544,239 @@ class Process(QThread):
             logger.debug('using prediction data to later use against z_test')
             f_test = None
 
-        z_predict, z_validate = sdb.prediction(
-            model=method,
-            unraveled_band=bands_df,
-            features_train=results['f_train'].drop(columns=['x', 'y']),
-            label_train=results['z_train'],
-            features_test=f_test,
-            backend=proc_op_dict['backend'],
-            n_jobs=proc_op_dict['n_jobs'],
-            **model_parameters
+        regressor, model_fit = self.sessionRegressor(
+            method, model_parameters, results
         )
 
         if not self._is_running:
             return None
 
-        results.update({
+        # Test data is part of the key, z_validate depends on it
+        predict_key = joblib.hash((
+            proc_op_dict['uncertainty'],
+            proc_op_dict['rf_engine'],
+            proc_op_dict['water_mask'],
+            self.eval_type,
+            results['f_test'],
+            results['z_test'],
+        ))
+        if (
+                model_fit == 'Reused'
+                and model_session.get('predict_key') == predict_key
+        ):
+            logger.info('reuse previous prediction of unchanged model')
+            results.update({
+                'regressor': regressor,
+                'model_parameters': dict(model_parameters),
+                'model_fit': model_fit,
+                **model_session['predictions']
+            })
+            return results
+
+        water = scene_water_mask()
+        mask = water['water_mask'].values if water else None
+
+        daz_uncertainty = None
+        uncertainty = UNCERTAINTY_TYPES[proc_op_dict['uncertainty']]
+        if uncertainty is not None and method == 'Random Forest':
+            logger.info(f'predict depth and {uncertainty} uncertainty')
+            if (
+                    proc_op_dict['backend'] != 'threading'
+                    or RF_ENGINES[proc_op_dict['rf_engine']]
+            ):
+                logger.warning(
+                    'uncertainty is predicted by scikit-learn on local '
+                    'threads, ignoring the backend and RF inference engine'
+                )
+            z_predict, z_uncertainty = sdb.predict_uncertainty(
+                regressor=regressor,
+                features=bands_df,
+                method=uncertainty,
+                n_jobs=proc_op_dict['n_jobs'],
+                mask=mask,
+                dtype=PRECISION[proc_op_dict['precision']]
+            )
+            daz_uncertainty = self.predictionDataArray(
+                z_uncertainty
+            ).assign_coords(band_name=('band', ['uncertainty']))
+        else:
+            z_predict = sdb.predict_array(
+                regressor=regressor,
+                features=bands_df,
+                backend=proc_op_dict['backend'],
+                n_jobs=proc_op_dict['n_jobs'],
+                flat_forest=RF_ENGINES[proc_op_dict['rf_engine']],
+                scheduler=proc_op_dict['dask_scheduler'] or None,
+                dtype=PRECISION[proc_op_dict['precision']],
+                mask=mask
+            )
+
+        if f_test is not None:
+            z_validate = sdb.predict_array(
+                regressor=regressor,
+                features=f_test,
+                backend=proc_op_dict['backend'],
+                n_jobs=proc_op_dict['n_jobs'],
+                flat_forest=RF_ENGINES[proc_op_dict['rf_engine']],
+                scheduler=proc_op_dict['dask_scheduler'] or None,
+                dtype=PRECISION[proc_op_dict['precision']]
+            )
+        else:
+            z_validate = None
+
+        if not self._is_running:
+            return None
+
+        predictions = {
             'z_predict': z_predict,
-            'z_validate': z_validate
+            'z_validate': z_validate,
+            **water
+        }
+        if daz_uncertainty is not None:
+            predictions['uncertainty'] = daz_uncertainty
+        model_session.update({
+            'predict_key': predict_key,
+            'predictions': predictions,
+        })
+
+        results.update({
+            'regressor': regressor,
+            'model_parameters': dict(model_parameters),
+            'model_fit': model_fit,
+            **predictions
         })
 
         logger.debug('prediction ended')
         return results
 
 
+    def sessionRegressor(
+            self,
+            method: str,
+            model_parameters: Dict[str, Any],
+            results: Dict[str, Any]
+    ) -> Tuple[Any, str]:
+        """
+        Reusing the last fitted model when train data and parameters
+        are unchanged, adding or removing Random Forest trees when only
+        the number of trees changed, or fitting a new model
+        """
+
+        features_train = results['f_train'].drop(columns=['x', 'y'])
+        derived = derived_parameters()
+        train_key = joblib.hash(
+            (method, derived, features_train, results['z_train'])
+        )
+
+        regressor, model_fit = None, 'Fitted'
+        if model_session.get('train_key') == train_key:
+            if model_session['model_parameters'] == dict(model_parameters):
+                logger.info('reuse previous model')
+                regressor, model_fit = model_session['regressor'], 'Reused'
+            elif method == 'Random Forest':
+                regressor = sdb.warm_start_forest(
+                    regressor=model_session['regressor'],
+                    features_train=features_train,
+                    label_train=results['z_train'],
+                    backend=proc_op_dict['backend'],
+                    n_jobs=proc_op_dict['n_jobs'],
+                    **model_parameters
+                )
+                if regressor is not None:
+                    logger.info('warm start previous Random Forest')
+                    model_fit = 'Warm Started'
+
+        if regressor is None:
+            regressor = sdb.fit_regressor(
+                model=method,
+                features_train=features_train,
+                label_train=results['z_train'],
+                backend=proc_op_dict['backend'],
+                n_jobs=proc_op_dict['n_jobs'],
+                derived=derived,
+                **model_parameters
+            )
+
+        if model_fit != 'Reused':
+            model_session.clear()
+            model_session.update({
+                'train_key': train_key,
+                'model_parameters': dict(model_parameters),
+                'regressor': regressor,
+            })
+
+        return regressor, model_fit
+
+
+    def modelParameters(
+            self,
+            method: str,
+            results: Dict[str, Any]
+    ) -> Dict[str, Any] | None:
+        """
+        Selecting model parameters of the chosen method from method options
+        """
+
+        return option_pool['method'][method]['model_parameters']
+
+
+    def predictionDataArray(self, z_predict: np.ndarray) -> xr.DataArray:
+        """
+        Reshaping depth prediction to raster shape and converting it
+        to dataarray
+        """
+
+        logger.debug('reshape prediction array to raster shape')
+        az_predict = sdb.reshape_prediction(
+            array=z_predict,
+            raster=image_raw
+        )
+
+        logger.debug('convert prediction array to dataarray')
+        daz_predict = sdb.array_to_dataarray(
+            array=az_predict,
+            data_array=image_raw
+        )
+
+        return daz_predict.assign_coords(
+            band_name=('band', ['original'])
+        )
+
+
+    def modelMetadata(
+            self,
+            method: str,
+            parameters: Dict[str, Any],
+            metrics: Dict[str, float]
+    ) -> Dict[str, Any]:
+        """
+        Collecting information needed to apply the model again
+        """
+
+        return {
+            'method': method,
+            'parameters': dict(parameters),
+            'bands': list(bands_df.columns),
+            'image': image_raw.encoding.get('source'),
+            'image_tags': dict(image_raw.attrs),
+            'sensor': image_sensor(image_raw),
+            'crs': str(image_raw.rio.crs),
+            'preprocessing': {
+                'depth_label': self.depth_label,
+                'depth_direction': self.depth_direction,
+                'disable_depth_limit': self.limit_state,
+                'upper_limit': self.limit_a_value,
+                'lower_limit': self.limit_b_value,
+                'train_select': self.train_select,
+                'selection': dict(self.selection),
+                'eval_type': self.eval_type,
+                'derived': derived_parameters(),
+                'working_resolution': proc_op_dict['working_resolution'],
+            },
+            'metrics': metrics,
+        }
+
+
     def run(self):
         """
         Taking pre processed input and chosen method, then 
@@ -1833,21 +2795,8 @@ class Process(QThread):
             model_list = [time_model, 'Evaluating...\n']
             self.time_signal.emit(model_list)
 
-            logger.debug('reshape prediction array to raster shape')
-            az_predict = sdb.reshape_prediction(
-                array=results['z_predict'],
-                raster=image_raw
-            )
-
-            logger.debug('convert prediction array to dataarray')
-            daz_predict = sdb.array_to_dataarray(
-                array=az_predict,
-                data_array=image_raw
-            )
-
-            daz_predict = daz_predict.assign_coords(
-                band_name=('band', ['original'])
-            )
+            daz_predict = self.predictionDataArray(results['z_predict'])
+            results.update(prediction_overviews(daz_predict))
 
             if not EVALUATION_TYPES[self.eval_type]:
                 logger.debug('sampling prediction based on test data coordinates')
@@ -1859,6 +2808,18 @@ class Process(QThread):
                 )
                 results['z_validate'] = dfz_predict['band_1'].to_numpy()
 
+                masked = np.isnan(results['z_validate'])
+                if masked.any():
+                    logger.info(
+                        f'recalculate {masked.sum()} test points outside water mask'
+                    )
+                    z_validate = results['z_validate'].copy()
+                    z_validate[masked] = results['regressor'].predict(
+                        results['f_test'].drop(columns=['x', 'y'])
+                        .to_numpy()[masked]
+                    )
+                    results['z_validate'] = z_validate
+
             logger.info('evaluating prediction')
             rmse, mae, r2 = sdb.evaluate(
                 true_val=results['z_test'],
@@ -1866,6 +2827,19 @@ class Process(QThread):
             )
             logger.info(f'RMSE: {rmse}, MAE: {mae}, R2: {r2}')
 
+            logger.info('calculating accuracy report with bootstrap')
+            accuracy = sdb.accuracy_report(
+                true_val=results['z_test'],
+                pred_val=results['z_validate'],
+                n_jobs=proc_op_dict['n_jobs']
+            )
+
+            model_metadata = self.modelMetadata(
+                method=self.method,
+                parameters=results['model_parameters'],
+                metrics={'rmse': rmse, 'mae': mae, 'r2': r2}
+            )
+
             time_test = datetime.datetime.now()
             test_list = [time_test, 'Done.']
             self.time_signal.emit(test_list)
@@ -1882,8 +2856,10 @@ class Process(QThread):
                 'rmse': rmse,
                 'mae': mae,
                 'r2': r2,
+                'accuracy': accuracy,
                 'train': train_df,
-                'test': test_df
+                'test': test_df,
+                'model_metadata': model_metadata
             })
 
             logger.debug('run ended and sending results')
@@ -1900,6 +2876,9 @@ class Process(QThread):
             self.warning_with_clear.emit(
                 'Please select attribute header and group in Processing Options'
             )
+        except ValueError as e:
+            logger.error(f'processing failed: {e}')
+            self.warning_with_clear.emit(str(e))
 
 
     def stop(self):
@@ -1912,8 +2891,802 @@ class Process(QThread):
 
 
 
-def main():
-
+class SearchProcess(Process):
+    """
+    Searching model parameters using cross validation on the train data
+    and then predicting depth only once using the best parameters.
+    """
+
+
+    def modelParameters(
+            self,
+            method: str,
+            results: Dict[str, Any]
+    ) -> Dict[str, Any] | None:
+        """
+        Searching the best parameters of the chosen method and
+        updating method options with them
+        """
+
+        method_options = option_pool['method'][method]
+
+        logger.info(
+            f'{self.search["type"]} started: '
+            f'{dict(method_options["search_space"])}'
+        )
+        time_start = datetime.datetime.now()
+        best_params, leaderboard = sdb.parameter_search(
+            model=method,
+            features_train=results['f_train'].drop(columns=['x', 'y']),
+            label_train=results['z_train'],
+            param_grid=method_options['search_space'],
+            search=SEARCH_TYPES[self.search['type']],
+            cv=self.search['cv'],
+            n_iter=self.search['n_iter'],
+            backend=proc_op_dict['backend'],
+            n_jobs=proc_op_dict['n_jobs'],
+            derived=derived_parameters(),
+            **method_options['model_parameters']
+        )
+
+        if not self._is_running:
+            return None
+
+        logger.info(f'best parameters: {best_params}')
+        method_options['model_parameters'].update(best_params)
+        results.update({
+            'leaderboard': leaderboard,
+            'search': self.search,
+            'search_runtime': datetime.datetime.now() - time_start,
+        })
+
+        return method_options['model_parameters']
+
+
+
+class CompareProcess(Process):
+    """
+    Preprocessing once, then training and evaluating several methods
+    concurrently on the same train and test data and predicting
+    the whole image only using the selected methods.
+    """
+
+
+    def run(self):
+        """
+        Comparing selected methods and predicting depth
+        using methods that are selected to predict the whole image
+        """
+
+        try:
+            results = self.preprocess()
+
+            if results is None or not self._is_running:
+                return None
+
+            time_split = datetime.datetime.now()
+            self.time_signal.emit([time_split, 'Comparing Models...\n'])
+
+            models = {
+                method: dict(option_pool['method'][method]['model_parameters'])
+                for method in self.compare['models']
+            }
+            f_train = results['f_train'].drop(columns=['x', 'y'])
+            f_test = results['f_test'].drop(columns=['x', 'y'])
+
+            comparison, regressors = sdb.compare_models(
+                models=models,
+                features_train=f_train,
+                label_train=results['z_train'],
+                features_test=f_test,
+                label_test=results['z_test'],
+                backend=proc_op_dict['backend'],
+                n_jobs=proc_op_dict['n_jobs'],
+                derived=derived_parameters()
+            )
+            logger.info(f'model comparison:\n{comparison}')
+
+            if not self._is_running:
+                return None
+
+            time_compare = datetime.datetime.now()
+            self.time_signal.emit([time_compare, 'Predicting...\n'])
+
+            water = scene_water_mask()
+            mask = water['water_mask'].values if water else None
+
+            compared_predictions = {}
+            for method in self.compare['predict']:
+                logger.info(f'prediction started using {method}')
+                z_predict = sdb.predict_array(
+                    regressor=regressors[method],
+                    features=bands_df,
+                    backend=proc_op_dict['backend'],
+                    n_jobs=proc_op_dict['n_jobs'],
+                    flat_forest=RF_ENGINES[proc_op_dict['rf_engine']],
+                    scheduler=proc_op_dict['dask_scheduler'] or None,
+                    dtype=PRECISION[proc_op_dict['precision']],
+                    mask=mask
+                )
+                compared_predictions[method] = self.predictionDataArray(
+                    z_predict
+                )
+
+                if not self._is_running:
+                    return None
+
+            best = comparison[
+                comparison['model'].isin(self.compare['predict'])
+            ].iloc[0]
+            method = best['model']
+
+            global print_parameters_info
+            print_parameters_info = ''
+            for key, value in models[method].items():
+                print_parameters_info += (
+                    f'{to_title(key)}:\t\t{value}\n'
+                )
+
+            time_test = datetime.datetime.now()
+            self.time_signal.emit([time_test, 'Done.'])
+
+            train_df = results['f_train'].copy()
+            train_df['z'] = results['z_train'].copy()
+
+            test_df = results['f_test'].copy()
+            test_df['z'] = results['z_test'].copy()
+            test_df['z_validate'] = regressors[method].predict(f_test.to_numpy())
+
+            metrics = {
+                'rmse': best['rmse'],
+                'mae': best['mae'],
+                'r2': best['r2'],
+            }
+            results.update({
+                'method': method,
+                'regressor': regressors[method],
+                'model_parameters': models[method],
+                'daz_predict': compared_predictions[method],
+                **prediction_overviews(compared_predictions[method]),
+                'train': train_df,
+                'test': test_df,
+                'model_metadata': self.modelMetadata(
+                    method=method,
+                    parameters=models[method],
+                    metrics=metrics
+                ),
+                'comparison': comparison,
+                'compared_predictions': compared_predictions,
+                **water,
+                **metrics
+            })
+
+            logger.debug('comparison ended and sending results')
+            self.thread_signal.emit(results)
+        except NameError:
+            self.warning_with_clear.emit(
+                'No image data loaded. Please load your image data!'
+            )
+        except IndexError:
+            self.warning_with_clear.emit(
+                'Depth sample is out of image boundary'
+            )
+        except KeyError:
+            self.warning_with_clear.emit(
+                'Please select attribute header and group in Processing Options'
+            )
+        except ValueError as e:
+            logger.error(f'processing failed: {e}')
+            self.warning_with_clear.emit(str(e))
+
+
+
+class ApplyModel(QThread):
+    """
+    Applying a saved model to the loaded image in the background
+    without retraining the model.
+    """
+
+    thread_signal = pyqtSignal(dict)
+    time_signal = pyqtSignal(list)
+    warning_with_clear = pyqtSignal(str)
+    warning_without_clear = pyqtSignal(str)
+
+
+    def __init__(self, model_loc: Path):
+
+        QThread.__init__(self)
+
+        self.model_loc = model_loc
+        self._is_running: bool = True
+
+
+    def run(self):
+        """
+        Loading saved model and predicting depth over the unraveled image
+        """
+
+        try:
+            time_start = datetime.datetime.now()
+            self.time_signal.emit([time_start, 'Applying Model...\n'])
+
+            model = sdb.load_model(self.model_loc)
+
+            trained_sensor = model[1].get('sensor')
+            sensor = image_sensor(image_raw)
+            if None not in (trained_sensor, sensor) and trained_sensor != sensor:
+                logger.warning(
+                    f'model was trained on {trained_sensor} image, '
+                    f'applying it to {sensor} image'
+                )
+                self.warning_without_clear.emit(
+                    f'The model was trained on a {trained_sensor} image, '
+                    f'but the loaded image is from {sensor}.\n'
+                    'Depth prediction may be unreliable.'
+                )
+
+            # The image is averaged like the training image of the model
+            factor = model[1].get('preprocessing', {}).get(
+                'working_resolution', 1
+            )
+            if factor != proc_op_dict['working_resolution']:
+                logger.warning(
+                    f'model was trained at {factor} x pixel size working '
+                    f'resolution, applying it at the same resolution'
+                )
+                image, bands = working_image(image_native, factor)
+            else:
+                image, bands = image_raw, bands_df
+
+            water = scene_water_mask(image)
+
+            logger.debug('predict depth using saved model')
+            z_predict, metadata = sdb.apply_model(
+                model_loc=self.model_loc,
+                model=model,
+                unraveled_band=bands,
+                backend=proc_op_dict['backend'],
+                n_jobs=proc_op_dict['n_jobs'],
+                flat_forest=RF_ENGINES[proc_op_dict['rf_engine']],
+                scheduler=proc_op_dict['dask_scheduler'] or None,
+                dtype=PRECISION[proc_op_dict['precision']],
+                mask=water['water_mask'].values if water else None
+            )
+
+            if not self._is_running:
+                return None
+
+            time_predict = datetime.datetime.now()
+            self.time_signal.emit([time_predict, 'Reshaping...\n'])
+
+            az_predict = sdb.reshape_prediction(
+                array=z_predict,
+                raster=image
+            )
+            daz_predict = sdb.array_to_dataarray(
+                array=az_predict,
+                data_array=image
+            )
+            daz_predict = daz_predict.assign_coords(
+                band_name=('band', ['original'])
+            )
+
+            time_done = datetime.datetime.now()
+            self.time_signal.emit([time_done, 'Done.'])
+
+            logger.info(f'saved model applied: {metadata.get("method")}')
+            self.thread_signal.emit({
+                'daz_predict': daz_predict,
+                'model_metadata': metadata,
+                'image_sensor': sensor,
+                **prediction_overviews(daz_predict),
+                **water
+            })
+        except NameError:
+            self.warning_with_clear.emit(
+                'No image data loaded. Please load your image data!'
+            )
+        except (ValueError, OSError) as e:
+            logger.error(f'failed to apply model: {e}')
+            self.warning_with_clear.emit(
+                f'Failed to apply model!\n{e}'
+            )
+
+
+    def stop(self):
+        """
+        Stop the processing thread.
+        """
+        self._is_running: bool = False
+        self.quit()
+        self.wait()
+
+
+
+class SaveProcess(QThread):
+    """
+    Saving class of SDB GUI.
+    Post processing predicted depth and saving it with the other outputs
+    in the background so the GUI won't freeze while writing large scenes.
+    """
+
+    thread_signal = pyqtSignal(dict)
+    warning_without_clear = pyqtSignal(str)
+
+
+    def __init__(
+            self,
+            results: Dict[str, Any],
+            result_info: str,
+            save_loc: Path,
+            method: str,
+            target_grid: Dict[str, Any],
+            contour_levels: List[float] | None = None
+    ):
+
+        QThread.__init__(self)
+
+        self.results = results
+        self.result_info = result_info
+        self.save_loc = save_loc
+        self.method = method
+        self.target_grid = target_grid
+        self.contour_levels = contour_levels
+        self.options = copy.deepcopy(save_set)
+
+
+    def run(self):
+        """
+        Saving predicted depth, training and testing data, and/or report
+        into file, then sending the output info to SDBWidget
+        """
+
+        try:
+            save_info = self.save()
+        except (ValueError, OSError) as e:
+            logger.error(f'failed to save results: {e}')
+            self.warning_without_clear.emit(
+                f'Failed to save results!\n{e}'
+            )
+            return None
+
+        self.thread_signal.emit(save_info)
+
+
+    def save(self) -> Dict[str, str]:
+        """
+        Saving predicted depth, training and testing data, and/or report into file.
+        Applying median filter (or not) to the predicted depth array before saving.
+        """
+
+        results = self.results
+        options = self.options
+        save_loc = self.save_loc
+        target_grid = self.target_grid
+
+        if not options['filter']['disable']:
+            print_filter_info = (
+                f'Median Filter Size:\t{options["filter"]["size"]} '
+                f'({options["filter"]["method"]})'
+            )
+        else:
+            print_filter_info = 'Median Filter Size:\tDisabled'
+
+        daz_filtered, daz_filled = self.postprocessDEM(
+            results['daz_predict']
+        )
+
+        if target_grid:
+            print_filter_info += (
+                f'\nReprojection:\t\t'
+                f'{target_grid.get("crs", "Image CRS")} at '
+                f'{target_grid.get("resolution", "auto")} resolution '
+                f'({options["reproject"]["resampling"]})'
+            )
+
+        if daz_filled is not None:
+            print_filter_info += (
+                f'\nGap Filling:\t\t{options["fill"]["method"]} '
+                f'up to {options["fill"]["max_hole_size"]} pixels '
+                f'({int(np.nansum(daz_filled.values))} pixels filled)'
+            )
+
+        trained = 'train' in results
+
+        if trained:
+            train_df_copy = results['train']
+            test_df_copy = results['test']
+
+        if DEPTH_DIRECTION[options['direction']][1]:
+            if trained:
+                # New dataframes sharing the unchanged columns
+                test_df_copy = test_df_copy.assign(
+                    z=-test_df_copy['z'],
+                    z_validate=-test_df_copy['z_validate']
+                )
+                train_df_copy = train_df_copy.assign(
+                    z=-train_df_copy['z']
+                )
+
+        extra_bands = {}
+        if self.contour_levels is not None:
+            print_contour_info = self.saveContours(
+                daz_filtered, save_loc, target_grid.get('crs')
+            )
+        else:
+            print_contour_info = 'Contour Output:\t\tNot Saved\n'
+
+        if 'uncertainty' in results:
+            daz_uncertainty = results['uncertainty'].copy()
+            daz_uncertainty.values[np.isnan(daz_filtered.values)] = np.nan
+            extra_bands['Uncertainty'] = daz_uncertainty
+        if options['water_mask'] and 'water_mask' in results:
+            extra_bands['Water Mask'] = results['water_mask']
+        if daz_filled is not None:
+            extra_bands['Filled Mask'] = daz_filled
+        if options['residual']['save'] and trained:
+            # Residuals in the saved depth direction
+            daz_residual = sdb.array_to_dataarray(
+                sdb.residual_surface(
+                    daz_filtered,
+                    x=test_df_copy['x'],
+                    y=test_df_copy['y'],
+                    residual=(
+                        test_df_copy['z_validate'] - test_df_copy['z']
+                    ),
+                    radius=options['residual']['radius'],
+                    n_jobs=proc_op_dict['n_jobs']
+                ),
+                daz_filtered
+            ).assign_coords(band_name=('band', ['residual']))
+            daz_residual.values[np.isnan(daz_filtered.values)] = np.nan
+            extra_bands['Residual Surface'] = daz_residual
+
+        bands_in_dem = (
+            options['dem']
+            and save_loc.suffix.lower() in ('.tif', '.tiff')
+        )
+
+        # Same decimation factors as the quicklook overview levels
+        if save_loc.suffix.lower() in ('.tif', '.tiff'):
+            overview_factors = results.get('overview_factors')
+        else:
+            overview_factors = None
+
+        if options['dem']:
+            if bands_in_dem:
+                # One file with named bands, written from their buffers
+                sdb.write_multiband(
+                    {'Depth': daz_filtered, **extra_bands},
+                    save_loc,
+                    dtype=PRECISION[proc_op_dict['precision']],
+                    overviews=overview_factors,
+                    band_resampling={
+                        band_name: 'nearest' for band_name in MASK_BANDS
+                    },
+                    **target_grid
+                )
+            else:
+                sdb.write_geotiff(
+                    daz_filtered,
+                    save_loc,
+                    dtype=PRECISION[proc_op_dict['precision']],
+                    overviews=overview_factors,
+                    **target_grid
+                )
+            new_img_size = Path(save_loc).stat().st_size
+            print_dem_info = (
+                f'{print_filter_info}\n\n'
+                f'DEM Output:\t\t{save_loc} '
+                f'({round(new_img_size / 2**10 / 2**10, 2)} MiB)\n'
+            )
+            logger.info(
+                f'DEM with the size of {new_img_size} B has been saved'
+            )
+            logger.debug(f'DEM location: {save_loc}')
+
+            compared = results.get('compared_predictions', {})
+            for method, daz_compared in compared.items():
+                if method == results['method']:
+                    continue
+
+                compared_loc = save_loc.with_name(
+                    f'{save_loc.stem}_{acronym(method)}{save_loc.suffix}'
+                )
+                sdb.write_geotiff(
+                    self.postprocessDEM(daz_compared)[0],
+                    compared_loc,
+                    dtype=PRECISION[proc_op_dict['precision']],
+                    overviews=overview_factors,
+                    **target_grid
+                )
+                compared_size = compared_loc.stat().st_size
+                print_dem_info += (
+                    f'{method} DEM:\t{compared_loc} '
+                    f'({round(compared_size / 2**10 / 2**10, 2)} MiB)\n'
+                )
+                logger.debug(f'{method} DEM location: {compared_loc}')
+        else:
+            print_dem_info = (
+                'DEM Output:\t\tNot Saved\n'
+            )
+
+        for band, (band_name, daz_band) in enumerate(
+                extra_bands.items(), start=2
+        ):
+            if bands_in_dem:
+                print_dem_info += f'{band_name}:\t\tDEM Band {band}\n'
+                continue
+
+            band_loc = save_loc.with_name(
+                f'{save_loc.stem}_{band_name.lower().replace(" ", "_")}'
+                f'{save_loc.suffix}'
+            )
+            band_grid = dict(target_grid)
+            if band_grid and band_name in MASK_BANDS:
+                band_grid['resampling'] = 'nearest'
+
+            sdb.write_geotiff(
+                daz_band,
+                band_loc,
+                dtype=PRECISION[proc_op_dict['precision']],
+                **band_grid
+            )
+            print_dem_info += f'{band_name}:\t\t{band_loc}\n'
+            logger.debug(f'{band_name.lower()} location: {band_loc}')
+
+        if options['train_test']['save'] and trained:
+            print_train_test_info = self.trainTestSave(
+                train_data=train_df_copy,
+                test_data=test_df_copy,
+                save_location=save_loc,
+                data_format=options['train_test']['format'],
+                split=TRAIN_TEST_SAVE[options['train_test']['format']],
+            )
+
+            logger.info(
+                f'splitted train and test data with {
+                    options["train_test"]["format"]
+                } format has been saved'
+            )
+        else:
+            print_train_test_info = (
+                'Train dna Test Data Output:\tNot Saved\n'
+            )
+
+        if options['scatter_plot'] and trained:
+            scatter_plot_loc = Path(save_loc).with_name(
+                f'{Path(save_loc).stem}_scatter_plot.png'
+            )
+            scatter_plot = sdb.scatter_plotter(
+                true_val=test_df_copy['z'],
+                pred_val=test_df_copy['z_validate'],
+                title=self.method,
+                mode=SCATTER_MODES[options['scatter_mode']]
+            )
+            scatter_plot[0].savefig(scatter_plot_loc)
+
+            scatter_plot_size = Path(scatter_plot_loc).stat().st_size
+
+            print_scatter_plot_info = (
+                f'Scatter Plot:\t{scatter_plot_loc} '
+                f'({round(scatter_plot_size / 2**10, 2)} KiB)\n'
+            )
+            logger.info('scatter plot has been saved')
+            logger.debug(f'scatter plot location: {scatter_plot_loc}')
+        else:
+            print_scatter_plot_info = 'Scatter Plot:\t\tNotSaved\n'
+
+        if options['model'] and trained:
+            model_loc = Path(save_loc).with_name(
+                f'{Path(save_loc).stem}_model.joblib'
+            )
+            sdb.save_model(
+                regressor=results['regressor'],
+                model_loc=model_loc,
+                metadata=results['model_metadata']
+            )
+
+            model_size = Path(model_loc).stat().st_size
+
+            print_model_info = (
+                f'Model Output:\t\t{model_loc} '
+                f'({round(model_size / 2**10 / 2**10, 2)} MiB)\n'
+            )
+            logger.info('model has been saved')
+            logger.debug(f'model location: {model_loc}')
+        else:
+            print_model_info = 'Model Output:\t\tNot Saved\n'
+
+        save_info = {
+            'dem': print_dem_info,
+            'contour': print_contour_info,
+            'train_test': print_train_test_info,
+            'scatter_plot': print_scatter_plot_info,
+            'model': print_model_info,
+        }
+
+        if options['report']:
+            report_save_loc = Path(save_loc).with_name(
+                f'{Path(save_loc).stem}_report.txt'
+            )
+            with open(report_save_loc, 'w') as report:
+                report.write(self.result_info + ''.join(save_info.values()))
+            logger.info('report has been saved')
+            logger.debug(f'report location: {report_save_loc}')
+
+        return save_info
+
+    def saveContours(
+            self,
+            daz_filtered: xr.DataArray,
+            save_loc: Path,
+            crs: str | None = None
+    ) -> str:
+        """
+        Extracting depth contours from the saved depth (after filtering and
+        depth direction) and saving them next to the save location,
+        in the target CRS if given
+        """
+
+        levels = self.contour_levels
+
+        contours = sdb.contour_lines(
+            daz_filtered,
+            levels=levels,
+            n_jobs=proc_op_dict['n_jobs']
+        )
+        if crs is not None:
+            contours = contours.to_crs(crs)
+
+        contour_loc = save_loc.with_name(
+            f'{save_loc.stem}_contours'
+            f'{CONTOUR_FORMATS[self.options["contour"]["format"]]}'
+        )
+        try:
+            sdb.write_vector(contours, contour_loc)
+        except ImportError:
+            logger.warning('pyarrow is required to save GeoParquet')
+            return 'Contour Output:\t\tNot Saved (pyarrow is not installed)\n'
+
+        logger.info(f'{len(contours)} contour lines have been saved')
+        logger.debug(f'contour location: {contour_loc}')
+
+        return (
+            f'Contour Output:\t\t{contour_loc} '
+            f'({len(contours)} lines at {", ".join(map(str, levels))})\n'
+        )
+
+
+    def postprocessDEM(
+            self,
+            daz_predict: xr.DataArray
+    ) -> Tuple[xr.DataArray, xr.DataArray | None]:
+        """
+        Applying median filter (if enabled), depth limit, depth
+        direction, and gap filling (if enabled) from save options
+        to a copy of predicted depth
+        """
+
+        options = self.options
+        use_median = not options['filter']['disable']
+
+        az_filtered = sdb.postprocess_depth(
+            array=daz_predict.values[0],
+            filter_size=options['filter']['size'] if use_median else None,
+            method=MEDIAN_METHODS[options['filter']['method']],
+            top_limit=options['depth_limit']['upper'],
+            bottom_limit=options['depth_limit']['lower'],
+            flip=DEPTH_DIRECTION[options['direction']][1],
+            n_jobs=proc_op_dict['n_jobs']
+        )
+
+        daz_filled = None
+        if options['fill']['enabled']:
+            az_filtered, az_filled = sdb.fill_gaps(
+                az_filtered,
+                max_hole_size=options['fill']['max_hole_size'],
+                method=FILL_METHODS[options['fill']['method']],
+                n_jobs=proc_op_dict['n_jobs']
+            )
+            daz_filled = sdb.array_to_dataarray(
+                array=az_filled.astype(np.float32),
+                data_array=daz_predict
+            ).assign_coords(band_name=('band', ['filled_mask']))
+
+        daz_filtered = daz_predict.copy(data=az_filtered[np.newaxis])
+        if use_median:
+            daz_filtered = daz_filtered.assign_coords(
+                band_name=('band', ['filtered'])
+            )
+
+        return daz_filtered, daz_filled
+
+
+    def trainTestSave(
+        self,
+        train_data: pd.DataFrame,
+        test_data: pd.DataFrame,
+        save_location: Path | str,
+        data_format: str,
+        split: bool,
+    ) -> str:
+        """
+        Saving splitted train and test data into file
+        and returning the print info to be shown in result text browser.
+        """
+
+        if split:
+            train_save_loc = Path(save_location).with_name(
+                f'{Path(save_location).stem}_train{data_format}'
+            )
+            test_save_loc = Path(save_location).with_name(
+                f'{Path(save_location).stem}_test{data_format}'
+            )
+            if data_format == '.csv':
+                train_data.to_csv(train_save_loc, index=False)
+                test_data.to_csv(test_save_loc, index=False)
+            elif data_format == '.shp':
+                sdb.write_shapefile(
+                    train_data,
+                    train_save_loc,
+                    x_col_name='x',
+                    y_col_name='y',
+                    crs=self.results['sample_gdf'].crs
+                )
+                sdb.write_shapefile(
+                    test_data,
+                    test_save_loc,
+                    x_col_name='x',
+                    y_col_name='y',
+                    crs=self.results['sample_gdf'].crs
+                )
+
+            train_data_size = Path(train_save_loc).stat().st_size
+            test_data_size = Path(test_save_loc).stat().st_size
+            print_info = (
+                f'Train Data Output:\t{train_save_loc} '
+                f'{round(train_data_size / 2**10 / 2**10, 2)} MiB\n'
+                f'Test Data output:\t{test_save_loc} '
+                f'{round(test_data_size / 2**10 / 2**10, 2)} MiB\n'
+            )
+            logger.debug(f'train data location: {train_save_loc}')
+            logger.debug(f'test data location: {test_save_loc}')
+        else:
+            merge_data_loc = Path(save_location).with_name(
+                f'{Path(save_location).stem}_splitted_data{data_format}'
+            )
+            if data_format =='.gpkg':
+                sdb.write_shapefile(
+                    train_data,
+                    merge_data_loc,
+                    x_col_name='x',
+                    y_col_name='y',
+                    crs=self.results['sample_gdf'].crs,
+                    layer='train_data'
+                )
+                sdb.write_shapefile(
+                    test_data,
+                    merge_data_loc,
+                    x_col_name='x',
+                    y_col_name='y',
+                    crs=self.results['sample_gdf'].crs,
+                    layer='test_data'
+                )
+
+            train_test_data_size = Path(merge_data_loc).stat().st_size
+            print_info = (
+                f'Train and Test Data Output:\t{merge_data_loc} '
+                f'{round(train_test_data_size / 2**10 / 2**10, 2)} MiB\n'
+            )
+            logger.debug(f'train & test data location: {merge_data_loc}')
+
+        return print_info
+
+
+
+def main():
+
     global sdb_gui
     sdb_gui = SDBWidget()
     sdb_gui.show()
@@ -1947,6 +3720,23 @@ def default_values():
         },
         'backend': 'threading',
         'n_jobs': -2,
+        'dask_scheduler': '',
+        'rf_engine': list(RF_ENGINES.keys())[0],
+        'uncertainty': list(UNCERTAINTY_TYPES.keys())[0],
+        'precision': list(PRECISION.keys())[0],
+        'working_resolution': 1,
+        'derived': {
+            'stumpf': [],
+            'lyzenga': [],
+            'keep_bands': True,
+        },
+        'water_mask': {
+            'enabled': False,
+            'green_band': 2,
+            'ir_band': 4,
+            'otsu': True,
+            'threshold': 0.0,
+        },
         'current_eval': 'Use Current Prediction',
         'selection' : OrderedDict([
             (random_selection['name'], random_selection),
@@ -1954,8 +3744,17 @@ def default_values():
         ]),
         'current_selection': random_selection['name'],
         'backend_set': (
-            'loky', 'threading', 'multiprocessing'
-        )
+            'loky', 'threading', 'multiprocessing', 'dask'
+        ),
+        'search': {
+            'type': list(SEARCH_TYPES.keys())[0],
+            'cv': 5,
+            'n_iter': 10,
+        },
+        'compare': {
+            'models': [],
+            'predict': [],
+        }
     }
 
     knn_op_dict = {
@@ -1963,15 +3762,21 @@ def default_values():
         'model_parameters': OrderedDict([
             ('n_neighbors', 5),
             ('weights', 'distance'),
-            ('algorithm', 'auto'),
-            ('leaf_size', 30)
+            ('algorithm', 'kd_tree'),
+            ('leaf_size', 30),
+            ('standardize', False)
         ]),
         'weights_set': (
             'uniform', 'distance'
         ),
         'algorithm_set': (
-            'auto', 'ball_tree', 'kd_tree', 'brute'
-        )
+            'kd_tree', 'ball_tree', 'auto', 'brute'
+        ),
+        'search_space': OrderedDict([
+            ('n_neighbors', [3, 5, 7, 9, 11, 15]),
+            ('weights', ['uniform', 'distance']),
+            ('standardize', [False, True])
+        ])
     }
 
     mlr_op_dict = {
@@ -1979,6 +3784,9 @@ def default_values():
         'model_parameters': OrderedDict([
             ('fit_intercept', True),
             ('copy_X', True)
+        ]),
+        'search_space': OrderedDict([
+            ('fit_intercept', [True, False])
         ])
     }
 
@@ -1991,7 +3799,11 @@ def default_values():
         ]),
         'criterion_set': (
             'squared_error', 'absolute_error', 'poisson', 'friedman_mse'
-        )
+        ),
+        'search_space': OrderedDict([
+            ('n_estimators', [100, 200, 300, 500]),
+            ('bootstrap', [True, False])
+        ])
     }
 
     main_dict = {
@@ -2014,8 +3826,33 @@ def default_values():
         'filter': {
             'disable': False,
             'size': 3,
+            'method': list(MEDIAN_METHODS.keys())[0],
+        },
+        'fill': {
+            'enabled': False,
+            'max_hole_size': 100,
+            'method': list(FILL_METHODS.keys())[0],
+        },
+        'residual': {
+            'save': False,
+            'radius': 100.0,
+        },
+        'reproject': {
+            'enabled': False,
+            'crs': '',
+            'resolution': 0.0,
+            'resampling': list(RESAMPLING_METHODS.keys())[0],
+            'extent': '',
+        },
+        'contour': {
+            'save': False,
+            'levels': '0, -2, -5, -10',
+            'format': list(CONTOUR_FORMATS.keys())[0],
         },
         'scatter_plot': False,
+        'scatter_mode': list(SCATTER_MODES.keys())[0],
+        'model': False,
+        'water_mask': False,
         'train_test': {
             'save': False,
             'format': list(TRAIN_TEST_SAVE.keys())[0],
@@ -2038,6 +3875,202 @@ def default_values():
     return default_dict
 
 
+def working_image(
+        image: xr.DataArray,
+        factor: int | None = None
+) -> Tuple[xr.DataArray, pd.DataFrame]:
+    """
+    Averaging the loaded image to the working resolution (factor, or
+    the one from processing options) and unravelling it into a table
+    of bands
+    """
+
+    if factor is None:
+        factor = proc_op_dict['working_resolution']
+
+    image = sdb.aggregate_raster(image, factor)
+
+    return image, sdb.unravel(
+        image,
+        dtype=PRECISION[proc_op_dict['precision']]
+    )
+
+
+def image_sensor(image: xr.DataArray) -> str | None:
+    """
+    Sensor of the image from its tags, or from its file name prefix
+    (e.g. S2A or LC08), None if it is unknown
+    """
+
+    tags = {str(key).upper(): value for key, value in image.attrs.items()}
+    for tag in SENSOR_TAGS:
+        if tag in tags:
+            return str(tags[tag])
+
+    name = Path(image.encoding.get('source', '')).name.upper()
+    for prefix, sensor in SENSOR_PREFIXES.items():
+        if name.startswith(prefix):
+            return sensor
+
+    return None
+
+
+def working_resolution_info() -> str:
+    """
+    Working resolution line of the result report, empty on native resolution
+    """
+
+    factor = proc_op_dict['working_resolution']
+    if factor == 1:
+        return ''
+
+    x_res, y_res = image_raw.rio.resolution()
+
+    return (
+        f'Working Resolution:\t{abs(x_res)} , {abs(y_res)} '
+        f'({factor} x {factor} pixels averaged)\n'
+    )
+
+
+def derived_parameters() -> Dict[str, Any] | None:
+    """
+    Collecting derived features parameters from processing options,
+    or returning None if no derived feature is selected
+    """
+
+    derived_options = proc_op_dict['derived']
+    if not derived_options['stumpf'] and not derived_options['lyzenga']:
+        return None
+
+    return {
+        'stumpf': [tuple(pair) for pair in derived_options['stumpf']],
+        'lyzenga': list(derived_options['lyzenga']),
+        'keep_bands': derived_options['keep_bands'],
+    }
+
+
+def derived_info() -> str:
+    """
+    Printing selected derived features
+    """
+
+    derived = derived_parameters()
+    if derived is None:
+        return 'Derived Features:\tDisabled\n'
+
+    print_info = ''
+    if derived['stumpf']:
+        print_info += (
+            'Stumpf Log Ratios:\t'
+            f'{", ".join(f"{i}/{j}" for i, j in derived["stumpf"])}\n'
+        )
+    if derived['lyzenga']:
+        print_info += (
+            'Lyzenga Log Bands:\t'
+            f'{", ".join(str(band) for band in derived["lyzenga"])}\n'
+        )
+    print_info += f'Keep Band Values:\t{derived["keep_bands"]}\n'
+
+    return print_info
+
+
+def accuracy_info(results: Dict[str, Any]) -> str:
+    """
+    Printing extended accuracy metrics and per depth bin accuracy
+    """
+
+    if 'accuracy' not in results:
+        return ''
+
+    accuracy = results['accuracy']
+    float_format = '{:.3f}'.format
+
+    return (
+        'Accuracy (95% Bootstrap Confidence Interval):\n'
+        f'{accuracy["metrics"].to_string(index=False, float_format=float_format)}\n\n'
+        'Accuracy per Depth Bin:\n'
+        f'{accuracy["depth_bins"].to_string(index=False, float_format=float_format)}\n\n'
+    )
+
+
+def prediction_overviews(daz_predict: xr.DataArray) -> Dict[str, Any]:
+    """
+    Building the quicklook image of depth prediction from its overview
+    levels, keeping only their decimation factors for internal GeoTIFF
+    overviews (rebuilt by GDAL from the saved DEM)
+    """
+
+    overviews = sdb.overview_pyramid(daz_predict.values[0])
+
+    return {
+        'overview_factors': list(overviews),
+        'quicklook': sdb.quicklook(overviews, size=QUICKLOOK_SIZE),
+    }
+
+
+def uncertainty_info(results: Dict[str, Any]) -> str:
+    """
+    Printing uncertainty type and its mean value
+    """
+
+    if 'uncertainty' not in results:
+        return 'RF Uncertainty:\t\tDisabled\n'
+
+    return (
+        f'RF Uncertainty:\t\t{proc_op_dict["uncertainty"]}\n'
+        'Mean Uncertainty:\t'
+        f'{np.nanmean(results["uncertainty"].values):.3f}\n'
+    )
+
+
+def scene_water_mask(image: xr.DataArray | None = None) -> Dict[str, Any]:
+    """
+    Computing water mask of the loaded image (or the given image) from
+    water mask options, or returning an empty dictionary if water mask
+    is disabled
+    """
+
+    if image is None:
+        image = image_raw
+
+    water_options = proc_op_dict['water_mask']
+    if not water_options['enabled']:
+        return {}
+
+    logger.debug('compute water mask')
+    mask, threshold = sdb.water_mask(
+        raster=image,
+        green_band=water_options['green_band'],
+        ir_band=water_options['ir_band'],
+        threshold=None if water_options['otsu'] else water_options['threshold']
+    )
+    logger.info(f'water threshold: {threshold}, water pixels: {mask.sum()}')
+
+    daz_mask = sdb.array_to_dataarray(
+        array=mask.astype(np.float32),
+        data_array=image,
+        band_name=2
+    )
+    daz_mask = daz_mask.assign_coords(band_name=('band', ['water_mask']))
+
+    return {'water_mask': daz_mask, 'water_threshold': threshold}
+
+
+def fill_missing(saved: dict, defaults: dict) -> dict:
+    """
+    Fill options that are missing from saved settings with default values
+    so settings from older versions can still be loaded
+    """
+
+    for key, value in defaults.items():
+        if key not in saved:
+            saved[key] = value
+        elif isinstance(value, dict) and isinstance(saved[key], dict):
+            fill_missing(saved[key], value)
+
+    return saved
+
+
 def resource_path(relative_path):
     """
     Get the absolute path to the resource, works for dev and for PyInstaller
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import sdb
+
+
+@pytest.fixture
+def samples():
+    rng = np.random.default_rng(0)
+    features = pd.DataFrame(rng.random((200, 3)), columns=['b1', 'b2', 'b3'])
+    label = pd.Series(-10 * features['b1'] + features['b2'])
+    return features, label
+
+
+def test_prediction_without_uncertainty(samples):
+    features, label = samples
+    z_predict, z_validate = sdb.prediction(
+        'rf', features, features, label, features_test=features,
+        n_estimators=10, n_jobs=1
+    )
+    assert z_predict.shape == (len(features),)
+    assert z_validate.shape == (len(features),)
+
+
+def test_prediction_with_uncertainty(samples):
+    features, label = samples
+    z_predict, z_validate, z_uncertainty = sdb.prediction(
+        'rf', features, features, label, uncertainty='std',
+        n_estimators=10, n_jobs=1
+    )
+    assert z_validate is None
+    assert z_uncertainty.shape == z_predict.shape
+
+
+@pytest.fixture
+def forest(samples):
+    features, label = samples
+    regressor = sdb.fit_regressor(
+        'rf', features, label, n_estimators=20, random_state=0, n_jobs=1
+    )
+    return regressor, features
+
+
+@pytest.mark.parametrize('use_numba', [True, False])
+def test_forest_predict_matches_sklearn(forest, use_numba, monkeypatch):
+    regressor, features = forest
+    if not use_numba:
+        monkeypatch.setattr(sdb.modeling, 'njit', None)
+    elif sdb.modeling.njit is None:
+        pytest.skip('numba is not installed')
+
+    z_flat = sdb.forest_predict(
+        sdb.compile_forest(regressor), features, n_jobs=1, block_size=64
+    )
+
+    np.testing.assert_allclose(
+        z_flat, regressor.predict(features.to_numpy()), atol=1e-5
+    )
+
+
+def test_forest_predict_restores_numba_threads(forest):
+    numba = pytest.importorskip('numba')
+    regressor, features = forest
+    num_threads = numba.get_num_threads()
+
+    sdb.forest_predict(sdb.compile_forest(regressor), features, n_jobs=1)
+
+    assert numba.get_num_threads() == num_threads
+
+
+def test_halving_leaderboard_lists_candidates_once(samples):
+    features, label = samples
+    param_grid = {'n_estimators': [5, 10], 'max_depth': [2, 4, None]}
+
+    _, leaderboard = sdb.parameter_search(
+        'rf', features, label, param_grid, search='halving', cv=3, n_jobs=1
+    )
+
+    assert len(leaderboard) == 6
+    assert leaderboard['rank'].tolist() == list(range(1, 7))
+    assert leaderboard['iter'].is_monotonic_decreasing
@@ -0,0 +1,38 @@
+import io
+
+import numpy as np
+import pytest
+
+import sdb
+
+
+@pytest.mark.parametrize('mode', sorted(sdb.postprocessing.PLOT_MODES))
+def test_scatter_plotter_single_value(mode):
+    # Every point at one value used to fail on an empty color scale
+    fig, ax = sdb.scatter_plotter(
+        np.array([1.0, 1.0]), np.array([1.0, 1.0]), mode=mode
+    )
+    fig.savefig(io.BytesIO())
+
+
+@pytest.mark.parametrize('mode', sorted(sdb.postprocessing.PLOT_MODES))
+def test_scatter_plotter_no_finite_pair(mode):
+    fig, ax = sdb.scatter_plotter(
+        np.array([np.nan, 1.0]), np.array([1.0, np.nan]), mode=mode
+    )
+    fig.savefig(io.BytesIO())
+
+
+@pytest.mark.parametrize('block_rows', [1, 3, 512])
+def test_fill_gaps_holes_across_blocks(block_rows):
+    array = np.arange(100, dtype=np.float64).reshape(10, 10)
+    # A 6 cell hole crossing block seams and a 20 cell hole
+    array[2:8, 4] = np.nan
+    array[0:10, 8:10] = np.nan
+
+    filled, fill = sdb.fill_gaps(array, max_hole_size=10, block_rows=block_rows)
+
+    assert fill[2:8, 4].all()
+    assert not fill[:, 8:10].any()
+    assert np.isfinite(filled[2:8, 4]).all()
+    assert np.isnan(filled[:, 8:10]).all()